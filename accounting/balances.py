@@ -0,0 +1,270 @@
+"""
+As-of-date account balances backed by monthly checkpoints.
+
+A checkpoint holds an account's cumulative ledger debits and credits up to the
+end of a month. The balance on any date is the account's opening balance plus
+the nearest checkpoint on or before that date plus the ledger rows since, so
+reading a balance only touches the current month's rows.
+
+Checkpoints are built by the build_balance_checkpoints command and kept
+correct afterwards by shifting every later checkpoint when a ledger row is
+written (see accounting.signals). Bulk writes that bypass signals must call
+apply_ledger_delta themselves.
+
+Balances are stored debit-positive. An opening balance is entered on the
+account's natural side, so accounts of the CREDIT_TYPES open with a credit.
+
+Each account's current balance (opening balance plus every ledger row) is
+kept on Account.current_balance, moved with F() expressions as ledger rows
+are written so concurrent postings never overwrite each other. Bulk writes
+call apply_balance_deltas; the reconcile_account_balances command checks
+the stored balances against the ledger.
+"""
+
+import calendar
+from datetime import date
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Sum, F, Value, Case, When, Subquery, OuterRef, DecimalField, DateField
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+from accounts.models import Account
+from .models import Ledger, BalanceCheckpoint
+
+MONEY = DecimalField(max_digits=20, decimal_places=2)
+
+# Checkpoint date used for accounts without checkpoints
+BEGINNING = date(1, 1, 1)
+
+# Account types whose balances are naturally credits
+CREDIT_TYPES = ['liability', 'equity', 'income']
+
+
+def opening_net(account_type, opening_balance):
+    """Return an opening balance as a debit-positive net, credited on credit-type accounts."""
+    opening_balance = Decimal(str(opening_balance or 0))
+    return -opening_balance if account_type in CREDIT_TYPES else opening_balance
+
+
+def opening_net_expression():
+    """Return opening_net of each account as a query expression."""
+    return Case(
+        When(account_type__in=CREDIT_TYPES, then=-F('opening_balance')),
+        default=F('opening_balance'),
+        output_field=MONEY
+    )
+
+
+def month_end(day):
+    """Return the last day of a date's month."""
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+
+def apply_ledger_delta(account_id, day, debit, credit, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) a ledger movement from the checkpoints after it.
+
+    Args:
+        account_id (int): Account of the ledger row.
+        day (date): Date of the ledger row.
+        debit (Decimal): Debit amount.
+        credit (Decimal): Credit amount.
+        sign (int): 1 to add the movement, -1 to remove it.
+    """
+    debit = Decimal(str(debit or 0))
+    credit = Decimal(str(credit or 0))
+    if not debit and not credit:
+        return
+    BalanceCheckpoint.objects.filter(account_id=account_id, period_end__gte=day).update(
+        debit=F('debit') + sign * debit,
+        credit=F('credit') + sign * credit
+    )
+
+
+def apply_balance_deltas(deltas):
+    """
+    Add net debits to the current balances of accounts in one UPDATE.
+
+    Args:
+        deltas (dict): account id -> net debit (debit minus credit) to add.
+
+    Returns:
+        dict: account id -> current balance after the update, for every account in deltas.
+    """
+    if not deltas:
+        return {}
+    changed = {account_id: delta for account_id, delta in deltas.items() if delta}
+    if changed:
+        Account.objects.filter(pk__in=changed).update(
+            current_balance=F('current_balance') + Case(
+                *[When(pk=account_id, then=Value(delta)) for account_id, delta in changed.items()],
+                output_field=MONEY
+            )
+        )
+    return dict(Account.objects.filter(pk__in=deltas).values_list('pk', 'current_balance'))
+
+
+def reconcile_balances(account_ids, fix=False):
+    """
+    Compare the stored current balances of accounts with their ledger.
+
+    Args:
+        account_ids (list): Accounts to check.
+        fix (bool): Correct the stored balances that drifted.
+
+    Returns:
+        list: One dict per drifted account with account_id, code, business_id,
+            stored and expected balances and the drift between them.
+    """
+    with transaction.atomic():
+        accounts = Account.objects.filter(pk__in=account_ids)
+        if fix:
+            # Postings wait for the lock, so the ledger cannot move under the comparison
+            accounts = accounts.select_for_update()
+        accounts = list(
+            accounts.order_by('pk').values(
+                'id', 'code', 'business_id', 'account_type', 'opening_balance', 'current_balance'
+            )
+        )
+        totals = dict(
+            Ledger.objects.filter(account_id__in=account_ids)
+            .order_by()
+            .values('account_id')
+            .annotate(net=Sum(F('debit') - F('credit'), output_field=MONEY))
+            .values_list('account_id', 'net')
+        )
+
+        drifts = []
+        for account in accounts:
+            expected = (
+                opening_net(account['account_type'], account['opening_balance'])
+                + (totals.get(account['id']) or Decimal('0'))
+            )
+            if account['current_balance'] != expected:
+                drifts.append({
+                    'account_id': account['id'],
+                    'code': account['code'],
+                    'business_id': account['business_id'],
+                    'stored': account['current_balance'],
+                    'expected': expected,
+                    'drift': account['current_balance'] - expected,
+                })
+        if fix:
+            apply_balance_deltas({drift['account_id']: -drift['drift'] for drift in drifts})
+    return drifts
+
+
+def _latest_checkpoint(day, field):
+    checkpoints = BalanceCheckpoint.objects.filter(
+        account=OuterRef('pk'), period_end__lte=day
+    ).order_by('-period_end')
+    return Subquery(checkpoints.values(field)[:1])
+
+
+def _ledger_since_checkpoint(day, field):
+    rows = (
+        Ledger.objects.filter(
+            account=OuterRef('pk'),
+            date__lte=day,
+            date__gt=OuterRef('checkpoint_end')
+        )
+        .order_by()
+        .values('account')
+        .annotate(total=Sum(field))
+        .values('total')
+    )
+    return Coalesce(Subquery(rows, output_field=MONEY), Value(Decimal('0')), output_field=MONEY)
+
+
+def balances_as_of(accounts, day):
+    """
+    Annotate accounts with their cumulative ledger totals and balance on a date.
+
+    Each account costs one checkpoint lookup and one scan of the ledger rows
+    since that checkpoint, all in a single query.
+
+    Args:
+        accounts (QuerySet): Accounts to read.
+        day (date): Balances include ledger rows dated on or before this day.
+
+    Returns:
+        QuerySet: Accounts with debit_total, credit_total and balance attributes.
+    """
+    return (
+        accounts
+        .annotate(
+            checkpoint_end=Coalesce(
+                _latest_checkpoint(day, 'period_end'), Value(BEGINNING), output_field=DateField()
+            ),
+            checkpoint_debit=Coalesce(
+                _latest_checkpoint(day, 'debit'), Value(Decimal('0')), output_field=MONEY
+            ),
+            checkpoint_credit=Coalesce(
+                _latest_checkpoint(day, 'credit'), Value(Decimal('0')), output_field=MONEY
+            ),
+        )
+        .annotate(
+            debit_total=F('checkpoint_debit') + _ledger_since_checkpoint(day, 'debit'),
+            credit_total=F('checkpoint_credit') + _ledger_since_checkpoint(day, 'credit'),
+        )
+        .annotate(
+            balance=opening_net_expression() + F('debit_total') - F('credit_total')
+        )
+    )
+
+
+def balance_as_of(account, day):
+    """Return one account's balance at the end of a day."""
+    return balances_as_of(Account.objects.filter(pk=account.pk), day).values_list(
+        'balance', flat=True
+    ).get()
+
+
+def build_checkpoints(business_ids=None, until=None, batch_size=1000):
+    """
+    Rebuild the monthly checkpoints of every account from the ledger.
+
+    Args:
+        business_ids (list): Limit the rebuild to these businesses.
+        until (date): Only checkpoint months ending before this date (default today).
+        batch_size (int): Number of checkpoints inserted per query.
+
+    Returns:
+        int: Number of checkpoints written.
+    """
+    until = until or timezone.localdate()
+    rows = Ledger.objects.filter(date__lt=until.replace(day=1))
+    checkpoints = BalanceCheckpoint.objects.all()
+    if business_ids:
+        rows = rows.filter(business_id__in=business_ids)
+        checkpoints = checkpoints.filter(business_id__in=business_ids)
+
+    months = (
+        rows.order_by()
+        .annotate(month=TruncMonth('date'))
+        .values('business_id', 'account_id', 'month')
+        .annotate(debit=Sum('debit'), credit=Sum('credit'))
+        .order_by('account_id', 'month')
+    )
+
+    def cumulative():
+        account_id = None
+        debit = credit = Decimal('0')
+        for row in months.iterator():
+            if row['account_id'] != account_id:
+                account_id = row['account_id']
+                debit = credit = Decimal('0')
+            debit += Decimal(str(row['debit'] or 0))
+            credit += Decimal(str(row['credit'] or 0))
+            yield BalanceCheckpoint(
+                business_id=row['business_id'],
+                account_id=account_id,
+                period_end=month_end(row['month']),
+                debit=debit,
+                credit=credit
+            )
+
+    with transaction.atomic():
+        checkpoints.delete()
+        created = BalanceCheckpoint.objects.bulk_create(cumulative(), batch_size=batch_size)
+    return len(created)
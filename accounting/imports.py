@@ -0,0 +1,195 @@
+"""
+Bulk import of journal entries from JSON or CSV.
+
+Every entry is validated on its own: it must have a unique reference, a
+date outside closed periods, and at least two lines on known account codes
+whose debits and credits balance. Valid entries are written in chunks, each
+chunk in its own transaction, through posting.write_entries, which inserts
+entries, items and ledger rows with bulk_create. Invalid entries and chunks
+that fail to save are reported without stopping the rest of the import.
+"""
+
+import csv
+import io
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from django.db import IntegrityError, transaction
+from accounts.models import JournalEntry
+from .locks import period_locks
+from .posting import load_accounts, write_entries
+
+IMPORT_COLUMNS = ['date', 'reference_no', 'narration', 'account_code', 'debit', 'credit']
+
+IMPORT_CHUNK_SIZE = 500
+
+MAX_IMPORT_ENTRIES = 10000
+
+
+def entries_from_csv(file):
+    """
+    Read journal entries from a CSV file with one line per row.
+
+    Consecutive rows sharing a reference_no form one entry; the entry's
+    date and narration are taken from its first row.
+
+    Returns:
+        list: (row number, entry dict) pairs, numbered by the entry's first line.
+
+    Raises:
+        ValueError: If required columns are missing.
+    """
+    reader = csv.DictReader(io.TextIOWrapper(file, encoding='utf-8-sig'))
+    missing = [column for column in IMPORT_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"CSV is missing columns: {', '.join(missing)}")
+
+    entries = []
+    for line, row in enumerate(reader, start=2):
+        reference_no = (row['reference_no'] or '').strip()
+        if not entries or entries[-1][1]['reference_no'] != reference_no:
+            entries.append((line, {
+                'date': row['date'],
+                'reference_no': reference_no,
+                'narration': row['narration'],
+                'items': [],
+            }))
+        entries[-1][1]['items'].append({
+            'account_code': row['account_code'],
+            'debit': row['debit'],
+            'credit': row['credit'],
+        })
+    return entries
+
+
+def entries_from_json(data):
+    """
+    Read journal entries from parsed JSON: a list of entries or {"entries": [...]}.
+
+    Returns:
+        list: (entry number, entry dict) pairs.
+
+    Raises:
+        ValueError: If the payload is not a list of objects.
+    """
+    if isinstance(data, dict):
+        data = data.get('entries')
+    if not isinstance(data, list) or not all(isinstance(entry, dict) for entry in data):
+        raise ValueError('entries must be a list of objects')
+    return list(enumerate(data, start=1))
+
+
+def _money(value):
+    if value in (None, ''):
+        return Decimal('0')
+    amount = Decimal(str(value).strip())
+    if not amount.is_finite() or amount < 0:
+        raise InvalidOperation
+    return amount.quantize(Decimal('0.01'))
+
+
+def validate_entry(entry, accounts):
+    """
+    Check one imported entry.
+
+    Args:
+        entry (dict): date, reference_no, narration and items with
+            account_code, debit and credit.
+        accounts (dict): Account code -> account id.
+
+    Returns:
+        tuple: (errors, (date, reference_no, narration, lines)) where lines are
+            (account id, amount) pairs with debits positive and credits negative.
+    """
+    errors = []
+    try:
+        day = date.fromisoformat(str(entry.get('date') or '').strip())
+    except ValueError:
+        day = None
+        errors.append('date must be YYYY-MM-DD')
+
+    reference_no = str(entry.get('reference_no') or '').strip()
+    if not reference_no:
+        errors.append('reference_no is required')
+    elif len(reference_no) > JournalEntry._meta.get_field('reference_no').max_length:
+        errors.append('reference_no is too long')
+
+    items = entry.get('items')
+    if not isinstance(items, list) or len(items) < 2:
+        errors.append('an entry needs at least two items')
+        items = []
+
+    lines = []
+    for number, item in enumerate(items, start=1):
+        if not isinstance(item, dict):
+            errors.append(f'item {number} must be an object')
+            continue
+        code = str(item.get('account_code') or '').strip()
+        if code not in accounts:
+            errors.append(f'item {number}: unknown account code {code!r}')
+        try:
+            debit, credit = _money(item.get('debit')), _money(item.get('credit'))
+        except (InvalidOperation, ValueError):
+            errors.append(f'item {number}: debit and credit must be positive amounts')
+            continue
+        if bool(debit) == bool(credit):
+            errors.append(f'item {number}: give either a debit or a credit')
+            continue
+        if code in accounts:
+            lines.append((accounts[code], debit - credit))
+
+    if lines and not errors and sum(amount for _, amount in lines):
+        errors.append('debits and credits do not balance')
+    return errors, (day, reference_no, str(entry.get('narration') or '').strip(), lines)
+
+
+def import_entries(user, business_id, entries, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Validate and write imported journal entries.
+
+    Args:
+        user (User): The importing user.
+        business_id (int): The business the entries belong to.
+        entries (list): (row number, entry dict) pairs from entries_from_csv
+            or entries_from_json.
+        chunk_size (int): Entries written per transaction.
+
+    Returns:
+        dict: imported count and errors, a list of {row, reference_no, errors}.
+    """
+    accounts = load_accounts(business_id, user.id)
+    references = [str(entry.get('reference_no') or '').strip() for _, entry in entries]
+    taken = set(JournalEntry.objects.filter(reference_no__in=references).values_list('reference_no', flat=True))
+
+    is_locked = period_locks()
+    errors = []
+    valid = []
+    for row, entry in entries:
+        entry_errors, (day, reference_no, narration, lines) = validate_entry(entry, accounts)
+        if reference_no in taken:
+            entry_errors.append(f'reference_no {reference_no} already exists')
+        if day and is_locked(business_id, day):
+            entry_errors.append(f'the accounting period containing {day} is closed')
+        if entry_errors:
+            errors.append({'row': row, 'reference_no': reference_no, 'errors': entry_errors})
+            continue
+        taken.add(reference_no)
+        valid.append((row, JournalEntry(
+            user=user, business_id=business_id, date=day, reference_no=reference_no, narration=narration
+        ), lines))
+
+    imported = 0
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        try:
+            with transaction.atomic():
+                write_entries([entry for _, entry, _ in chunk], [lines for _, _, lines in chunk])
+        except IntegrityError as e:
+            errors += [
+                {'row': row, 'reference_no': entry.reference_no, 'errors': [f'not saved: {e}']}
+                for row, entry, _ in chunk
+            ]
+            continue
+        imported += len(chunk)
+
+    errors.sort(key=lambda error: error['row'])
+    return {'imported': imported, 'errors': errors}
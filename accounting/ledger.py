@@ -0,0 +1,131 @@
+"""
+Keyset-paginated account ledgers with running balances computed in SQL.
+
+Pages are ordered by (date, id) and carry a signed cursor holding the last
+row's key and running balance, so the next page starts from that balance
+instead of re-reading the account's history.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core import signing
+from django.db.models import Sum, F, Q, Value, Window, DecimalField
+from django.db.models.expressions import RowRange
+from .balances import balance_as_of, opening_net
+from .models import Ledger
+
+LEDGER_PAGE_SIZE = 100
+MAX_LEDGER_PAGE_SIZE = 1000
+
+CURSOR_SALT = 'accounting.ledger'
+
+LEDGER_FIELDS = ['id', 'date', 'reference_no', 'narration', 'debit', 'credit']
+
+MONEY = DecimalField(max_digits=20, decimal_places=2)
+
+
+def encode_cursor(row):
+    """Return the cursor of the page that follows a ledger row."""
+    return signing.dumps(
+        [row['date'].isoformat(), row['id'], str(row['running_balance'])],
+        salt=CURSOR_SALT, compress=True
+    )
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor made by encode_cursor.
+
+    Returns:
+        tuple: (date, id, running balance) of the last row of the previous page.
+
+    Raises:
+        ValueError: If the cursor is malformed or was tampered with.
+    """
+    try:
+        day, row_id, balance = signing.loads(cursor, salt=CURSOR_SALT)
+        return date.fromisoformat(day), int(row_id), Decimal(balance)
+    except (signing.BadSignature, TypeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def running_balance(opening_balance):
+    """Window expression adding each row's net debit to the balance before it."""
+    return Value(opening_balance, output_field=MONEY) + Window(
+        Sum(F('debit') - F('credit'), output_field=MONEY),
+        order_by=[F('date').asc(), F('id').asc()],
+        frame=RowRange(start=None, end=0),
+        output_field=MONEY
+    )
+
+
+def balance_before(account, day):
+    """Return an account's balance at the start of a day."""
+    return balance_as_of(account, day - timedelta(days=1))
+
+
+def ledger_rows(account, opening_balance, after=None, start_date=None, end_date=None):
+    """
+    Return an account's ledger rows with their running balance, in (date, id) order.
+
+    Args:
+        account (Account): The account.
+        opening_balance (Decimal): Balance before the first returned row.
+        after (tuple): Only rows after this (date, id) key.
+        start_date (date): Only rows on or after this date.
+        end_date (date): Only rows on or before this date.
+
+    Returns:
+        QuerySet: Row dicts with a running_balance key.
+    """
+    rows = Ledger.objects.filter(account=account)
+    if after:
+        day, row_id = after
+        rows = rows.filter(Q(date__gt=day) | Q(date=day, id__gt=row_id))
+    elif start_date:
+        rows = rows.filter(date__gte=start_date)
+    if end_date:
+        rows = rows.filter(date__lte=end_date)
+    return (
+        rows.annotate(running_balance=running_balance(opening_balance))
+        .order_by('date', 'id')
+        .values(*LEDGER_FIELDS, 'running_balance')
+    )
+
+
+def ledger_page(account, cursor=None, start_date=None, end_date=None, limit=LEDGER_PAGE_SIZE):
+    """
+    Return one page of an account's ledger.
+
+    Args:
+        account (Account): The account.
+        cursor (str): Cursor of the page to read, or None for the first page.
+        start_date (date): First date of the first page.
+        end_date (date): Last date shown.
+        limit (int): Maximum number of rows per page.
+
+    Returns:
+        dict: opening_balance, closing_balance, entries and next_cursor.
+
+    Raises:
+        ValueError: If the cursor is invalid.
+    """
+    after = None
+    if cursor:
+        day, row_id, opening_balance = decode_cursor(cursor)
+        after = (day, row_id)
+    elif start_date:
+        opening_balance = balance_before(account, start_date)
+    else:
+        opening_balance = opening_net(account.account_type, account.opening_balance)
+
+    rows = list(ledger_rows(account, opening_balance, after, start_date, end_date)[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return {
+        'opening_balance': opening_balance,
+        'closing_balance': rows[-1]['running_balance'] if rows else opening_balance,
+        'entries': rows,
+        'next_cursor': encode_cursor(rows[-1]) if has_more else None,
+    }
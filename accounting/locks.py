@@ -0,0 +1,71 @@
+"""
+Write locks on closed accounting periods.
+"""
+
+from datetime import date
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from .models import ClosedPeriod
+
+CLOSED_PERIODS_KEY = 'closed-periods:{}'
+
+
+class PeriodClosedError(PermissionDenied):
+    """Raised when a write touches a date inside a closed period."""
+
+
+def closed_periods(business_id):
+    """Return the (id, start, end) of a business's closed periods, cached."""
+    if business_id is None:
+        return []
+    key = CLOSED_PERIODS_KEY.format(business_id)
+    periods = cache.get(key)
+    if periods is None:
+        periods = list(
+            ClosedPeriod.objects.filter(business_id=business_id)
+            .order_by('period_start', '-period_end')
+            .values_list('id', 'period_start', 'period_end')
+        )
+        cache.set(key, periods, None)
+    return periods
+
+
+def forget_closed_periods(business_id):
+    """Drop the cached closed periods of a business."""
+    cache.delete(CLOSED_PERIODS_KEY.format(business_id))
+
+
+def is_locked(business_id, day):
+    """Return whether a day falls inside one of a business's closed periods."""
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    return any(start <= day <= end for _, start, end in closed_periods(business_id))
+
+
+def period_locks():
+    """
+    Return an is_locked function for checking many dates.
+
+    Each business's closed periods are read from the cache once, on its
+    first check, instead of once per date.
+    """
+    periods = {}
+
+    def locked(business_id, day):
+        if business_id not in periods:
+            periods[business_id] = closed_periods(business_id)
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        return any(start <= day <= end for _, start, end in periods[business_id])
+    return locked
+
+
+def check_unlocked(business_id, day):
+    """
+    Refuse writes dated inside a closed period.
+
+    Raises:
+        PeriodClosedError: If the day is in a closed period of the business.
+    """
+    if day is not None and is_locked(business_id, day):
+        raise PeriodClosedError(f'The accounting period containing {day} is closed')
@@ -0,0 +1,36 @@
+"""
+Management command to rebuild the monthly account balance checkpoints.
+"""
+
+from datetime import datetime
+from django.core.management.base import BaseCommand
+from accounting.balances import build_checkpoints
+
+class Command(BaseCommand):
+    """Rebuild monthly balance checkpoints from the ledger."""
+
+    help = 'Rebuild the month-end balance checkpoints used for as-of-date balances'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--business', type=int, action='append', dest='business_ids',
+            help='Only rebuild checkpoints for this business id (repeatable)'
+        )
+        parser.add_argument(
+            '--until', type=lambda value: datetime.strptime(value, '%Y-%m-%d').date(),
+            help='Only checkpoint months ending before this date (YYYY-MM-DD, default today)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of checkpoints inserted per query'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command execution."""
+        count = build_checkpoints(
+            business_ids=options['business_ids'],
+            until=options['until'],
+            batch_size=options['batch_size']
+        )
+        self.stdout.write(f'Wrote {count} balance checkpoints')
+        self.stdout.write(self.style.SUCCESS('Balance checkpoints rebuilt successfully'))
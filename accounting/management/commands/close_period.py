@@ -0,0 +1,47 @@
+"""
+Management command to close an accounting period.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+from django.utils import timezone
+from accounts.models import BusinessProfile
+from accounting.models import ClosedPeriod
+from accounting.periods import close_period, parse_close_period
+
+class Command(BaseCommand):
+    """Close a month, quarter or fiscal year of a business."""
+
+    help = 'Close an accounting period, freezing its totals and locking rows dated inside it'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--business', type=int, required=True, dest='business_id',
+            help='Id of the business whose period is closed'
+        )
+        parser.add_argument(
+            '--period', required=True,
+            help='Period to close: 2025 for a fiscal year, 2025-Q2 or 2025-05'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command execution."""
+        business = BusinessProfile.objects.filter(pk=options['business_id']).first()
+        if business is None:
+            raise CommandError(f"Business {options['business_id']} does not exist")
+        try:
+            kind, start_date, end_date = parse_close_period(options['period'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if end_date >= timezone.localdate():
+            raise CommandError('Only ended periods can be closed')
+        if ClosedPeriod.objects.filter(business=business, period_start=start_date, period_end=end_date).exists():
+            raise CommandError('Period already closed')
+
+        try:
+            period = close_period(business.user, business.id, kind, start_date, end_date)
+        except IntegrityError:
+            # Closed by another process since the check above
+            raise CommandError('Period already closed')
+        self.stdout.write(f'Froze totals of {period.totals.count()} accounts')
+        self.stdout.write(self.style.SUCCESS(f'Closed {start_date} to {end_date}'))
@@ -0,0 +1,36 @@
+"""
+Management command to generate the due occurrences of recurring expenses.
+"""
+
+from datetime import datetime
+from django.core.management.base import BaseCommand
+from accounting.recurring import materialize_recurring_expenses
+
+class Command(BaseCommand):
+    """Insert the occurrences of daily, weekly, monthly and yearly expenses that fell due."""
+
+    help = 'Generate the occurrences of recurring expenses up to a date; safe to rerun'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--business', type=int, action='append', dest='business_ids',
+            help='Only generate expenses for this business id (repeatable)'
+        )
+        parser.add_argument(
+            '--until', type=lambda value: datetime.strptime(value, '%Y-%m-%d').date(),
+            help='Generate occurrences dated up to this date (YYYY-MM-DD, default today)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of expenses inserted per query'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command execution."""
+        count = materialize_recurring_expenses(
+            business_ids=options['business_ids'],
+            until=options['until'],
+            batch_size=options['batch_size']
+        )
+        self.stdout.write(f'Generated {count} recurring expense occurrences')
+        self.stdout.write(self.style.SUCCESS('Recurring expenses materialized successfully'))
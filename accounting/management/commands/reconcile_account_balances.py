@@ -0,0 +1,66 @@
+"""
+Management command to check stored account balances against the ledger.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import connections
+from accounts.models import Account
+from accounting.balances import reconcile_balances
+
+class Command(BaseCommand):
+    """Recompute account balances from the ledger in parallel chunks and report drift."""
+
+    help = 'Compare each account\'s current balance with its ledger and report (or fix) any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--business', type=int, action='append', dest='business_ids',
+            help='Only reconcile accounts of this business id (repeatable)'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Number of accounts checked per query'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Number of chunks checked in parallel'
+        )
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Correct the stored balances that drifted'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command execution."""
+        accounts = Account.objects.order_by('pk')
+        if options['business_ids']:
+            accounts = accounts.filter(business_id__in=options['business_ids'])
+        account_ids = list(accounts.values_list('pk', flat=True))
+        chunk_size = options['chunk_size']
+        chunks = [account_ids[start:start + chunk_size] for start in range(0, len(account_ids), chunk_size)]
+
+        def reconcile(chunk):
+            try:
+                return reconcile_balances(chunk, fix=options['fix'])
+            finally:
+                # Each worker thread opened its own connection
+                connections.close_all()
+
+        if options['workers'] > 1 and len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+                results = list(executor.map(reconcile, chunks))
+        else:
+            results = [reconcile_balances(chunk, fix=options['fix']) for chunk in chunks]
+
+        drifts = [drift for result in results for drift in result]
+        for drift in drifts:
+            self.stdout.write(
+                f"Account {drift['account_id']} ({drift['code']}) of business {drift['business_id']}: "
+                f"stored {drift['stored']}, ledger {drift['expected']}, drift {drift['drift']}"
+            )
+        self.stdout.write(f'Checked {len(account_ids)} accounts, {len(drifts)} drifted')
+        if drifts and not options['fix']:
+            self.stdout.write(self.style.WARNING('Run with --fix to correct the drifted balances'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Account balances reconciled successfully'))
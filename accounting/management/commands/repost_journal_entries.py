@@ -0,0 +1,53 @@
+"""
+Management command to regenerate the journal entries of historical documents.
+"""
+
+from django.core.management.base import BaseCommand
+from accounts.models import Expense
+from purchases.models import Bill
+from sales.models import Invoice
+from accounting.posting import post_documents
+
+DOCUMENT_MODELS = {
+    'invoices': Invoice,
+    'bills': Bill,
+    'expenses': Expense,
+}
+
+class Command(BaseCommand):
+    """Repost invoices, bills and expenses to the journal and ledger."""
+
+    help = 'Regenerate the automatic journal entries and ledger rows of invoices, bills and expenses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--business', type=int, action='append', dest='business_ids',
+            help='Only repost documents of this business id (repeatable)'
+        )
+        parser.add_argument(
+            '--only', choices=sorted(DOCUMENT_MODELS), action='append',
+            help='Only repost this kind of document (repeatable)'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Number of documents posted per transaction'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command execution."""
+        for name in options['only'] or list(DOCUMENT_MODELS):
+            documents = DOCUMENT_MODELS[name].objects.order_by('pk')
+            if options['business_ids']:
+                documents = documents.filter(business_id__in=options['business_ids'])
+
+            last_pk = 0
+            count = 0
+            while True:
+                chunk = list(documents.filter(pk__gt=last_pk)[:options['chunk_size']])
+                if not chunk:
+                    break
+                count += post_documents(chunk)
+                last_pk = chunk[-1].pk
+            self.stdout.write(f'Posted {count} journal entries for {name}')
+
+        self.stdout.write(self.style.SUCCESS('Journal entries reposted successfully'))
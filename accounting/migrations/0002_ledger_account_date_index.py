@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0001_initial'),
+        ('accounts', '0003_rename_pan_vat_businessprofile_tax_id_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ledger',
+            index=models.Index(fields=['account', 'date', 'id'], name='accounting__account_31f763_idx'),
+        ),
+    ]
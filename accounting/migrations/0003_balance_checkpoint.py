@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0002_ledger_account_date_index'),
+        ('accounts', '0003_rename_pan_vat_businessprofile_tax_id_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_end', models.DateField()),
+                ('debit', models.DecimalField(decimal_places=2, default=0.0, max_digits=20)),
+                ('credit', models.DecimalField(decimal_places=2, default=0.0, max_digits=20)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='accounts.account')),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accounts.businessprofile')),
+            ],
+            options={
+                'ordering': ['account', 'period_end'],
+                'unique_together': {('account', 'period_end')},
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0003_balance_checkpoint'),
+        ('accounts', '0005_account_code_per_business'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ledger',
+            index=models.Index(fields=['reference_no'], name='accounting__referen_047af0_idx'),
+        ),
+    ]
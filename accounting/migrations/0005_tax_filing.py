@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:37
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0004_ledger_reference_index'),
+        ('accounts', '0005_account_code_per_business'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaxFiling',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField()),
+                ('period_end', models.DateField()),
+                ('tax_collected', models.DecimalField(decimal_places=2, default=0.0, max_digits=15)),
+                ('tax_paid', models.DecimalField(decimal_places=2, default=0.0, max_digits=15)),
+                ('net_tax_payable', models.DecimalField(decimal_places=2, default=0.0, max_digits=15)),
+                ('breakdown', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('filed_at', models.DateTimeField(auto_now_add=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accounts.businessprofile')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-period_start'],
+                'unique_together': {('business', 'period_start', 'period_end')},
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0006_closed_period'),
+        ('accounts', '0007_document_sequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ledger',
+            index=models.Index(fields=['user', 'date', 'id'], name='accounting__user_id_768d62_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
 from accounts.models import BusinessProfile, Account
 
 class TaxConfiguration(models.Model):
@@ -30,6 +31,85 @@ class Ledger(models.Model):
 
     class Meta:
         ordering = ['date', 'created_at']
+        indexes = [
+            models.Index(fields=['account', 'date', 'id']),
+            models.Index(fields=['reference_no']),
+            # Keyset pagination of the API
+            models.Index(fields=['user', 'date', 'id']),
+        ]
 
     def __str__(self):
-        return f"{self.account.name} - {self.date}"
\ No newline at end of file
+        return f"{self.account.name} - {self.date}"
+
+
+class BalanceCheckpoint(models.Model):
+    """Cumulative ledger totals of an account at the end of a month."""
+    business = models.ForeignKey(BusinessProfile, on_delete=models.CASCADE)
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='checkpoints')
+    period_end = models.DateField()
+    debit = models.DecimalField(max_digits=20, decimal_places=2, default=0.00)
+    credit = models.DecimalField(max_digits=20, decimal_places=2, default=0.00)
+
+    class Meta:
+        unique_together = ('account', 'period_end')
+        ordering = ['account', 'period_end']
+
+    def __str__(self):
+        return f"{self.account_id} @ {self.period_end}"
+
+class TaxFiling(models.Model):
+    """Tax figures of a filed return, frozen when the period was filed."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    business = models.ForeignKey(BusinessProfile, on_delete=models.CASCADE)
+    period_start = models.DateField()
+    period_end = models.DateField()
+    tax_collected = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
+    tax_paid = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
+    net_tax_payable = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
+    breakdown = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    filed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('business', 'period_start', 'period_end')
+        ordering = ['-period_start']
+
+    def __str__(self):
+        return f"{self.business_id}: {self.period_start} - {self.period_end}"
+
+class ClosedPeriod(models.Model):
+    """A closed accounting period; rows dated inside it can no longer change."""
+    KINDS = [
+        ('month', 'Month'),
+        ('quarter', 'Quarter'),
+        ('year', 'Fiscal Year'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    business = models.ForeignKey(BusinessProfile, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=10, choices=KINDS)
+    period_start = models.DateField()
+    period_end = models.DateField()
+    closing_entry = models.ForeignKey(
+        'accounts.JournalEntry', on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    closed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('business', 'period_start', 'period_end')
+        ordering = ['period_start', '-period_end']
+
+    def __str__(self):
+        return f"{self.business_id}: {self.period_start} - {self.period_end}"
+
+class PeriodAccountTotal(models.Model):
+    """Journal debits and credits of an account within a closed period, frozen at close."""
+    period = models.ForeignKey(ClosedPeriod, on_delete=models.CASCADE, related_name='totals')
+    account = models.ForeignKey(Account, on_delete=models.CASCADE)
+    debit = models.DecimalField(max_digits=20, decimal_places=2, default=0.00)
+    credit = models.DecimalField(max_digits=20, decimal_places=2, default=0.00)
+
+    class Meta:
+        unique_together = ('period', 'account')
+
+    def __str__(self):
+        return f"{self.period} / {self.account_id}"
@@ -0,0 +1,131 @@
+"""
+Closing accounting periods.
+
+Closing a month, quarter or fiscal year freezes each account's journal totals
+for it in PeriodAccountTotal rows, which the trial balance then reads instead
+of the journal, and locks every journal entry, invoice, bill and expense
+dated inside it (see accounting.locks). Closing a fiscal year first writes a
+closing entry moving the year's income and expense balances into Retained
+Earnings.
+"""
+
+import re
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Sum
+from accounts.models import JournalEntry, JournalItem
+from accounts.sequences import fiscal_year_bounds
+from .models import ClosedPeriod, PeriodAccountTotal
+from .posting import load_accounts, write_entries, RETAINED_EARNINGS
+from .tax import parse_period
+
+YEAR_PATTERN = re.compile(r'^(\d{4})$')
+
+CLOSING_PREFIX = 'CLOSE'
+
+
+def parse_close_period(value):
+    """
+    Return the (kind, start, end) of a period such as 2025, 2025-Q2 or 2025-05.
+
+    A year is the fiscal year starting in it (see settings.FISCAL_YEAR_START_MONTH).
+
+    Raises:
+        ValueError: If the period is malformed.
+    """
+    match = YEAR_PATTERN.match(value or '')
+    if match:
+        start_date, end_date = fiscal_year_bounds(int(match.group(1)))
+        return 'year', start_date, end_date
+    try:
+        start_date, end_date = parse_period(value)
+    except ValueError:
+        raise ValueError('period must look like 2025, 2025-Q2 or 2025-05')
+    return ('quarter' if 'Q' in value else 'month'), start_date, end_date
+
+
+def period_totals(business_id, start_date, end_date, account_types=None):
+    """Return journal item totals per account for entries dated in a period."""
+    items = JournalItem.objects.filter(
+        entry__business_id=business_id,
+        entry__date__range=(start_date, end_date)
+    )
+    if account_types:
+        items = items.filter(account__account_type__in=account_types)
+    return {
+        row['account_id']: (row['debit'] or Decimal('0'), row['credit'] or Decimal('0'))
+        for row in items.order_by().values('account_id').annotate(debit=Sum('debit'), credit=Sum('credit'))
+    }
+
+
+def freeze_totals(period):
+    """Replace the frozen account totals of a closed period with its journal totals."""
+    period.totals.all().delete()
+    totals = period_totals(period.business_id, period.period_start, period.period_end)
+    PeriodAccountTotal.objects.bulk_create([
+        PeriodAccountTotal(period=period, account_id=account_id, debit=debit, credit=credit)
+        for account_id, (debit, credit) in totals.items()
+    ])
+
+
+def write_closing_entry(user, business_id, start_date, end_date):
+    """
+    Zero a year's income and expense accounts against Retained Earnings.
+
+    Returns:
+        JournalEntry: The closing entry, or None if there was nothing to close.
+    """
+    totals = period_totals(business_id, start_date, end_date, ['income', 'expense'])
+    lines = [(account_id, credit - debit) for account_id, (debit, credit) in totals.items() if debit != credit]
+    if not lines:
+        return None
+
+    retained_earnings = load_accounts(business_id, user.id)[RETAINED_EARNINGS]
+    lines.append((retained_earnings, -sum(amount for _, amount in lines)))
+    entry = JournalEntry(
+        user=user,
+        business_id=business_id,
+        date=end_date,
+        reference_no=f'{CLOSING_PREFIX}-{business_id}-{start_date:%Y%m%d}-{end_date:%Y%m%d}',
+        narration=f'Closing entry for {start_date} to {end_date}'
+    )
+    write_entries([entry], [lines])
+    return entry
+
+
+def close_period(user, business_id, kind, start_date, end_date):
+    """
+    Close a period of a business.
+
+    Args:
+        user (User): The user closing the period.
+        business_id (int): The business.
+        kind (str): 'month', 'quarter' or 'year'.
+        start_date (date): First day of the period.
+        end_date (date): Last day of the period.
+
+    Returns:
+        ClosedPeriod: The closed period with its frozen totals.
+    """
+    with transaction.atomic():
+        closing_entry = None
+        if kind == 'year':
+            closing_entry = write_closing_entry(user, business_id, start_date, end_date)
+
+        period = ClosedPeriod.objects.create(
+            user=user,
+            business_id=business_id,
+            kind=kind,
+            period_start=start_date,
+            period_end=end_date,
+            closing_entry=closing_entry
+        )
+        freeze_totals(period)
+
+        # Periods closed earlier that contain the closing entry's date
+        if closing_entry:
+            for contained in ClosedPeriod.objects.filter(
+                business_id=business_id, period_start__lte=end_date, period_end__gte=end_date
+            ).exclude(pk=period.pk):
+                freeze_totals(contained)
+    return period
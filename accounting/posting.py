@@ -0,0 +1,325 @@
+"""
+Automatic double-entry posting of invoices, bills and expenses.
+
+Each posted document owns one JournalEntry, its JournalItems and the matching
+Ledger rows, all identified by the document's reference number. Reposting a
+document replaces them. Lines are written with bulk_create inside one
+transaction; since bulk_create skips signals, the balance checkpoints,
+account current balances, cached journal totals and report caches are
+updated here explicitly.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from accounts.models import Account, JournalEntry, JournalItem, Expense
+from purchases.models import Bill
+from reports.cache import bump_version
+from sales.models import Invoice
+from .balances import apply_balance_deltas, apply_ledger_delta, month_end
+from .locks import period_locks
+from .models import Ledger
+from .trial_balance import forget_months
+
+# Default chart of accounts created for businesses that lack these codes
+DEFAULT_ACCOUNTS = [
+    # Assets
+    {'code': '1001', 'name': 'Cash', 'account_type': 'asset'},
+    {'code': '1002', 'name': 'Bank Account', 'account_type': 'asset'},
+    {'code': '1003', 'name': 'Accounts Receivable', 'account_type': 'asset'},
+    {'code': '1004', 'name': 'Inventory', 'account_type': 'asset'},
+
+    # Liabilities
+    {'code': '2001', 'name': 'Accounts Payable', 'account_type': 'liability'},
+    {'code': '2002', 'name': 'Loans Payable', 'account_type': 'liability'},
+    {'code': '2003', 'name': 'Tax Payable', 'account_type': 'liability'},
+
+    # Equity
+    {'code': '3001', 'name': 'Owner Equity', 'account_type': 'equity'},
+    {'code': '3002', 'name': 'Retained Earnings', 'account_type': 'equity'},
+
+    # Income
+    {'code': '4001', 'name': 'Sales Revenue', 'account_type': 'income'},
+    {'code': '4002', 'name': 'Service Revenue', 'account_type': 'income'},
+
+    # Expenses
+    {'code': '5001', 'name': 'Cost of Goods Sold', 'account_type': 'expense'},
+    {'code': '5002', 'name': 'Rent Expense', 'account_type': 'expense'},
+    {'code': '5003', 'name': 'Utilities Expense', 'account_type': 'expense'},
+    {'code': '5004', 'name': 'Salaries Expense', 'account_type': 'expense'},
+    {'code': '5005', 'name': 'Marketing Expense', 'account_type': 'expense'},
+]
+
+CASH = '1001'
+RECEIVABLES = '1003'
+INVENTORY = '1004'
+PAYABLES = '2001'
+TAX_PAYABLE = '2003'
+RETAINED_EARNINGS = '3002'
+SALES_REVENUE = '4001'
+
+# Documents in these statuses are on the books
+POSTED_STATUSES = {
+    Invoice: ['sent', 'paid', 'overdue'],
+    Bill: ['received', 'paid', 'overdue'],
+}
+
+REFERENCE_PREFIXES = {
+    Invoice: 'AUTO-INV',
+    Bill: 'AUTO-BILL',
+    Expense: 'AUTO-EXP',
+}
+
+POSTING_BATCH_SIZE = 500
+
+
+def load_accounts(business_id, user_id):
+    """
+    Return the code -> account id map of a business.
+
+    Missing default accounts are created first. The map is read for each
+    call rather than kept per process, so an account deleted or recoded by
+    another process is never posted to.
+    """
+    accounts = dict(
+        Account.objects.filter(business_id=business_id).values_list('code', 'id')
+    )
+    missing = [account for account in DEFAULT_ACCOUNTS if account['code'] not in accounts]
+    if missing:
+        Account.objects.bulk_create(
+            [Account(user_id=user_id, business_id=business_id, **account) for account in missing],
+            ignore_conflicts=True
+        )
+        accounts = dict(
+            Account.objects.filter(business_id=business_id).values_list('code', 'id')
+        )
+    return accounts
+
+
+def reference_for(document):
+    """Return the journal reference number of a document."""
+    return f'{REFERENCE_PREFIXES[type(document)]}-{document.pk}'
+
+
+def _amount(value):
+    return Decimal(str(value or 0))
+
+
+def posting_lines(document):
+    """
+    Return the journal lines of a document as (account, amount) pairs.
+
+    Accounts are default account codes or account ids; positive amounts are
+    debits and negative amounts credits. Lines always balance.
+    """
+    if isinstance(document, Expense):
+        amount = _amount(document.amount)
+        return [(document.account_id, amount), (CASH, -amount)]
+
+    if document.status not in POSTED_STATUSES[type(document)]:
+        return []
+
+    total = _amount(document.total_amount)
+    tax = _amount(document.tax_amount)
+    paid = _amount(document.paid_amount)
+    if isinstance(document, Invoice):
+        return [
+            (RECEIVABLES, total),
+            (SALES_REVENUE, tax - total),
+            (TAX_PAYABLE, -tax),
+            (CASH, paid),
+            (RECEIVABLES, -paid),
+        ]
+    return [
+        (INVENTORY, total - tax),
+        (TAX_PAYABLE, tax),
+        (PAYABLES, -total),
+        (PAYABLES, paid),
+        (CASH, -paid),
+    ]
+
+
+def narration_for(document):
+    """Return the journal narration of a document."""
+    if isinstance(document, Invoice):
+        return f'Invoice {document.invoice_number}'
+    if isinstance(document, Bill):
+        return f'Bill {document.bill_number}'
+    return f'Expense: {document.name}'
+
+
+def _after_commit(touched):
+    """Refresh caches of the (business id, date) pairs whose journals changed."""
+    days = defaultdict(set)
+    for business_id, day in touched:
+        days[business_id].add(day)
+
+    def refresh():
+        for business_id, business_days in days.items():
+            forget_months(business_id, business_days)
+            bump_version(business_id)
+    transaction.on_commit(refresh)
+
+
+def unpost(references):
+    """Delete the journal entries and ledger rows of documents by reference number."""
+    touched = set(
+        JournalEntry.objects.filter(reference_no__in=references).values_list('business_id', 'date')
+    )
+    JournalEntry.objects.filter(reference_no__in=references).delete()
+    Ledger.objects.filter(reference_no__in=references).delete()
+    if touched:
+        _after_commit(touched)
+
+
+def post_documents(documents, created=False):
+    """
+    Replace the journal entries of documents with freshly generated ones.
+
+    Args:
+        documents (list): Invoice, Bill or Expense instances.
+        created (bool): The documents were just inserted, so they have no
+            entries to remove yet.
+
+    Returns:
+        int: Number of journal entries written.
+    """
+    if not documents:
+        return 0
+
+    # Documents dated in closed periods keep the entries they were closed with
+    is_locked = period_locks()
+    documents = [
+        document for document in documents
+        if not is_locked(document.business_id, document.date)
+    ]
+
+    with transaction.atomic():
+        if not created:
+            unpost([reference_for(document) for document in documents])
+
+        entries = []
+        entry_lines = []
+        maps = {}
+        for document in documents:
+            lines = [(account, amount) for account, amount in posting_lines(document) if amount]
+            if not lines:
+                continue
+            if document.business_id not in maps:
+                maps[document.business_id] = load_accounts(document.business_id, document.user_id)
+            accounts = maps[document.business_id]
+            entries.append(JournalEntry(
+                user_id=document.user_id,
+                business_id=document.business_id,
+                date=document.date,
+                reference_no=reference_for(document),
+                narration=narration_for(document)
+            ))
+            entry_lines.append([
+                (accounts[account] if isinstance(account, str) else account, amount)
+                for account, amount in lines
+            ])
+        write_entries(entries, entry_lines)
+    return len(entries)
+
+
+def write_entries(entries, entry_lines):
+    """
+    Insert journal entries with their items and ledger rows using bulk_create.
+
+    Args:
+        entries (list): Unsaved JournalEntry instances.
+        entry_lines (list): For each entry, (account id, amount) pairs where
+            positive amounts are debits and negative amounts credits.
+    """
+    if not entries:
+        return
+
+    with transaction.atomic():
+        JournalEntry.objects.bulk_create(entries, batch_size=POSTING_BATCH_SIZE)
+
+        items = []
+        ledger_rows = []
+        for entry, lines in zip(entries, entry_lines):
+            for account_id, amount in lines:
+                debit = amount if amount > 0 else Decimal('0')
+                credit = -amount if amount < 0 else Decimal('0')
+                items.append(JournalItem(entry=entry, account_id=account_id, debit=debit, credit=credit))
+                ledger_rows.append(Ledger(
+                    user_id=entry.user_id,
+                    business_id=entry.business_id,
+                    account_id=account_id,
+                    date=entry.date,
+                    reference_no=entry.reference_no,
+                    narration=entry.narration,
+                    debit=debit,
+                    credit=credit
+                ))
+        JournalItem.objects.bulk_create(items, batch_size=POSTING_BATCH_SIZE)
+        write_ledger_rows(ledger_rows)
+
+        _after_commit({(entry.business_id, entry.date) for entry in entries})
+
+
+def write_ledger_rows(ledger_rows):
+    """
+    Insert ledger rows with bulk_create, moving balances and checkpoints with them.
+
+    Args:
+        ledger_rows (list): Unsaved Ledger instances.
+    """
+    with transaction.atomic():
+        # Move the accounts' current balances and stamp each row with the
+        # balance it leaves its account at
+        deltas = defaultdict(Decimal)
+        for row in ledger_rows:
+            deltas[row.account_id] += row.debit - row.credit
+        balances = apply_balance_deltas(deltas)
+        running = {account_id: balances[account_id] - delta for account_id, delta in deltas.items()}
+        for row in ledger_rows:
+            running[row.account_id] += row.debit - row.credit
+            row.balance = running[row.account_id]
+        Ledger.objects.bulk_create(ledger_rows, batch_size=POSTING_BATCH_SIZE)
+
+        # bulk_create skipped the checkpoint signals; checkpoints are month ends,
+        # so each account's movements are applied once per month
+        movements = defaultdict(lambda: [Decimal('0'), Decimal('0')])
+        for row in ledger_rows:
+            movement = movements[(row.account_id, month_end(row.date))]
+            movement[0] += row.debit
+            movement[1] += row.credit
+        for (account_id, day), (debit, credit) in movements.items():
+            apply_ledger_delta(account_id, day, debit, credit)
+
+
+def post_entry_ledger(entry, previous_reference=None):
+    """
+    Replace the ledger rows of a journal entry whose items were saved one by one.
+
+    Entries entered through the API write only their JournalItems; this
+    writes the matching Ledger rows so the ledger, profit and loss and
+    balances read the same lines as the trial balance.
+
+    Args:
+        entry (JournalEntry): The saved entry.
+        previous_reference (str): The entry's reference number before this
+            save, if it changed.
+    """
+    with transaction.atomic():
+        Ledger.objects.filter(
+            reference_no__in={entry.reference_no, previous_reference or entry.reference_no}
+        ).delete()
+        write_ledger_rows([
+            Ledger(
+                user_id=entry.user_id,
+                business_id=entry.business_id,
+                account_id=item.account_id,
+                date=entry.date,
+                reference_no=entry.reference_no,
+                narration=entry.narration,
+                debit=item.debit,
+                credit=item.credit
+            )
+            for item in entry.items.all()
+        ])
+    _after_commit({(entry.business_id, entry.date)})
@@ -0,0 +1,166 @@
+"""
+Materialization of recurring expenses.
+
+A recurring expense is the template of its occurrences: each run inserts
+the occurrences that fell due since its high-water mark (recurred_until)
+with bulk_create and moves the mark forward in the same transaction, so
+reruns only add what is new. Occurrences are plain expenses pointing back
+to their template, written and posted in bounded batches; since bulk_create
+skips signals, they are posted to the journal and the report caches are
+refreshed here explicitly.
+"""
+
+import calendar
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from accounts.models import Expense
+from reports.cache import bump_version
+from .locks import period_locks
+from .posting import post_documents
+
+RECURRING = ['daily', 'weekly', 'monthly', 'yearly']
+
+# Recurring expenses locked and materialized per transaction
+TEMPLATE_CHUNK_SIZE = 500
+
+
+def add_months(day, months):
+    """Move a date by whole months, clipping the day to the end of shorter months."""
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def nth_occurrence(expense, n):
+    """Return the date of the nth occurrence of a recurring expense, the expense itself being the 0th."""
+    if expense.recurrence == 'daily':
+        return expense.date + timedelta(days=n)
+    if expense.recurrence == 'weekly':
+        return expense.date + timedelta(weeks=n)
+    if expense.recurrence == 'monthly':
+        return add_months(expense.date, n)
+    return add_months(expense.date, 12 * n)
+
+
+def occurrences_passed(expense, day):
+    """Return how many occurrences of a recurring expense after the first fall on or before a day."""
+    anchor = expense.date
+    if expense.recurrence == 'daily':
+        count = (day - anchor).days
+    elif expense.recurrence == 'weekly':
+        count = (day - anchor).days // 7
+    elif expense.recurrence == 'monthly':
+        count = (day.year - anchor.year) * 12 + day.month - anchor.month
+    else:
+        count = day.year - anchor.year
+    # Months and years started but not reached yet
+    if count > 0 and nth_occurrence(expense, count) > day:
+        count -= 1
+    return max(count, 0)
+
+
+def due_dates(expense, until):
+    """Return the occurrence dates of a recurring expense after its high-water mark, up to a day."""
+    first = occurrences_passed(expense, expense.recurred_until or expense.date) + 1
+    last = occurrences_passed(expense, until)
+    return [nth_occurrence(expense, n) for n in range(first, last + 1)]
+
+
+def occurrence_of(expense, day):
+    """Return an unsaved occurrence of a recurring expense on a day."""
+    return Expense(
+        user_id=expense.user_id,
+        business_id=expense.business_id,
+        name=expense.name,
+        category=expense.category,
+        account_id=expense.account_id,
+        amount=expense.amount,
+        date=day,
+        description=expense.description,
+        recurrence_source=expense
+    )
+
+
+def write_occurrences(occurrences, batch_size):
+    """Insert a batch of new occurrences and post them to the journal."""
+    Expense.objects.bulk_create(occurrences, batch_size=batch_size)
+    # Just inserted, so they have no postings to replace
+    post_documents(occurrences, created=True)
+
+
+def materialize_chunk(template_ids, until, batch_size):
+    """
+    Generate the due occurrences of a chunk of recurring expenses in one transaction.
+
+    Occurrences are written batch_size at a time as they are generated, so
+    memory and query sizes stay bounded however far behind the templates are.
+    """
+    count = 0
+    business_ids = set()
+    with transaction.atomic():
+        templates = list(
+            Expense.objects.select_for_update()
+            .filter(pk__in=template_ids)
+            .filter(Q(recurred_until__lt=until) | Q(recurred_until__isnull=True, date__lt=until))
+            .order_by('pk')
+        )
+        is_locked = period_locks()
+        pending = []
+        advanced = []
+        for template in templates:
+            dates = due_dates(template, until)
+            if not dates:
+                continue
+            for day in dates:
+                # Closed periods take no new rows; their occurrences are skipped for good
+                if is_locked(template.business_id, day):
+                    continue
+                pending.append(occurrence_of(template, day))
+                if len(pending) >= batch_size:
+                    write_occurrences(pending, batch_size)
+                    count += len(pending)
+                    pending = []
+            template.recurred_until = dates[-1]
+            advanced.append(template)
+            business_ids.add(template.business_id)
+
+        if pending:
+            write_occurrences(pending, batch_size)
+            count += len(pending)
+        Expense.objects.bulk_update(advanced, ['recurred_until'], batch_size=batch_size)
+
+        def refresh():
+            for business_id in business_ids:
+                bump_version(business_id)
+        transaction.on_commit(refresh)
+    return count
+
+
+def materialize_recurring_expenses(business_ids=None, until=None, batch_size=1000):
+    """
+    Insert the occurrences of recurring expenses that fell due.
+
+    Args:
+        business_ids (list): Only these businesses (default all).
+        until (date): Last date to generate occurrences for (default today).
+        batch_size (int): Number of rows inserted per query.
+
+    Returns:
+        int: Number of occurrences inserted.
+    """
+    until = until or timezone.localdate()
+    templates = Expense.objects.filter(
+        recurrence__in=RECURRING, recurrence_source__isnull=True
+    ).filter(
+        Q(recurred_until__lt=until) | Q(recurred_until__isnull=True, date__lt=until)
+    )
+    if business_ids:
+        templates = templates.filter(business_id__in=business_ids)
+
+    template_ids = list(templates.order_by('pk').values_list('pk', flat=True))
+    count = 0
+    for start in range(0, len(template_ids), TEMPLATE_CHUNK_SIZE):
+        count += materialize_chunk(template_ids[start:start + TEMPLATE_CHUNK_SIZE], until, batch_size)
+    return count
@@ -1,5 +1,7 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import TaxConfiguration, Ledger
+from .models import TaxConfiguration, Ledger, ClosedPeriod
+from .posting import post_entry_ledger
 from accounts.models import BusinessProfile, Account, JournalEntry, JournalItem, Expense
 
 class TaxConfigurationSerializer(serializers.ModelSerializer):
@@ -25,6 +27,7 @@ class AccountSerializer(serializers.ModelSerializer):
             'id', 'name', 'code', 'account_type', 'opening_balance', 
             'current_balance', 'is_active', 'created_at', 'updated_at'
         ]
+        read_only_fields = ['current_balance']
         
     def create(self, validated_data):
         # Set the user and business from the request context
@@ -68,28 +71,32 @@ class JournalEntrySerializer(serializers.ModelSerializer):
             except BusinessProfile.DoesNotExist:
                 pass
         
-        journal_entry = JournalEntry.objects.create(**validated_data)
-        
-        for item_data in items_data:
-            JournalItem.objects.create(entry=journal_entry, **item_data)
+        with transaction.atomic():
+            journal_entry = JournalEntry.objects.create(**validated_data)
+            for item_data in items_data:
+                JournalItem.objects.create(entry=journal_entry, **item_data)
+            post_entry_ledger(journal_entry)
             
         return journal_entry
         
     def update(self, instance, validated_data):
         items_data = validated_data.pop('items', None)
         
-        # Update journal entry fields
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        
-        # Update items if provided
-        if items_data is not None:
-            # Delete existing items
-            instance.items.all().delete()
-            # Create new items
-            for item_data in items_data:
-                JournalItem.objects.create(entry=instance, **item_data)
+        previous_reference = instance.reference_no
+        with transaction.atomic():
+            # Update journal entry fields
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+            
+            # Update items if provided
+            if items_data is not None:
+                # Delete existing items
+                instance.items.all().delete()
+                # Create new items
+                for item_data in items_data:
+                    JournalItem.objects.create(entry=instance, **item_data)
+            post_entry_ledger(instance, previous_reference)
                 
         return instance
 
@@ -99,10 +106,15 @@ class LedgerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ledger
         fields = [
-            'id', 'account', 'account_name', 'date', 'description', 
-            'debit', 'credit', 'created_at'
+            'id', 'account', 'account_name', 'date', 'reference_no', 'narration',
+            'debit', 'credit', 'balance', 'created_at'
         ]
 
+class ClosedPeriodSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ClosedPeriod
+        fields = ['id', 'business', 'kind', 'period_start', 'period_end', 'closing_entry', 'closed_at']
+
 class ExpenseSerializer(serializers.ModelSerializer):
     account_name = serializers.CharField(source='account.name', read_only=True)
     
@@ -110,8 +122,10 @@ class ExpenseSerializer(serializers.ModelSerializer):
         model = Expense
         fields = [
             'id', 'name', 'category', 'account', 'account_name', 'amount', 
-            'date', 'recurrence', 'description', 'created_at', 'updated_at'
+            'date', 'recurrence', 'recurrence_source', 'recurred_until', 'description',
+            'created_at', 'updated_at'
         ]
+        read_only_fields = ['recurrence_source', 'recurred_until']
         
     def create(self, validated_data):
         # Set the user and business from the request context
@@ -0,0 +1,228 @@
+"""
+Signal handlers posting documents to the books, keeping balance checkpoints,
+account current balances and cached journal totals in step with the ledger
+and journal, and refusing writes dated inside closed periods.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from accounts.models import BusinessProfile, Account, JournalEntry, JournalItem, Expense
+from purchases.models import Bill
+from sales.models import Invoice
+from utils.previous import previous_row
+from .balances import apply_balance_deltas, apply_ledger_delta, opening_net
+from .locks import check_unlocked, closed_periods, forget_closed_periods
+from .models import Ledger, ClosedPeriod
+from .posting import post_documents, posting_lines, reference_for, unpost
+from .trial_balance import bump_totals_version, forget_month
+
+
+@receiver(pre_save, sender=Ledger)
+def remember_previous_movement(sender, instance, **kwargs):
+    """Store the saved state of a ledger row so post_save can remove it."""
+    instance._checkpoint_previous = None
+    if instance.pk:
+        instance._checkpoint_previous = (
+            sender.objects.filter(pk=instance.pk)
+            .values('account_id', 'date', 'debit', 'credit')
+            .first()
+        )
+
+
+@receiver(post_save, sender=Ledger)
+def update_checkpoints_on_save(sender, instance, **kwargs):
+    """Move a ledger row's amounts out of its previous checkpoints and into its current ones."""
+    previous = getattr(instance, '_checkpoint_previous', None)
+    if previous:
+        apply_ledger_delta(
+            previous['account_id'], previous['date'], previous['debit'], previous['credit'], sign=-1
+        )
+    apply_ledger_delta(instance.account_id, instance.date, instance.debit, instance.credit, sign=1)
+
+
+@receiver(post_delete, sender=Ledger)
+def update_checkpoints_on_delete(sender, instance, **kwargs):
+    """Remove a deleted ledger row from the checkpoints after it."""
+    apply_ledger_delta(instance.account_id, instance.date, instance.debit, instance.credit, sign=-1)
+
+
+def _net(debit, credit):
+    return Decimal(str(debit or 0)) - Decimal(str(credit or 0))
+
+
+@receiver(post_save, sender=Ledger)
+def update_current_balance_on_save(sender, instance, **kwargs):
+    """Move a ledger row into its account's current balance and stamp the result on the row."""
+    deltas = defaultdict(Decimal)
+    previous = getattr(instance, '_checkpoint_previous', None)
+    if previous:
+        deltas[previous['account_id']] -= _net(previous['debit'], previous['credit'])
+    deltas[instance.account_id] += _net(instance.debit, instance.credit)
+    instance.balance = apply_balance_deltas(deltas)[instance.account_id]
+    sender.objects.filter(pk=instance.pk).update(balance=instance.balance)
+
+
+@receiver(post_delete, sender=Ledger)
+def update_current_balance_on_delete(sender, instance, **kwargs):
+    """Remove a deleted ledger row from its account's current balance."""
+    apply_balance_deltas({instance.account_id: -_net(instance.debit, instance.credit)})
+
+
+@receiver(pre_save, sender=Account)
+def keep_current_balance(sender, instance, **kwargs):
+    """
+    Keep an account's current balance out of ordinary saves.
+
+    New accounts start at their opening balance. Saving an existing account
+    keeps the stored balance, moved by any change to the opening balance,
+    instead of writing back a value postings may have changed since it was read.
+    """
+    opening = opening_net(instance.account_type, instance.opening_balance)
+    if not instance.pk:
+        instance.current_balance = opening
+        return
+    stored = (
+        sender.objects.filter(pk=instance.pk)
+        .values('account_type', 'opening_balance', 'current_balance')
+        .first()
+    )
+    if stored:
+        instance.current_balance = (
+            stored['current_balance'] + opening - opening_net(stored['account_type'], stored['opening_balance'])
+        )
+
+
+@receiver(pre_save, sender=JournalEntry)
+def remember_previous_entry_month(sender, instance, **kwargs):
+    """Store the saved business and date of an entry so post_save can drop its old month."""
+    instance._totals_previous = None
+    if instance.pk:
+        instance._totals_previous = (
+            sender.objects.filter(pk=instance.pk).values_list('business_id', 'date').first()
+        )
+
+
+@receiver(post_save, sender=JournalEntry)
+@receiver(post_delete, sender=JournalEntry)
+def forget_entry_month(sender, instance, **kwargs):
+    """
+    Drop the cached journal totals of the months an entry was and is dated in.
+
+    They are dropped again once the change commits, as items bulk-created
+    with the entry in the same transaction send no signals.
+    """
+    months = [(instance.business_id, instance.date)]
+    previous = getattr(instance, '_totals_previous', None)
+    if previous:
+        months.append(previous)
+
+    def forget():
+        for business_id, day in months:
+            forget_month(business_id, day)
+    forget()
+    transaction.on_commit(forget)
+
+
+@receiver(post_save, sender=JournalItem)
+@receiver(post_delete, sender=JournalItem)
+def forget_item_month(sender, instance, **kwargs):
+    """Drop the cached journal totals of the month of an item's entry."""
+    if JournalItem.entry.is_cached(instance):
+        forget_month(instance.entry.business_id, instance.entry.date)
+        return
+    row = JournalEntry.objects.filter(pk=instance.entry_id).values_list('business_id', 'date').first()
+    if row:
+        forget_month(*row)
+
+
+def _posting_key(values):
+    return [
+        values['business_id'], values['date'], values['status'],
+        *(Decimal(str(values[field] or 0)) for field in ('total_amount', 'tax_amount', 'paid_amount'))
+    ]
+
+
+@receiver(pre_save, sender=Invoice)
+@receiver(pre_save, sender=Bill)
+def remember_previous_posting(sender, instance, **kwargs):
+    """Store the saved posting fields of a document so post_save can skip unchanged ones."""
+    instance._posting_previous = previous_row(
+        instance, ['business_id', 'date', 'status', 'total_amount', 'tax_amount', 'paid_amount']
+    )
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_save, sender=Bill)
+@receiver(post_save, sender=Expense)
+def post_document(sender, instance, created, **kwargs):
+    """Post a saved document to the journal and ledger."""
+    if sender is not Expense:
+        previous = getattr(instance, '_posting_previous', None)
+        current = {field: getattr(instance, field) for field in (
+            'business_id', 'date', 'status', 'total_amount', 'tax_amount', 'paid_amount'
+        )}
+        if previous and _posting_key(previous) == _posting_key(current):
+            return
+        if not previous and not posting_lines(instance):
+            return
+    post_documents([instance], created=created)
+
+
+@receiver(post_delete, sender=Invoice)
+@receiver(post_delete, sender=Bill)
+@receiver(post_delete, sender=Expense)
+def unpost_document(sender, instance, **kwargs):
+    """Remove a deleted document from the journal and ledger."""
+    unpost([reference_for(instance)])
+
+
+@receiver(pre_save, sender=JournalEntry)
+@receiver(pre_save, sender=Invoice)
+@receiver(pre_save, sender=Bill)
+@receiver(pre_save, sender=Expense)
+def check_period_open_on_save(sender, instance, **kwargs):
+    """Refuse to save a row dated, or previously dated, inside a closed period."""
+    check_unlocked(instance.business_id, instance.date)
+    if sender in (Invoice, Bill):
+        previous = previous_row(instance, ['business_id', 'date'])
+        if previous:
+            check_unlocked(previous['business_id'], previous['date'])
+    elif instance.pk and closed_periods(instance.business_id):
+        previous = sender.objects.filter(pk=instance.pk).values_list('business_id', 'date').first()
+        if previous:
+            check_unlocked(*previous)
+
+
+@receiver(pre_delete, sender=JournalEntry)
+@receiver(pre_delete, sender=Invoice)
+@receiver(pre_delete, sender=Bill)
+@receiver(pre_delete, sender=Expense)
+def check_period_open_on_delete(sender, instance, **kwargs):
+    """Refuse to delete a row dated inside a closed period."""
+    check_unlocked(instance.business_id, instance.date)
+
+
+@receiver(pre_save, sender=JournalItem)
+@receiver(pre_delete, sender=JournalItem)
+def check_item_period_open(sender, instance, **kwargs):
+    """Refuse to change the items of an entry dated inside a closed period."""
+    if JournalItem.entry.is_cached(instance):
+        check_unlocked(instance.entry.business_id, instance.entry.date)
+        return
+    row = JournalEntry.objects.filter(pk=instance.entry_id).values_list('business_id', 'date').first()
+    if row:
+        check_unlocked(*row)
+
+
+@receiver(post_save, sender=ClosedPeriod)
+@receiver(post_delete, sender=ClosedPeriod)
+def forget_business_closed_periods(sender, instance, **kwargs):
+    """Drop the cached closed periods and month totals of a business, again once the change commits."""
+    def forget():
+        forget_closed_periods(instance.business_id)
+        bump_totals_version(instance.business_id)
+    forget()
+    transaction.on_commit(forget)
@@ -0,0 +1,119 @@
+"""
+Financial statements computed with grouped ledger queries.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from django.db.models import Sum, F, Q, Case, When, DecimalField
+from .balances import month_end
+from .models import Ledger
+from .periods import CLOSING_PREFIX
+
+MONEY = DecimalField(max_digits=20, decimal_places=2)
+
+# Longest month-by-month comparison served in one statement
+MAX_PERIODS = 24
+
+COMPARISONS = ['previous', 'monthly']
+
+
+def month_periods(start_date, end_date):
+    """Split a date range into calendar months, clipped to the range."""
+    periods = []
+    start = start_date
+    while start <= end_date and len(periods) < MAX_PERIODS:
+        end = min(month_end(start), end_date)
+        periods.append((start.strftime('%b %Y'), start, end))
+        start = end + timedelta(days=1)
+    return periods
+
+
+def comparison_periods(start_date, end_date, compare=None):
+    """
+    Return the (label, start, end) columns of a statement.
+
+    Args:
+        start_date (date): First day of the reported period.
+        end_date (date): Last day of the reported period.
+        compare (str): None for a single column, 'previous' to add the period
+            of the same length just before, 'monthly' for one column per month.
+
+    Returns:
+        list: (label, start, end) tuples.
+    """
+    if compare == 'monthly':
+        return month_periods(start_date, end_date)
+
+    periods = [('Current period', start_date, end_date)]
+    if compare == 'previous':
+        length = end_date - start_date
+        previous_end = start_date - timedelta(days=1)
+        periods.append(('Previous period', previous_end - length, previous_end))
+    return periods
+
+
+def profit_and_loss(business_ids, periods):
+    """
+    Compute income and expense totals per account for several periods in one query.
+
+    Income accounts report their credits and expense accounts their debits.
+    Year-end closing entries are left out.
+
+    Args:
+        business_ids (list): Businesses whose ledgers are reported.
+        periods (list): (label, start, end) tuples as returned by comparison_periods.
+
+    Returns:
+        dict: periods, income and expenses rows with one amount per period,
+            and total_income, total_expenses and net_profit per period.
+    """
+    amount = Case(
+        When(account__account_type='income', then=F('credit')),
+        default=F('debit'),
+        output_field=MONEY
+    )
+    columns = {
+        f'period_{index}': Sum(amount, filter=Q(date__range=(start, end)))
+        for index, (label, start, end) in enumerate(periods)
+    }
+
+    rows = (
+        Ledger.objects.filter(
+            business_id__in=business_ids,
+            account__account_type__in=['income', 'expense'],
+            date__range=(min(start for _, start, _ in periods), max(end for _, _, end in periods))
+        )
+        .exclude(reference_no__startswith=f'{CLOSING_PREFIX}-')
+        .order_by()
+        .values('account_id', 'account__code', 'account__name', 'account__account_type')
+        .annotate(**columns)
+        .order_by('account__code')
+    )
+
+    statement = {'income': [], 'expenses': []}
+    totals = {
+        'income': [Decimal('0')] * len(periods),
+        'expenses': [Decimal('0')] * len(periods),
+    }
+    for row in rows:
+        amounts = [row[name] or Decimal('0') for name in columns]
+        if not any(amounts):
+            continue
+        section = 'income' if row['account__account_type'] == 'income' else 'expenses'
+        statement[section].append({
+            'account_id': row['account_id'],
+            'code': row['account__code'],
+            'name': row['account__name'],
+            'amounts': amounts,
+        })
+        totals[section] = [total + value for total, value in zip(totals[section], amounts)]
+
+    statement['periods'] = [
+        {'label': label, 'start_date': start, 'end_date': end} for label, start, end in periods
+    ]
+    statement['total_income'] = totals['income']
+    statement['total_expenses'] = totals['expenses']
+    statement['net_profit'] = [
+        income - expense for income, expense in zip(totals['income'], totals['expenses'])
+    ]
+    return statement
@@ -0,0 +1,158 @@
+"""
+Set-based tax summaries and filing periods.
+"""
+
+import calendar
+import re
+from datetime import date
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Sum, Count, F, DecimalField
+from purchases.models import Bill, BillItem
+from reports.models import DailySalesSummary, DailyPurchaseSummary
+from sales.models import Invoice, InvoiceItem
+from .models import TaxFiling
+from .posting import POSTED_STATUSES
+
+MONEY = DecimalField(max_digits=20, decimal_places=2)
+
+PERIOD_PATTERNS = [
+    (re.compile(r'^(\d{4})-Q([1-4])$'), 'quarterly'),
+    (re.compile(r'^(\d{4})-(0[1-9]|1[0-2])$'), 'monthly'),
+]
+
+
+def parse_period(value):
+    """
+    Return the (start, end) dates of a filing period such as 2025-Q2 or 2025-05.
+
+    Raises:
+        ValueError: If the period is malformed.
+    """
+    for pattern, frequency in PERIOD_PATTERNS:
+        match = pattern.match(value or '')
+        if not match:
+            continue
+        year, number = int(match.group(1)), int(match.group(2))
+        if frequency == 'quarterly':
+            first_month, last_month = number * 3 - 2, number * 3
+        else:
+            first_month = last_month = number
+        return (
+            date(year, first_month, 1),
+            date(year, last_month, calendar.monthrange(year, last_month)[1])
+        )
+    raise ValueError('period must look like 2025-Q2 or 2025-05')
+
+
+def rate_breakdown(item_model, document_field, statuses, business_id, start_date, end_date):
+    """Return taxable value and tax per tax rate of document items in a period."""
+    rows = (
+        item_model.objects.filter(**{
+            f'{document_field}__business_id': business_id,
+            f'{document_field}__date__range': (start_date, end_date),
+            f'{document_field}__status__in': statuses,
+        })
+        .order_by()
+        .values('tax_rate')
+        .annotate(
+            taxable_amount=Sum(F('total_price') - F('tax_amount'), output_field=MONEY),
+            tax_amount=Sum('tax_amount'),
+            document_count=Count(document_field, distinct=True)
+        )
+        .order_by('tax_rate')
+    )
+    return list(rows)
+
+
+def document_tax(summary_model, statuses, business_id, start_date, end_date):
+    """Return the tax on documents in a period, read from the daily rollup."""
+    return summary_model.objects.filter(
+        business_id=business_id,
+        date__range=(start_date, end_date),
+        status__in=statuses
+    ).aggregate(total=Sum('tax_amount'))['total'] or Decimal('0')
+
+
+def tax_summary(business_id, start_date, end_date):
+    """
+    Compute tax collected on sales and paid on purchases for a period.
+
+    Headline figures come from the documents' tax totals; the per-rate
+    breakdown comes from their line items. Draft and cancelled documents are
+    left out, as they are from the journal.
+
+    Returns:
+        dict: tax_collected, tax_paid, net_tax_payable and per-rate breakdowns.
+    """
+    tax_collected = document_tax(
+        DailySalesSummary, POSTED_STATUSES[Invoice], business_id, start_date, end_date
+    )
+    tax_paid = document_tax(
+        DailyPurchaseSummary, POSTED_STATUSES[Bill], business_id, start_date, end_date
+    )
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'tax_collected': tax_collected,
+        'tax_paid': tax_paid,
+        'net_tax_payable': tax_collected - tax_paid,
+        'breakdown': {
+            'sales': rate_breakdown(
+                InvoiceItem, 'invoice', POSTED_STATUSES[Invoice], business_id, start_date, end_date
+            ),
+            'purchases': rate_breakdown(
+                BillItem, 'bill', POSTED_STATUSES[Bill], business_id, start_date, end_date
+            ),
+        },
+    }
+
+
+def filed_summary(filing):
+    """Return the frozen figures of a filing in the shape of tax_summary."""
+    return {
+        'start_date': filing.period_start,
+        'end_date': filing.period_end,
+        'tax_collected': filing.tax_collected,
+        'tax_paid': filing.tax_paid,
+        'net_tax_payable': filing.net_tax_payable,
+        'breakdown': filing.breakdown,
+        'filed_at': filing.filed_at,
+    }
+
+
+def period_summary(business_id, start_date, end_date):
+    """Return a period's figures, read from its filing once the period is filed."""
+    filing = TaxFiling.objects.filter(
+        business_id=business_id, period_start=start_date, period_end=end_date
+    ).first()
+    if filing:
+        return filed_summary(filing)
+    return tax_summary(business_id, start_date, end_date)
+
+
+def file_period(user, business_id, start_date, end_date):
+    """
+    Freeze a period's figures in a TaxFiling.
+
+    Concurrent requests filing the same period create one filing; the others
+    get the existing one back.
+
+    Returns:
+        tuple: (the filed figures, True if this call filed the period).
+    """
+    summary = tax_summary(business_id, start_date, end_date)
+    with transaction.atomic():
+        filing, created = TaxFiling.objects.get_or_create(
+            business_id=business_id,
+            period_start=start_date,
+            period_end=end_date,
+            defaults={
+                'user': user,
+                'tax_collected': summary['tax_collected'],
+                'tax_paid': summary['tax_paid'],
+                'net_tax_payable': summary['net_tax_payable'],
+                'breakdown': summary['breakdown'],
+            }
+        )
+    return filed_summary(filing), created
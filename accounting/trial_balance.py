@@ -0,0 +1,294 @@
+"""
+Trial balance and balance sheet built from journal items.
+
+Journal items are totalled per business, account and month in one grouped
+query. Months that ended before today are closed: their totals are cached for
+JOURNAL_TOTALS_TIMEOUT seconds and dropped when a journal entry dated in them
+changes (see accounting.signals), so a statement only recomputes the open
+month. Accounting periods closed with accounting.periods are read from their
+frozen totals instead.
+
+Month keys carry a per-business version, bumped whenever one of its periods
+is closed or reopened, so no cached month outlives a change of period state.
+"""
+
+import time
+from datetime import date
+from django.conf import settings
+from decimal import Decimal
+from django.core.cache import cache
+from django.db.models import Sum, Min
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from accounts.models import Account, JournalEntry, JournalItem
+from .balances import CREDIT_TYPES, month_end, opening_net
+from .locks import closed_periods
+from .models import PeriodAccountTotal
+
+MONTH_TOTALS_KEY = 'journal-month:{}:{}:{}'
+FIRST_MONTH_KEY = 'journal-first-month:{}'
+TOTALS_VERSION_KEY = 'journal-version:{}'
+
+DEFAULT_TOTALS_TIMEOUT = 7 * 24 * 60 * 60
+
+ACCOUNT_TYPES = [account_type for account_type, label in Account.ACCOUNT_TYPES]
+
+
+def totals_timeout():
+    """Return how many seconds closed months stay cached."""
+    return getattr(settings, 'JOURNAL_TOTALS_TIMEOUT', DEFAULT_TOTALS_TIMEOUT)
+
+
+def totals_versions(business_ids):
+    """Return business id -> current version of its cached month totals."""
+    keys = {business_id: TOTALS_VERSION_KEY.format(business_id) for business_id in business_ids}
+    versions = cache.get_many(list(keys.values()))
+    missing = {key: time.time_ns() for key in keys.values() if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return {business_id: versions[key] for business_id, key in keys.items()}
+
+
+def bump_totals_version(business_id):
+    """Make every cached month total of a business unreachable."""
+    cache.set(TOTALS_VERSION_KEY.format(business_id), time.time_ns(), None)
+
+
+def month_key(business_id, month, version):
+    """Return the cache key of a business's journal totals for a month."""
+    return MONTH_TOTALS_KEY.format(business_id, version, month.strftime('%Y-%m'))
+
+
+def forget_month(business_id, day):
+    """Drop the cached totals of the month containing a day."""
+    forget_months(business_id, [day])
+
+
+def forget_months(business_id, days):
+    """Drop the cached totals of the months containing some days."""
+    days = list(days)
+    if not days:
+        return
+    version = totals_versions([business_id])[business_id]
+    cache.delete_many(list({month_key(business_id, day.replace(day=1), version) for day in days}))
+    first = cache.get(FIRST_MONTH_KEY.format(business_id))
+    if first is not None and min(days) < first:
+        cache.delete(FIRST_MONTH_KEY.format(business_id))
+
+
+def first_month(business_id):
+    """Return the first month with journal entries of a business, or None."""
+    key = FIRST_MONTH_KEY.format(business_id)
+    first = cache.get(key)
+    if first is None:
+        first = JournalEntry.objects.filter(business_id=business_id).aggregate(first=Min('date'))['first']
+        if first is None:
+            return None
+        first = first.replace(day=1)
+        cache.set(key, first, totals_timeout())
+    return first
+
+
+def next_month(month):
+    """Return the first day of the month after a month start."""
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def frozen_periods(business_id, as_of):
+    """
+    Return closed periods of a business ending by a day that do not overlap.
+
+    A closed year is preferred over the months and quarters inside it.
+
+    Returns:
+        list: (id, start, end) tuples in date order.
+    """
+    chosen = []
+    for period_id, start, end in closed_periods(business_id):
+        if end <= as_of and (not chosen or start > chosen[-1][2]):
+            chosen.append((period_id, start, end))
+    return chosen
+
+
+def journal_totals(business_ids, as_of, today=None):
+    """
+    Return journal item totals per account for every entry dated up to a day.
+
+    Closed accounting periods are read from their frozen totals and closed
+    months from the cache; every other month is computed in a single grouped
+    query and closed months among them are cached.
+
+    Args:
+        business_ids (list): Businesses to total.
+        as_of (date): Last date included.
+        today (date): Months ending before this day are closed (default today).
+
+    Returns:
+        dict: account id -> [debit, credit].
+    """
+    today = today or timezone.localdate()
+    versions = totals_versions(business_ids)
+    closed = {}
+    frozen_months = set()
+    missing_from = {}
+    frozen_ids = []
+    for business_id in business_ids:
+        frozen = frozen_periods(business_id, as_of)
+        frozen_ids += [period_id for period_id, start, end in frozen]
+        month = first_month(business_id)
+        while month is not None and month <= as_of:
+            end = month_end(month)
+            key = month_key(business_id, month, versions[business_id])
+            if any(start <= month <= period_end for _, start, period_end in frozen):
+                frozen_months.add(key)
+            elif end <= as_of and end < today:
+                closed[key] = (business_id, month)
+            else:
+                missing_from.setdefault(business_id, month)
+            month = next_month(month)
+
+    cached = cache.get_many(list(closed))
+    for key, (business_id, month) in closed.items():
+        if key not in cached:
+            missing_from[business_id] = min(missing_from.get(business_id, month), month)
+
+    computed = {}
+    if missing_from:
+        rows = (
+            JournalItem.objects.filter(
+                entry__business_id__in=list(missing_from),
+                entry__date__gte=min(missing_from.values()),
+                entry__date__lte=as_of
+            )
+            .order_by()
+            .annotate(month=TruncMonth('entry__date'))
+            .values('entry__business_id', 'month', 'account_id')
+            .annotate(debit=Sum('debit'), credit=Sum('credit'))
+        )
+        for row in rows:
+            business_id = row['entry__business_id']
+            key = month_key(business_id, row['month'], versions[business_id])
+            if key not in cached and key not in frozen_months:
+                computed.setdefault(key, {})[row['account_id']] = (
+                    row['debit'] or Decimal('0'), row['credit'] or Decimal('0')
+                )
+
+        # Closed months without journal items are cached as empty
+        cache.set_many(
+            {key: computed.get(key, {}) for key in closed if key not in cached}, totals_timeout()
+        )
+
+    totals = {}
+
+    def add(account_id, debit, credit):
+        account_totals = totals.setdefault(account_id, [Decimal('0'), Decimal('0')])
+        account_totals[0] += debit
+        account_totals[1] += credit
+
+    for months in (cached, computed):
+        for month_totals in months.values():
+            for account_id, (debit, credit) in month_totals.items():
+                add(account_id, debit, credit)
+    if frozen_ids:
+        for row in PeriodAccountTotal.objects.filter(period_id__in=frozen_ids).values_list(
+            'account_id', 'debit', 'credit'
+        ):
+            add(*row)
+    return totals
+
+
+def trial_balance(business_ids, as_of, today=None):
+    """
+    Compute the trial balance of businesses at the end of a day.
+
+    Args:
+        business_ids (list): Businesses to report.
+        as_of (date): Last date included.
+        today (date): Months ending before this day are served from the cache.
+
+    Returns:
+        dict: accounts rows, total_debit, total_credit and a by_type rollup.
+    """
+    totals = journal_totals(business_ids, as_of, today)
+    accounts = (
+        Account.objects.filter(business_id__in=business_ids)
+        .order_by('code')
+        .values('id', 'code', 'name', 'account_type', 'opening_balance')
+    )
+
+    rows = []
+    by_type = {
+        account_type: {'debit': Decimal('0'), 'credit': Decimal('0'), 'balance': Decimal('0')}
+        for account_type in ACCOUNT_TYPES
+    }
+    total_debit = total_credit = Decimal('0')
+    for account in accounts:
+        debit, credit = totals.get(account['id'], (Decimal('0'), Decimal('0')))
+        net = opening_net(account['account_type'], account['opening_balance']) + debit - credit
+        if not net:
+            continue
+        row = {
+            'account_id': account['id'],
+            'code': account['code'],
+            'name': account['name'],
+            'account_type': account['account_type'],
+            'debit': net if net > 0 else Decimal('0'),
+            'credit': -net if net < 0 else Decimal('0'),
+        }
+        rows.append(row)
+        total_debit += row['debit']
+        total_credit += row['credit']
+
+        rollup = by_type[account['account_type']]
+        rollup['debit'] += row['debit']
+        rollup['credit'] += row['credit']
+        rollup['balance'] += -net if account['account_type'] in CREDIT_TYPES else net
+
+    return {
+        'as_of': as_of,
+        'accounts': rows,
+        'total_debit': total_debit,
+        'total_credit': total_credit,
+        'by_type': by_type,
+    }
+
+
+def balance_sheet(business_ids, as_of, today=None):
+    """
+    Compute the balance sheet of businesses at the end of a day.
+
+    Income and expense balances not yet closed to retained earnings are
+    reported as current earnings within equity.
+
+    Returns:
+        dict: assets, liabilities and equity sections with their totals.
+    """
+    balance = trial_balance(business_ids, as_of, today)
+    sections = {'asset': [], 'liability': [], 'equity': []}
+    for row in balance['accounts']:
+        if row['account_type'] in sections:
+            amount = row['debit'] - row['credit']
+            if row['account_type'] in CREDIT_TYPES:
+                amount = -amount
+            sections[row['account_type']].append({
+                'account_id': row['account_id'],
+                'code': row['code'],
+                'name': row['name'],
+                'amount': amount,
+            })
+
+    by_type = balance['by_type']
+    current_earnings = by_type['income']['balance'] - by_type['expense']['balance']
+    total_equity = by_type['equity']['balance'] + current_earnings
+    return {
+        'as_of': as_of,
+        'assets': sections['asset'],
+        'liabilities': sections['liability'],
+        'equity': sections['equity'],
+        'current_earnings': current_earnings,
+        'total_assets': by_type['asset']['balance'],
+        'total_liabilities': by_type['liability']['balance'],
+        'total_equity': total_equity,
+        'total_liabilities_and_equity': by_type['liability']['balance'] + total_equity,
+    }
@@ -18,8 +18,19 @@ urlpatterns = [
     path('api/accounts/', views.AccountListCreateAPIView.as_view(), name='account-list-create'),
     path('api/accounts/<int:pk>/', views.AccountRetrieveUpdateDestroyAPIView.as_view(), name='account-detail'),
     path('api/journal-entries/', views.JournalEntryListCreateAPIView.as_view(), name='journal-entry-list-create'),
+    path('api/journal-entries/import/', views.import_journal_entries, name='journal-entry-import'),
     path('api/journal-entries/<int:pk>/', views.JournalEntryRetrieveUpdateDestroyAPIView.as_view(), name='journal-entry-detail'),
     path('api/ledgers/', views.LedgerListAPIView.as_view(), name='ledger-list'),
+    path('api/ledgers/<int:account_id>/', views.ledger_data, name='ledger-data'),
+    path('api/ledgers/<int:account_id>/export/', views.export_ledger_csv, name='ledger-export'),
+    path('api/profit-loss/', views.profit_loss_data, name='profit-loss-data'),
+    path('api/trial-balance/', views.trial_balance_data, name='trial-balance-data'),
+    path('api/balance-sheet/', views.balance_sheet_data, name='balance-sheet-data'),
+    path('api/tax-summary/', views.tax_summary_data, name='tax-summary-data'),
+    path('api/tax-summary/file/', views.file_tax_period, name='tax-summary-file'),
+    path('api/periods/', views.closed_periods_data, name='closed-periods'),
+    path('api/periods/close/', views.close_accounting_period, name='close-period'),
+    path('api/balances/', views.account_balances_data, name='account-balances'),
     path('api/expenses/', views.ExpenseListCreateAPIView.as_view(), name='expense-list-create'),
     path('api/expenses/<int:pk>/', views.ExpenseRetrieveUpdateDestroyAPIView.as_view(), name='expense-detail'),
 ]
\ No newline at end of file
@@ -1,9 +1,10 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Sum, Q
+from django.db import IntegrityError
+from django.db.models import Sum, Q, F, Case, When
 from django.http import JsonResponse
-from .models import TaxConfiguration, Ledger
+from .models import TaxConfiguration, Ledger, ClosedPeriod
 from accounts.models import BusinessProfile, Account, JournalEntry, JournalItem, Expense
 from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
@@ -11,12 +12,79 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from .serializers import (
     TaxConfigurationSerializer, AccountSerializer, JournalEntrySerializer, 
-    LedgerSerializer, ExpenseSerializer
+    LedgerSerializer, ExpenseSerializer, ClosedPeriodSerializer
 )
+from .ledger import ledger_page, ledger_rows, balance_before, LEDGER_PAGE_SIZE, MAX_LEDGER_PAGE_SIZE
+from .balances import balances_as_of, opening_net, CREDIT_TYPES
+from .statements import profit_and_loss, comparison_periods, COMPARISONS
+from .trial_balance import trial_balance, balance_sheet
+from .imports import entries_from_csv, entries_from_json, import_entries, MAX_IMPORT_ENTRIES
+from .periods import close_period, parse_close_period
+from .posting import unpost
+from .tax import parse_period, period_summary, file_period, tax_summary as tax_summary_figures
+from reports.cache import cache_report, get_business_ids
+from reports.exports import stream_csv, wants_gzip
 from datetime import datetime, timedelta
 
 
+def get_statement_dates(request):
+    """
+    Read a statement's date range from the query string (default last 30 days).
+
+    Raises:
+        ValueError: If a date is malformed.
+    """
+    end_date = datetime.now().date()
+    start_date = end_date - timedelta(days=30)
+    
+    if request.GET.get('start_date'):
+        start_date = datetime.strptime(request.GET.get('start_date'), '%Y-%m-%d').date()
+    if request.GET.get('end_date'):
+        end_date = datetime.strptime(request.GET.get('end_date'), '%Y-%m-%d').date()
+    return start_date, end_date
+
+
+def get_as_of(request):
+    """
+    Read the ?as_of= date of a balance report (default today).
+
+    Raises:
+        ValueError: If the date is malformed.
+    """
+    if request.GET.get('as_of'):
+        return datetime.strptime(request.GET.get('as_of'), '%Y-%m-%d').date()
+    return datetime.now().date()
+
+
+def get_ledger_params(request):
+    """
+    Read the ledger's date range and page size from the query string.
+
+    Raises:
+        ValueError: If a date or the page size is malformed.
+    """
+    start_date = request.GET.get('start_date')
+    end_date = request.GET.get('end_date')
+    if start_date:
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+    if end_date:
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+    page_size = min(max(int(request.GET.get('page_size', LEDGER_PAGE_SIZE)), 1), MAX_LEDGER_PAGE_SIZE)
+    return start_date, end_date, page_size
+
+
 # API Views
+def get_business_id(request):
+    """Return the business of a request: ?business= if the user owns it, else their first."""
+    business_ids = get_business_ids(request.user)
+    if request.method == 'POST' and isinstance(request.data, dict):
+        requested = request.data.get('business')
+    else:
+        requested = request.GET.get('business')
+    if requested is not None and str(requested).isdigit() and int(requested) in business_ids:
+        return int(requested)
+    return business_ids[0] if business_ids else None
+
 class TaxConfigurationListCreateAPIView(generics.ListCreateAPIView):
     serializer_class = TaxConfigurationSerializer
     permission_classes = [IsAuthenticated]
@@ -89,13 +157,130 @@ class JournalEntryRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPI
     def get_queryset(self):
         return JournalEntry.objects.filter(user=self.request.user)
 
+    def perform_destroy(self, instance):
+        # Remove the entry's ledger rows along with it
+        unpost([instance.reference_no])
+
 class LedgerListAPIView(generics.ListAPIView):
     serializer_class = LedgerSerializer
     permission_classes = [IsAuthenticated]
+    keyset_ordering = ('date', 'id')
     
     def get_queryset(self):
         return Ledger.objects.filter(user=self.request.user)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def import_journal_entries(request):
+    """
+    Import many journal entries at once.
+
+    Takes a JSON list of entries (or {"entries": [...]}) whose items name
+    account codes, or a CSV upload in a "file" field with the columns
+    date, reference_no, narration, account_code, debit and credit. Valid
+    entries are saved even when others are rejected; rejected entries are
+    listed with their errors.
+    """
+    business_id = get_business_id(request)
+    if business_id is None:
+        return Response({'error': 'No business profile found'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        if 'file' in request.FILES:
+            entries = entries_from_csv(request.FILES['file'])
+        else:
+            entries = entries_from_json(request.data)
+    except (ValueError, UnicodeDecodeError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if not entries:
+        return Response({'error': 'No entries to import'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(entries) > MAX_IMPORT_ENTRIES:
+        return Response(
+            {'error': f'At most {MAX_IMPORT_ENTRIES} entries can be imported at once'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    result = import_entries(request.user, business_id, entries)
+    response_status = status.HTTP_201_CREATED if result['imported'] else status.HTTP_400_BAD_REQUEST
+    return Response(result, status=response_status)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def ledger_data(request, account_id):
+    """One keyset page of an account's ledger with running balances."""
+    account = get_object_or_404(Account, id=account_id, business__user=request.user)
+    try:
+        start_date, end_date, page_size = get_ledger_params(request)
+        page = ledger_page(
+            account, cursor=request.GET.get('cursor'),
+            start_date=start_date, end_date=end_date, limit=page_size
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    page['account'] = {'id': account.id, 'code': account.code, 'name': account.name}
+    return Response(page)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_ledger_csv(request, account_id):
+    """Stream an account's full ledger with running balances as CSV."""
+    account = get_object_or_404(Account, id=account_id, business__user=request.user)
+    try:
+        start_date, end_date, page_size = get_ledger_params(request)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if start_date:
+        opening_balance = balance_before(account, start_date)
+    else:
+        opening_balance = opening_net(account.account_type, account.opening_balance)
+    return stream_csv(
+        ['Date', 'Reference', 'Narration', 'Debit', 'Credit', 'Balance'],
+        ledger_rows(account, opening_balance, start_date=start_date, end_date=end_date),
+        ['date', 'reference_no', 'narration', 'debit', 'credit', 'running_balance'],
+        f'ledger_{account.code}',
+        compress=wants_gzip(request)
+    )
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def account_balances_data(request):
+    """Balances of the user's accounts at the end of ?as_of= (default today)."""
+    try:
+        as_of = get_as_of(request)
+    except ValueError:
+        return Response({'error': 'as_of must be a YYYY-MM-DD date'}, status=status.HTTP_400_BAD_REQUEST)
+
+    accounts = Account.objects.filter(business_id__in=get_business_ids(request.user))
+    if request.GET.get('account', '').isdigit():
+        accounts = accounts.filter(id=request.GET['account'])
+
+    rows = balances_as_of(accounts, as_of).order_by('code').values(
+        'id', 'code', 'name', 'account_type', 'debit_total', 'credit_total', 'balance'
+    )
+    return Response({'as_of': as_of, 'accounts': list(rows)})
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def trial_balance_data(request):
+    """Trial balance of the user's businesses at the end of ?as_of= (default today)."""
+    try:
+        as_of = get_as_of(request)
+    except ValueError:
+        return Response({'error': 'as_of must be a YYYY-MM-DD date'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(trial_balance(get_business_ids(request.user), as_of))
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def balance_sheet_data(request):
+    """Balance sheet of the user's businesses at the end of ?as_of= (default today)."""
+    try:
+        as_of = get_as_of(request)
+    except ValueError:
+        return Response({'error': 'as_of must be a YYYY-MM-DD date'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(balance_sheet(get_business_ids(request.user), as_of))
+
 class ExpenseListCreateAPIView(generics.ListCreateAPIView):
     serializer_class = ExpenseSerializer
     permission_classes = [IsAuthenticated]
@@ -123,7 +308,13 @@ class ExpenseRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView)
 @login_required
 def chart_of_accounts(request):
     business = get_object_or_404(BusinessProfile, user=request.user)
-    accounts = Account.objects.filter(business=business).order_by('code')
+    # Balances are read from the maintained current balance, shown on the account's natural side
+    accounts = Account.objects.filter(business=business).annotate(
+        balance=Case(
+            When(account_type__in=CREDIT_TYPES, then=-F('current_balance')),
+            default=F('current_balance')
+        )
+    ).order_by('code')
     
     if request.method == 'POST':
         # Handle account creation
@@ -139,8 +330,7 @@ def chart_of_accounts(request):
                 name=name,
                 code=code,
                 account_type=account_type,
-                opening_balance=opening_balance,
-                current_balance=opening_balance
+                opening_balance=opening_balance
             )
             messages.success(request, 'Account created successfully!')
         except Exception as e:
@@ -167,22 +357,28 @@ def journal_entries(request):
 
 @login_required
 def ledger(request, account_id):
-    account = get_object_or_404(Account, id=account_id)
-    business = get_object_or_404(BusinessProfile, user=request.user)
-    
-    # Get ledger entries for this account
-    ledger_entries = Ledger.objects.filter(account=account).order_by('date')
+    account = get_object_or_404(
+        Account.objects.select_related('business'), id=account_id, business__user=request.user
+    )
     
-    # Calculate running balance
-    running_balance = account.opening_balance
-    for entry in ledger_entries:
-        running_balance += entry.debit - entry.credit
-        entry.running_balance = running_balance
+    # Get one page of ledger entries with running balances
+    try:
+        start_date, end_date, page_size = get_ledger_params(request)
+        page = ledger_page(
+            account, cursor=request.GET.get('cursor'),
+            start_date=start_date, end_date=end_date, limit=page_size
+        )
+    except ValueError:
+        messages.error(request, 'Invalid ledger page requested.')
+        page = ledger_page(account)
     
     context = {
         'account': account,
-        'ledger_entries': ledger_entries,
-        'business': business
+        'ledger_entries': page['entries'],
+        'opening_balance': page['opening_balance'],
+        'closing_balance': page['closing_balance'],
+        'next_cursor': page['next_cursor'],
+        'business': account.business
     }
     return render(request, 'accounting/ledger.html', context)
 
@@ -191,63 +387,17 @@ def profit_loss(request):
     business = get_object_or_404(BusinessProfile, user=request.user)
     
     # Get date range from request or use default (last 30 days)
-    end_date = datetime.now().date()
-    start_date = end_date - timedelta(days=30)
-    
-    if request.GET.get('start_date'):
-        start_date = datetime.strptime(request.GET.get('start_date'), '%Y-%m-%d').date()
-    if request.GET.get('end_date'):
-        end_date = datetime.strptime(request.GET.get('end_date'), '%Y-%m-%d').date()
-    
-    # Get income accounts
-    income_accounts = Account.objects.filter(
-        business=business,
-        account_type='income'
-    )
+    start_date, end_date = get_statement_dates(request)
     
-    # Get expense accounts
-    expense_accounts = Account.objects.filter(
-        business=business,
-        account_type='expense'
-    )
-    
-    # Calculate totals
-    total_income = 0
-    total_expenses = 0
-    
-    income_data = []
-    for account in income_accounts:
-        # Calculate total credit (income) for this account in the date range
-        total = Ledger.objects.filter(
-            account=account,
-            date__range=[start_date, end_date],
-            credit__gt=0
-        ).aggregate(total=Sum('credit'))['total'] or 0
-        
-        if total > 0:
-            income_data.append({
-                'account': account,
-                'total': total
-            })
-            total_income += total
-    
-    expense_data = []
-    for account in expense_accounts:
-        # Calculate total debit (expense) for this account in the date range
-        total = Ledger.objects.filter(
-            account=account,
-            date__range=[start_date, end_date],
-            debit__gt=0
-        ).aggregate(total=Sum('debit'))['total'] or 0
-        
-        if total > 0:
-            expense_data.append({
-                'account': account,
-                'total': total
-            })
-            total_expenses += total
+    # One grouped ledger query for every income and expense account
+    statement = profit_and_loss([business.id], comparison_periods(start_date, end_date))
     
-    net_profit = total_income - total_expenses
+    income_data = [
+        {'account': row, 'total': row['amounts'][0]} for row in statement['income']
+    ]
+    expense_data = [
+        {'account': row, 'total': row['amounts'][0]} for row in statement['expenses']
+    ]
     
     context = {
         'business': business,
@@ -255,24 +405,47 @@ def profit_loss(request):
         'end_date': end_date,
         'income_data': income_data,
         'expense_data': expense_data,
-        'total_income': total_income,
-        'total_expenses': total_expenses,
-        'net_profit': net_profit
+        'total_income': statement['total_income'][0],
+        'total_expenses': statement['total_expenses'][0],
+        'net_profit': statement['net_profit'][0]
     }
     return render(request, 'accounting/profit_loss.html', context)
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cache_report('profit-loss')
+def profit_loss_data(request):
+    """
+    Profit and loss statement of the user's businesses.
+
+    Optional ?compare=previous adds the preceding period of the same length,
+    ?compare=monthly reports one column per month of the range.
+    """
+    try:
+        start_date, end_date = get_statement_dates(request)
+    except ValueError:
+        return Response({'error': 'Dates must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+    if start_date > end_date:
+        return Response({'error': 'start_date must not be after end_date'}, status=status.HTTP_400_BAD_REQUEST)
+
+    compare = request.GET.get('compare') or None
+    if compare and compare not in COMPARISONS:
+        return Response(
+            {'error': f'compare must be one of: {", ".join(COMPARISONS)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    periods = comparison_periods(start_date, end_date, compare)
+    statement = profit_and_loss(get_business_ids(request.user), periods)
+    statement.update({'start_date': start_date, 'end_date': end_date, 'compare': compare})
+    return Response(statement)
+
 @login_required
 def tax_summary(request):
     business = get_object_or_404(BusinessProfile, user=request.user)
     
     # Get date range from request or use default (last 30 days)
-    end_date = datetime.now().date()
-    start_date = end_date - timedelta(days=30)
-    
-    if request.GET.get('start_date'):
-        start_date = datetime.strptime(request.GET.get('start_date'), '%Y-%m-%d').date()
-    if request.GET.get('end_date'):
-        end_date = datetime.strptime(request.GET.get('end_date'), '%Y-%m-%d').date()
+    start_date, end_date = get_statement_dates(request)
     
     # Get tax configuration
     try:
@@ -280,45 +453,111 @@ def tax_summary(request):
     except TaxConfiguration.DoesNotExist:
         # Create default tax configuration if it doesn't exist
         tax_config = TaxConfiguration.objects.create(
+            user=request.user,
             business=business,
             tax_name='GST',
             tax_rate=13.00
         )
     
-    # Calculate tax collected from sales
-    sales_tax_collected = 0
-    sales = Invoice.objects.filter(
-        business=business,
-        date__range=[start_date, end_date]
-    )
-    
-    for sale in sales:
-        sales_tax_collected += float(sale.tax_amount or 0)
-    
-    # Calculate tax paid on purchases
-    purchase_tax_paid = 0
-    purchases = Bill.objects.filter(
-        business=business,
-        date__range=[start_date, end_date]
-    )
-    
-    for purchase in purchases:
-        purchase_tax_paid += float(purchase.tax_amount or 0)
-    
-    # Calculate net tax payable
-    net_tax_payable = sales_tax_collected - purchase_tax_paid
+    # Tax collected and paid, with a per-rate breakdown
+    summary = tax_summary_figures(business.id, start_date, end_date)
     
     context = {
         'business': business,
         'tax_config': tax_config,
         'start_date': start_date,
         'end_date': end_date,
-        'sales_tax_collected': sales_tax_collected,
-        'purchase_tax_paid': purchase_tax_paid,
-        'net_tax_payable': net_tax_payable
+        'sales_tax_collected': summary['tax_collected'],
+        'purchase_tax_paid': summary['tax_paid'],
+        'net_tax_payable': summary['net_tax_payable'],
+        'sales_breakdown': summary['breakdown']['sales'],
+        'purchase_breakdown': summary['breakdown']['purchases']
     }
     return render(request, 'accounting/tax_summary.html', context)
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def tax_summary_data(request):
+    """
+    Tax collected and paid with per-rate breakdowns.
+
+    Takes a filing ?period= (2025-Q2 or 2025-05) or a start_date/end_date
+    range. Filed periods are served from their filing.
+    """
+    business_id = get_business_id(request)
+    if business_id is None:
+        return Response({'error': 'No business profile found'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        if request.GET.get('period'):
+            start_date, end_date = parse_period(request.GET.get('period'))
+            data = period_summary(business_id, start_date, end_date)
+        else:
+            start_date, end_date = get_statement_dates(request)
+            data = tax_summary_figures(business_id, start_date, end_date)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    data['filed'] = 'filed_at' in data
+    return Response(data)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def file_tax_period(request):
+    """Freeze the figures of an ended filing period."""
+    business_id = get_business_id(request)
+    if business_id is None:
+        return Response({'error': 'No business profile found'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        start_date, end_date = parse_period(request.data.get('period'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if end_date >= datetime.now().date():
+        return Response({'error': 'Only ended periods can be filed'}, status=status.HTTP_400_BAD_REQUEST)
+
+    data, created = file_period(request.user, business_id, start_date, end_date)
+    if not created:
+        return Response({'error': 'Period already filed'}, status=status.HTTP_409_CONFLICT)
+    data['filed'] = True
+    return Response(data, status=status.HTTP_201_CREATED)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def closed_periods_data(request):
+    """Closed accounting periods of the user's businesses."""
+    periods = ClosedPeriod.objects.filter(business_id__in=get_business_ids(request.user))
+    return Response(ClosedPeriodSerializer(periods, many=True).data)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def close_accounting_period(request):
+    """
+    Close an ended month, quarter or fiscal year.
+
+    Takes a period of 2025, 2025-Q2 or 2025-05. Closing a year moves its
+    income and expenses into Retained Earnings.
+    """
+    business_id = get_business_id(request)
+    if business_id is None:
+        return Response({'error': 'No business profile found'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        kind, start_date, end_date = parse_close_period(request.data.get('period'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if end_date >= datetime.now().date():
+        return Response({'error': 'Only ended periods can be closed'}, status=status.HTTP_400_BAD_REQUEST)
+    if ClosedPeriod.objects.filter(business_id=business_id, period_start=start_date, period_end=end_date).exists():
+        return Response({'error': 'Period already closed'}, status=status.HTTP_409_CONFLICT)
+
+    try:
+        period = close_period(request.user, business_id, kind, start_date, end_date)
+    except IntegrityError:
+        # Another request closed the period since the check above
+        return Response({'error': 'Period already closed'}, status=status.HTTP_409_CONFLICT)
+    return Response(ClosedPeriodSerializer(period).data, status=status.HTTP_201_CREATED)
+
 @login_required
 def expenses(request):
     business = get_object_or_404(BusinessProfile, user=request.user)
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_rename_pan_vat_businessprofile_tax_id_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(fields=['business', 'date'], name='accounts_jo_busines_6b5241_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_journal_entry_business_date_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='account',
+            name='code',
+            field=models.CharField(max_length=20),
+        ),
+    ]
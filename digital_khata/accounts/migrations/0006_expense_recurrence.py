@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_account_code_per_business'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expense',
+            name='recurred_until',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='recurrence_source',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='occurrences', to='accounts.expense'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='expense',
+            unique_together={('recurrence_source', 'date')},
+        ),
+    ]
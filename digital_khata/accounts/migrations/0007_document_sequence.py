@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_expense_recurrence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('series', models.CharField(max_length=20)),
+                ('fiscal_year', models.PositiveIntegerField(default=0)),
+                ('next_value', models.PositiveBigIntegerField(default=1)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accounts.businessprofile')),
+            ],
+            options={
+                'unique_together': {('business', 'series', 'fiscal_year')},
+            },
+        ),
+    ]
@@ -73,7 +73,7 @@ class Account(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     business = models.ForeignKey(BusinessProfile, on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
-    code = models.CharField(max_length=20, unique=True)
+    code = models.CharField(max_length=20)
     account_type = models.CharField(max_length=20, choices=ACCOUNT_TYPES)
     opening_balance = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
     current_balance = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
@@ -97,6 +97,11 @@ class JournalEntry(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['business', 'date']),
+        ]
+
     def __str__(self):
         return f"{self.reference_no} - {self.date}"
 
@@ -129,9 +134,33 @@ class Expense(models.Model):
     amount = models.DecimalField(max_digits=15, decimal_places=2)
     date = models.DateField()
     recurrence = models.CharField(max_length=10, choices=RECURRENCE_CHOICES, default='none')
+    # Occurrences generated from a recurring expense point back to it
+    recurrence_source = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True, related_name='occurrences'
+    )
+    # Date of the last occurrence generated from this recurring expense
+    recurred_until = models.DateField(null=True, blank=True)
     description = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        unique_together = ('recurrence_source', 'date')
+
+    def __str__(self):
+        return f"{self.name} - {self.amount}"
+
+class DocumentSequence(models.Model):
+    """Counter numbering one series of documents of a business, per fiscal year when it resets."""
+    business = models.ForeignKey(BusinessProfile, on_delete=models.CASCADE)
+    series = models.CharField(max_length=20)
+    # Fiscal year the counter belongs to, or 0 for series that never reset
+    fiscal_year = models.PositiveIntegerField(default=0)
+    # First number not yet handed out to any process
+    next_value = models.PositiveBigIntegerField(default=1)
+
+    class Meta:
+        unique_together = ('business', 'series', 'fiscal_year')
+
     def __str__(self):
-        return f"{self.name} - {self.amount}"
\ No newline at end of file
+        return f"{self.series} {self.fiscal_year or ''} - next {self.next_value}"
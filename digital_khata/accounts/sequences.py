@@ -0,0 +1,148 @@
+"""
+Collision-free document numbers handed out in blocks (hi/lo).
+
+Each business has one DocumentSequence counter per series (invoice, bill,
+sku) and, for series that reset, per fiscal year. A process reserves a block
+of numbers by moving the counter forward with one UPDATE and then hands them
+out from memory, so a document costs no query at all until its process's
+block runs out. Processes never share a block, which makes numbers unique
+without retries; numbers left in a block when a process exits are skipped,
+so series may have gaps.
+
+A block reserved inside a transaction is rolled back with it, so the rest of
+the block is only kept for the process once that transaction commits; until
+then later calls in the same transaction reserve blocks of their own.
+"""
+
+import threading
+from datetime import date, timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.text import slugify
+from .models import DocumentSequence
+
+# Formats may use {business}, {fiscal_year}, {name} and {number}; series that
+# reset start again from 1 every fiscal year
+DEFAULT_SEQUENCES = {
+    'invoice': {'format': 'INV-{business}-{fiscal_year}-{number:05d}', 'reset': True},
+    'bill': {'format': 'BILL-{business}-{fiscal_year}-{number:05d}', 'reset': True},
+    'sku': {'format': 'SKU-{business}-{number:06d}', 'reset': False},
+}
+
+DEFAULT_BLOCK_SIZE = 50
+
+
+def series_config(series):
+    """Return the format and reset rule of a series, with settings.DOCUMENT_SEQUENCES overriding the defaults."""
+    config = dict(DEFAULT_SEQUENCES.get(series, {}))
+    config.update(getattr(settings, 'DOCUMENT_SEQUENCES', {}).get(series, {}))
+    if 'format' not in config:
+        raise ValueError(f'unknown document series {series!r}')
+    return config
+
+
+def fiscal_year(day):
+    """Return the year a date's fiscal year starts in."""
+    start_month = getattr(settings, 'FISCAL_YEAR_START_MONTH', 1)
+    return day.year if day.month >= start_month else day.year - 1
+
+
+def fiscal_year_bounds(year):
+    """Return the first and last day of the fiscal year starting in a year."""
+    start_month = getattr(settings, 'FISCAL_YEAR_START_MONTH', 1)
+    return date(year, start_month, 1), date(year + 1, start_month, 1) - timedelta(days=1)
+
+
+class SequenceAllocator:
+    """Process-wide store of the number blocks reserved by this process."""
+
+    def __init__(self, block_size=None):
+        self.block_size = block_size
+        # (business id, series, fiscal year) -> [next number, end of block]
+        self._blocks = {}
+        self._lock = threading.Lock()
+
+    def allocate(self, business_id, series, count=1, day=None, name=''):
+        """
+        Hand out the next numbers of a series.
+
+        Args:
+            business_id (int): The business numbering its documents.
+            series (str): 'invoice', 'bill', 'sku' or a configured series.
+            count (int): How many numbers to hand out.
+            day (date): Document date choosing the fiscal year (default today).
+            name (str): Document name, for formats using {name}.
+
+        Returns:
+            list: Formatted numbers in ascending order.
+        """
+        config = series_config(series)
+        year = fiscal_year(day or timezone.localdate())
+        key = (business_id, series, year if config.get('reset') else 0)
+
+        numbers = self._take(key, count)
+        missing = count - len(numbers)
+        if missing:
+            size = max(missing, self.block_size or getattr(
+                settings, 'DOCUMENT_SEQUENCE_BLOCK_SIZE', DEFAULT_BLOCK_SIZE
+            ))
+            start = self.reserve(key, size)
+            numbers += range(start, start + missing)
+            if missing < size:
+                block = [start + missing, start + size]
+                transaction.on_commit(lambda: self._store(key, block))
+
+        code = slugify(name)[:6].upper()
+        return [
+            config['format'].format(business=business_id, fiscal_year=year, name=code, number=number)
+            for number in numbers
+        ]
+
+    def next_number(self, business_id, series, day=None, name=''):
+        """Hand out the next number of a series."""
+        return self.allocate(business_id, series, 1, day, name)[0]
+
+    def _take(self, key, count):
+        with self._lock:
+            block = self._blocks.get(key)
+            if not block:
+                return []
+            taken = list(range(block[0], min(block[0] + count, block[1])))
+            block[0] += len(taken)
+            if block[0] >= block[1]:
+                del self._blocks[key]
+            return taken
+
+    def _store(self, key, block):
+        with self._lock:
+            if block[0] < block[1]:
+                self._blocks[key] = block
+
+    def reserve(self, key, size):
+        """
+        Reserve a block of numbers with one atomic counter update.
+
+        Returns:
+            int: The first number of the block.
+        """
+        business_id, series, year = key
+        counters = DocumentSequence.objects.filter(business_id=business_id, series=series, fiscal_year=year)
+        with transaction.atomic():
+            if not counters.update(next_value=F('next_value') + size):
+                DocumentSequence.objects.bulk_create(
+                    [DocumentSequence(business_id=business_id, series=series, fiscal_year=year)],
+                    ignore_conflicts=True
+                )
+                counters.update(next_value=F('next_value') + size)
+            # The updated row stays locked until the transaction ends
+            return counters.values_list('next_value', flat=True).get() - size
+
+    def clear(self):
+        """Drop every reserved block; their remaining numbers are skipped."""
+        with self._lock:
+            self._blocks.clear()
+
+
+sequences = SequenceAllocator()
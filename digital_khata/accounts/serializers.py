@@ -1,5 +1,7 @@
+from django.db import transaction
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from accounting.posting import post_entry_ledger
 from .models import Customer, Supplier, BusinessProfile, Account, JournalEntry, JournalItem, Expense
 
 class UserSerializer(serializers.ModelSerializer):
@@ -54,6 +56,7 @@ class AccountSerializer(serializers.ModelSerializer):
             'id', 'name', 'code', 'account_type', 'opening_balance', 
             'current_balance', 'is_active', 'created_at', 'updated_at'
         ]
+        read_only_fields = ['current_balance']
         
     def create(self, validated_data):
         # Set the user and business from the request context
@@ -96,10 +99,11 @@ class JournalEntrySerializer(serializers.ModelSerializer):
             except BusinessProfile.DoesNotExist:
                 pass
         
-        journal_entry = JournalEntry.objects.create(**validated_data)
-        
-        for item_data in items_data:
-            JournalItem.objects.create(entry=journal_entry, **item_data)
+        with transaction.atomic():
+            journal_entry = JournalEntry.objects.create(**validated_data)
+            for item_data in items_data:
+                JournalItem.objects.create(entry=journal_entry, **item_data)
+            post_entry_ledger(journal_entry)
             
         return journal_entry
 
@@ -5,11 +5,13 @@ from django.contrib.auth.forms import AuthenticationForm
 from django.contrib import messages
 from .forms import SignUpForm, CustomerForm, SupplierForm, BusinessProfileForm
 from .models import Customer, Supplier, BusinessProfile, Account, JournalEntry, Expense
+from accounting.posting import unpost
 
 from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from utils.eager_loading import EagerLoadingMixin
 from django.contrib.auth import authenticate
 from django.views.decorators.csrf import csrf_exempt
 from .serializers import (
@@ -93,7 +95,7 @@ class AccountRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView)
     def get_queryset(self):
         return Account.objects.filter(user=self.request.user)
 
-class JournalEntryListCreateAPIView(generics.ListCreateAPIView):
+class JournalEntryListCreateAPIView(EagerLoadingMixin, generics.ListCreateAPIView):
     serializer_class = JournalEntrySerializer
     permission_classes = [IsAuthenticated]
     
@@ -108,13 +110,17 @@ class JournalEntryListCreateAPIView(generics.ListCreateAPIView):
         except BusinessProfile.DoesNotExist:
             serializer.save(user=self.request.user)
 
-class JournalEntryRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class JournalEntryRetrieveUpdateDestroyAPIView(EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = JournalEntrySerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
         return JournalEntry.objects.filter(user=self.request.user)
 
+    def perform_destroy(self, instance):
+        # Remove the entry's ledger rows along with it
+        unpost([instance.reference_no])
+
 class ExpenseListCreateAPIView(generics.ListCreateAPIView):
     serializer_class = ExpenseSerializer
     permission_classes = [IsAuthenticated]
@@ -0,0 +1,82 @@
+"""
+In-process fan-out of live dashboard events.
+
+Signal handlers publish events for a business from any thread; every open
+Server-Sent Events stream of that business receives them on its own event
+loop. Events only reach streams served by the same process, so run the ASGI
+server with a single worker process (or several threads) per host.
+"""
+
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Events kept per stream before the slowest consumers start dropping them
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+def _offer(queue, event):
+    """Queue an event for a subscriber, dropping it if the subscriber lags."""
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        pass
+
+
+class EventBroker:
+    """Thread-safe registry of dashboard streams keyed by business id."""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, business_ids):
+        """
+        Register a stream for the given businesses.
+
+        Must be called from the event loop that will consume the queue.
+
+        Returns:
+            tuple: (loop, queue) subscriber handle.
+        """
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE))
+        with self._lock:
+            for business_id in business_ids:
+                self._subscribers[business_id].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber, business_ids):
+        """Remove a stream registered with subscribe."""
+        with self._lock:
+            for business_id in business_ids:
+                subscribers = self._subscribers.get(business_id)
+                if subscribers is not None:
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        del self._subscribers[business_id]
+
+    def publish(self, business_id, event):
+        """Send an event to every stream of a business. Safe from any thread."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(business_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                # The stream's loop has shut down; it will unsubscribe itself.
+                pass
+
+    def subscriber_count(self, business_id):
+        """Return the number of open streams of a business."""
+        with self._lock:
+            return len(self._subscribers.get(business_id, ()))
+
+
+broker = EventBroker()
+
+
+def format_event(event):
+    """Encode an event dict as a Server-Sent Events message."""
+    return f"event: {event['type']}\ndata: {json.dumps(event, cls=DjangoJSONEncoder)}\n\n"
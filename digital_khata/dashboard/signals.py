@@ -0,0 +1,145 @@
+"""
+Signal handlers publishing live dashboard events.
+
+Events are published once the surrounding transaction commits, so streams
+never announce rows that were rolled back.
+"""
+
+from decimal import Decimal
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save
+from django.dispatch import receiver
+from inventory.models import Product
+from inventory.signals import stock_moved
+from purchases.models import Bill
+from sales.models import Invoice
+from .events import broker
+from .snapshot import OUTSTANDING_STATUSES
+
+
+def publish_on_commit(business_id, event):
+    """Publish an event to the business's streams after the current transaction."""
+    if business_id is None or not broker.subscriber_count(business_id):
+        return
+    transaction.on_commit(lambda: broker.publish(business_id, event))
+
+
+def _amount(value):
+    return Decimal(str(value or 0))
+
+
+@receiver(post_save, sender=Invoice)
+def publish_invoice_event(sender, instance, created, **kwargs):
+    """Announce new invoices and payments received against existing ones."""
+    # The saved state is captured by reports.signals.remember_previous_totals
+    previous = getattr(instance, '_summary_previous', None)
+    outstanding = int(instance.status in OUTSTANDING_STATUSES)
+
+    if created or not previous:
+        publish_on_commit(instance.business_id, {
+            'type': 'invoice_created',
+            'invoice_id': instance.pk,
+            'invoice_number': instance.invoice_number,
+            'amount': _amount(instance.total_amount),
+            'kpis': {
+                'total_sales': _amount(instance.total_amount),
+                'recent_invoices': 1,
+                'outstanding_invoices': outstanding,
+            },
+        })
+        return
+
+    paid = _amount(instance.paid_amount) - _amount(previous['paid_amount'])
+    if paid > 0:
+        publish_on_commit(instance.business_id, {
+            'type': 'payment_received',
+            'invoice_id': instance.pk,
+            'invoice_number': instance.invoice_number,
+            'amount': paid,
+            'due_amount': _amount(instance.due_amount),
+            'status': instance.status,
+            'kpis': {
+                'outstanding_invoices': outstanding - int(previous['status'] in OUTSTANDING_STATUSES),
+            },
+        })
+
+
+@receiver(post_save, sender=Bill)
+def publish_bill_event(sender, instance, created, **kwargs):
+    """Announce new bills."""
+    if not created:
+        return
+    publish_on_commit(instance.business_id, {
+        'type': 'bill_created',
+        'bill_id': instance.pk,
+        'bill_number': instance.bill_number,
+        'amount': _amount(instance.total_amount),
+        'kpis': {
+            'total_purchases': _amount(instance.total_amount),
+            'recent_bills': 1,
+        },
+    })
+
+
+@receiver(pre_save, sender=Product)
+def remember_previous_stock(sender, instance, **kwargs):
+    """Store the saved stock level and threshold of a product while streams are listening."""
+    instance._previous_stock = None
+    if instance.pk and broker.subscriber_count(instance.business_id):
+        instance._previous_stock = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list('stock_quantity', 'low_stock_threshold')
+            .first()
+        )
+
+
+@receiver(post_save, sender=Product)
+def publish_stock_event(sender, instance, created, **kwargs):
+    """Announce products crossing their low-stock threshold either way."""
+    previous = getattr(instance, '_previous_stock', None)
+    if created:
+        was_low = False
+    elif previous is None:
+        return
+    else:
+        previous_quantity, previous_threshold = previous
+        was_low = previous_quantity <= previous_threshold
+    publish_stock_crossing(
+        instance.business_id, instance.pk, instance.name, was_low,
+        instance.stock_quantity, instance.low_stock_threshold
+    )
+
+
+def publish_stock_crossing(business_id, product_id, name, was_low, stock_quantity, threshold):
+    """Announce a product whose stock level crossed its low-stock threshold."""
+    is_low = stock_quantity <= threshold
+    if was_low == is_low:
+        return
+    publish_on_commit(business_id, {
+        'type': 'low_stock' if is_low else 'restocked',
+        'product_id': product_id,
+        'name': name,
+        'stock_quantity': stock_quantity,
+        'kpis': {
+            'low_stock_products': 1 if is_low else -1,
+        },
+    })
+
+
+@receiver(stock_moved)
+def publish_moved_stock_events(sender, deltas, movements, **kwargs):
+    """Announce low-stock crossings of stock changed by inventory.stock.apply_movements."""
+    business_ids = {movement.business_id for movement in movements}
+    if not any(broker.subscriber_count(business_id) for business_id in business_ids):
+        return
+    # Levels after the update; the level before is the same minus the delta
+    products = Product.objects.filter(pk__in=deltas).values(
+        'id', 'business_id', 'name', 'stock_quantity', 'low_stock_threshold'
+    )
+    for product in products:
+        previous = product['stock_quantity'] - deltas[product['id']]
+        threshold = product['low_stock_threshold']
+        publish_stock_crossing(
+            product['business_id'], product['id'], product['name'],
+            previous <= threshold, product['stock_quantity'], threshold
+        )
@@ -0,0 +1,92 @@
+"""
+Dashboard KPI snapshot shared by the HTML and API dashboards.
+"""
+
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.db.models import Sum, Count, F, Q, Value, Subquery, OuterRef, DecimalField, IntegerField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from inventory.models import Product
+from reports.analytics import top_sellers, TOP_SELLERS_DAYS
+from reports.cache import get_business_ids
+from reports.models import DailySalesSummary, DailyPurchaseSummary
+
+RECENT_DAYS = 30
+
+# Invoices in these statuses have been issued but not settled
+OUTSTANDING_STATUSES = ['sent', 'overdue']
+
+
+def _scalar(queryset, group_field, aggregate, output_field):
+    """Wrap an aggregate over rows belonging to the outer user as a scalar subquery."""
+    rows = (
+        queryset.order_by()
+        .values(group_field)
+        .annotate(value=aggregate)
+        .values('value')
+    )
+    return Coalesce(Subquery(rows, output_field=output_field), Value(0), output_field=output_field)
+
+
+class DashboardSnapshot:
+    """
+    Every dashboard KPI for a user, computed in two queries.
+
+    The first query reads all totals and counts as scalar subqueries over the
+    daily rollups and the product table; the second reads the top sellers.
+    """
+
+    def __init__(self, user, top_days=TOP_SELLERS_DAYS, business_ids=None):
+        self.user = user
+        self.top_days = top_days
+        self.business_ids = business_ids
+
+    def kpis(self):
+        """Return the totals and counts of the dashboard in a single query."""
+        money = DecimalField(max_digits=20, decimal_places=2)
+        count = IntegerField()
+        recent_since = timezone.localdate() - timedelta(days=RECENT_DAYS)
+
+        sales = DailySalesSummary.objects.filter(business__user=OuterRef('pk'))
+        purchases = DailyPurchaseSummary.objects.filter(business__user=OuterRef('pk'))
+        products = Product.objects.filter(user=OuterRef('pk'))
+
+        return User.objects.filter(pk=self.user.pk).annotate(
+            total_sales=_scalar(sales, 'business__user', Sum('total_amount'), money),
+            total_purchases=_scalar(purchases, 'business__user', Sum('total_amount'), money),
+            outstanding_invoices=_scalar(
+                sales, 'business__user',
+                Sum('document_count', filter=Q(status__in=OUTSTANDING_STATUSES)), count
+            ),
+            recent_invoices=_scalar(
+                sales, 'business__user',
+                Sum('document_count', filter=Q(date__gte=recent_since)), count
+            ),
+            recent_bills=_scalar(
+                purchases, 'business__user',
+                Sum('document_count', filter=Q(date__gte=recent_since)), count
+            ),
+            total_products=_scalar(products, 'user', Count('id'), count),
+            low_stock_products=_scalar(
+                products, 'user',
+                Count('id', filter=Q(stock_quantity__lte=F('low_stock_threshold'))), count
+            ),
+        ).values(
+            'total_sales', 'total_purchases', 'outstanding_invoices', 'recent_invoices',
+            'recent_bills', 'total_products', 'low_stock_products'
+        ).get()
+
+    def top_products(self):
+        """Return the best sellers over the snapshot's window."""
+        if self.business_ids is None:
+            self.business_ids = get_business_ids(self.user)
+        return top_sellers(self.business_ids, days=self.top_days)
+
+    def as_dict(self):
+        """Return every KPI as JSON-friendly values."""
+        data = self.kpis()
+        data['total_sales'] = float(data['total_sales'])
+        data['total_purchases'] = float(data['total_purchases'])
+        data['top_products'] = self.top_products()
+        return data
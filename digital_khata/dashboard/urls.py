@@ -8,4 +8,5 @@ urlpatterns = [
     
     # API endpoints
     path('api/data/', views.dashboard_data, name='dashboard-data'),
+    path('api/events/', views.dashboard_events, name='dashboard-events'),
 ]
\ No newline at end of file
@@ -1,92 +1,100 @@
+import asyncio
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, QueryDict, StreamingHttpResponse
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import condition, require_GET
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from sales import models as sales_models
-from purchases import models as purchases_models
-from inventory import models as inventory_models
-from django.db.models import Sum, Count
-from datetime import datetime, timedelta
+from reports.analytics import TOP_SELLERS_DAYS
+from reports.cache import cache_report, report_digest, last_modified, get_business_ids
+from django.utils import timezone
+from .events import broker, format_event
+from .snapshot import DashboardSnapshot
 
+# Seconds between keep-alive comments on an idle event stream
+HEARTBEAT_INTERVAL = 15
 
+
+def get_top_days(request):
+    """Return the top-sellers window in days requested with ?top_days=, or the default."""
+    try:
+        return min(max(int(request.GET.get('top_days', TOP_SELLERS_DAYS)), 1), 366)
+    except ValueError:
+        return TOP_SELLERS_DAYS
+
+def dashboard_params(request):
+    """Return the query parameters the dashboard data depends on, normalised."""
+    params = QueryDict(mutable=True)
+    params['top_days'] = str(get_top_days(request))
+    return params
+
+def dashboard_etag(request):
+    """ETag of the dashboard data, derived from the user's cache versions, parameters and today's date."""
+    if not request.user.is_authenticated:
+        return None
+    return report_digest('dashboard', request.user, dashboard_params(request))
+
+def dashboard_last_modified(request):
+    """
+    Time of the last write to any of the user's businesses, or the start of today if later.
+
+    The recent counts and top sellers move with the date, so the data also
+    changes at midnight; the parameters are part of the URL the time is for.
+    """
+    if not request.user.is_authenticated:
+        return None
+    today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    modified = last_modified(request.user)
+    return max(modified, today) if modified else today
+
+@condition(etag_func=dashboard_etag, last_modified_func=dashboard_last_modified)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_report('dashboard')
 def dashboard_data(request):
-    # Get user-specific data
-    invoices = sales_models.Invoice.objects.filter(user=request.user)
-    bills = purchases_models.Bill.objects.filter(user=request.user)
-    products = inventory_models.Product.objects.filter(user=request.user)
-    
-    # Calculate totals
-    total_sales = float(invoices.aggregate(Sum('total_amount'))['total_amount__sum'] or 0)
-    total_purchases = float(bills.aggregate(Sum('total_amount'))['total_amount__sum'] or 0)
-    total_products = products.count()
-    
-    # Outstanding invoices (unpaid)
-    outstanding_invoices = invoices.filter(status='unpaid').count()
-    
-    # Low stock products
-    low_stock_products = products.filter(quantity__lte=10).count()
-    
-    # Recent invoices (last 30 days)
-    thirty_days_ago = datetime.now().date() - timedelta(days=30)
-    recent_invoices = invoices.filter(date__gte=thirty_days_ago).count()
-    
-    # Recent bills (last 30 days)
-    recent_bills = bills.filter(date__gte=thirty_days_ago).count()
-    
-    # Top selling products (simplified)
-    top_products = list(products.order_by('-quantity')[:5].values(
-        'id', 'name', 'quantity', 'price'
-    ))
-    
-    data = {
-        'total_sales': total_sales,
-        'total_purchases': total_purchases,
-        'total_products': total_products,
-        'outstanding_invoices': outstanding_invoices,
-        'low_stock_products': low_stock_products,
-        'recent_invoices': recent_invoices,
-        'recent_bills': recent_bills,
-        'top_products': top_products,
-    }
-    
-    return Response(data)
+    snapshot = DashboardSnapshot(request.user, top_days=get_top_days(request))
+    return Response(snapshot.as_dict())
+
+async def event_stream(business_ids):
+    """Yield Server-Sent Events for the businesses until the client disconnects."""
+    subscriber = broker.subscribe(business_ids)
+    queue = subscriber[1]
+    try:
+        yield f'retry: {HEARTBEAT_INTERVAL * 1000}\n\n'
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            yield format_event(event)
+    finally:
+        broker.unsubscribe(subscriber, business_ids)
+
+@require_GET
+async def dashboard_events(request):
+    """
+    Stream KPI deltas of the user's businesses as Server-Sent Events.
+
+    Clients load /api/data/ once and apply the `kpis` deltas of each event.
+    Idle streams cost one sleeping coroutine, so serve this view with the
+    ASGI application.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=403)
+
+    business_ids = await sync_to_async(get_business_ids)(user)
+    response = StreamingHttpResponse(event_stream(business_ids), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 @login_required
 def dashboard(request):
-    # Get user-specific data
-    invoices = sales_models.Invoice.objects.filter(user=request.user)
-    bills = purchases_models.Bill.objects.filter(user=request.user)
-    products = inventory_models.Product.objects.filter(user=request.user)
-    
-    # Calculate totals
-    total_sales = invoices.aggregate(Sum('total_amount'))['total_amount__sum'] or 0
-    total_purchases = bills.aggregate(Sum('total_amount'))['total_amount__sum'] or 0
-    total_products = products.count()
-    
-    # Outstanding invoices (unpaid)
-    outstanding_invoices = invoices.filter(status='unpaid').count()
-    
-    # Low stock products
-    low_stock_products = products.filter(quantity__lte=10).count()
-    
-    # Recent invoices (last 30 days)
-    thirty_days_ago = datetime.now().date() - timedelta(days=30)
-    recent_invoices = invoices.filter(date__gte=thirty_days_ago).order_by('-date')
-    
-    # Top selling products (simplified - would need more complex logic in real app)
-    top_products = products.order_by('-quantity')[:5]
-    
-    context = {
-        'total_sales': total_sales,
-        'total_purchases': total_purchases,
-        'total_products': total_products,
-        'outstanding_invoices': outstanding_invoices,
-        'low_stock_products': low_stock_products,
-        'recent_invoices': recent_invoices,
-        'top_products': top_products,
-    }
-    
-    return render(request, 'dashboard/dashboard.html', context)
\ No newline at end of file
+    # Get user-specific KPIs
+    snapshot = DashboardSnapshot(request.user, top_days=get_top_days(request))
+    context = snapshot.as_dict()
+    return render(request, 'dashboard/dashboard.html', context)
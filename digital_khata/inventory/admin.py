@@ -1,9 +1,22 @@
 from django.contrib import admin
-from .models import Product
+from .models import Product, StockMovement
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = ('name', 'sku', 'price', 'stock_quantity', 'tax_rate', 'user', 'created_at')
     search_fields = ('name', 'sku')
     list_filter = ('created_at', 'user')
-    list_editable = ('price', 'stock_quantity')
\ No newline at end of file
+    list_editable = ('price', 'stock_quantity')
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ('product', 'quantity', 'reason', 'reference', 'business', 'created_at')
+    search_fields = ('product__name', 'product__sku', 'reference')
+    list_filter = ('reason', 'created_at')
+
+    # Movements are append-only
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_document_sequence'),
+        ('inventory', '0003_stockmovement'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='inventory_p_user_id_1e2f04_idx'),
+        ),
+    ]
@@ -66,6 +66,12 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of the API
+            models.Index(fields=['user', 'created_at', 'id']),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -86,4 +92,30 @@ class Product(models.Model):
     @property
     def is_out_of_stock(self):
         """Check if product is out of stock."""
-        return self.stock_quantity == 0
\ No newline at end of file
+        return self.stock_quantity == 0
+
+class StockMovement(models.Model):
+    """Append-only record of one change to a product's stock level."""
+    REASON_CHOICES = [
+        ('sale', 'Sale'),
+        ('sale_reversal', 'Sale Reversal'),
+        ('purchase', 'Purchase'),
+        ('purchase_reversal', 'Purchase Reversal'),
+        ('adjustment', 'Adjustment'),
+    ]
+
+    business = models.ForeignKey(BusinessProfile, on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='movements')
+    quantity = models.IntegerField()
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    reference = models.CharField(max_length=50, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.product_id}: {self.quantity:+d} ({self.reason})"
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['product', 'created_at']),
+        ]
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from utils.helpers import generate_sku
 from .models import Product, Category
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -17,6 +18,8 @@ class ProductSerializer(serializers.ModelSerializer):
             'low_stock_threshold', 'unit', 'tax_rate', 'category', 
             'category_name', 'stock_status', 'created_at', 'updated_at'
         ]
+        # Left out, the next number of the business's series is used
+        extra_kwargs = {'sku': {'required': False, 'allow_blank': True}}
         
     def create(self, validated_data):
         # Set the user and business from the request context
@@ -30,6 +33,10 @@ class ProductSerializer(serializers.ModelSerializer):
                 validated_data['business'] = business_profile
             except BusinessProfile.DoesNotExist:
                 pass
+        if not validated_data.get('sku'):
+            if 'business' not in validated_data:
+                raise serializers.ValidationError({'sku': 'This field is required.'})
+            validated_data['sku'] = generate_sku(validated_data['business'].id, validated_data['name'])
         return super().create(validated_data)
         
     def update(self, instance, validated_data):
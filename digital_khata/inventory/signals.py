@@ -0,0 +1,10 @@
+"""
+Signals sent by the inventory app.
+"""
+
+from django.dispatch import Signal
+
+# Sent after inventory.stock.apply_movements changed stock levels with an
+# UPDATE, which fires no post_save. Arguments: deltas (product id -> net
+# units added) and movements (the saved StockMovement rows).
+stock_moved = Signal()
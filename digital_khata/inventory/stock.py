@@ -0,0 +1,99 @@
+"""
+Stock level changes applied as set-based deltas.
+
+Every change to a product's stock goes through apply_movements: the net
+change per product is applied with a single UPDATE ... CASE relative to the
+stored level (F('stock_quantity') + n), so concurrent sales never overwrite
+each other, and the movements themselves are inserted with one bulk_create
+into the append-only StockMovement table. A document therefore costs two
+queries however many lines it has. Since no Product is saved, listeners are
+told through the stock_moved signal instead of post_save.
+"""
+
+from collections import defaultdict
+from django.db import IntegrityError, transaction
+from django.db.models import F, Case, When, Value, IntegerField
+from .models import Product, StockMovement
+from .signals import stock_moved
+
+
+class InsufficientStockError(IntegrityError):
+    """Raised when stock movements would take a product below zero."""
+
+
+def apply_stock_deltas(deltas):
+    """
+    Add quantities to the stock levels of many products in one UPDATE.
+
+    Args:
+        deltas (dict): product id -> units to add (negative to remove).
+    """
+    changed = {product_id: delta for product_id, delta in deltas.items() if delta}
+    if not changed:
+        return
+    Product.objects.filter(pk__in=changed).update(
+        stock_quantity=F('stock_quantity') + Case(
+            *[When(pk=product_id, then=Value(delta)) for product_id, delta in changed.items()],
+            output_field=IntegerField()
+        )
+    )
+
+
+def item_movements(items, sign, reason, reference=''):
+    """
+    Return the unsaved stock movements of a document's items.
+
+    Lines of the same product are netted into one movement.
+
+    Args:
+        items (iterable): Invoice or bill items with their products loaded.
+        sign (int): 1 to put the units into stock, -1 to take them out.
+        reason (str): One of StockMovement.REASON_CHOICES.
+        reference (str): The document number.
+
+    Returns:
+        list: StockMovement instances, one per product.
+    """
+    quantities = defaultdict(int)
+    businesses = {}
+    for item in items:
+        quantities[item.product_id] += sign * item.quantity
+        businesses[item.product_id] = item.product.business_id
+    return [
+        StockMovement(
+            business_id=businesses[product_id],
+            product_id=product_id,
+            quantity=quantity,
+            reason=reason,
+            reference=reference
+        )
+        for product_id, quantity in quantities.items() if quantity
+    ]
+
+
+def apply_movements(movements):
+    """
+    Apply stock movements and record them.
+
+    Args:
+        movements (list): Unsaved StockMovement instances.
+
+    Raises:
+        InsufficientStockError: If a product would go below zero; nothing
+            is applied.
+    """
+    movements = [movement for movement in movements if movement.quantity]
+    if not movements:
+        return
+
+    deltas = defaultdict(int)
+    for movement in movements:
+        deltas[movement.product_id] += movement.quantity
+    with transaction.atomic():
+        try:
+            apply_stock_deltas(deltas)
+        except IntegrityError as e:
+            # The UPDATE only writes stock levels, so only their check can fail
+            raise InsufficientStockError('Not enough stock') from e
+        StockMovement.objects.bulk_create(movements)
+    stock_moved.send(sender=StockMovement, deltas=dict(deltas), movements=movements)
@@ -6,6 +6,8 @@ from rest_framework import generics, status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from utils.eager_loading import EagerLoadingMixin
+from accounts.models import BusinessProfile
 from .models import Product, Category
 from .forms import ProductForm
 from .serializers import ProductSerializer, CategorySerializer
@@ -39,6 +41,10 @@ def product_create(request):
         if form.is_valid():
             product = form.save(commit=False)
             product.user = request.user
+            try:
+                product.business = BusinessProfile.objects.get(user=request.user)
+            except BusinessProfile.DoesNotExist:
+                pass
             product.save()
             messages.success(request, 'Product created successfully!')
             return redirect('inventory:product_list')
@@ -70,9 +76,10 @@ def product_delete(request, pk):
 
 
 # API Views
-class ProductListCreateAPIView(generics.ListCreateAPIView):
+class ProductListCreateAPIView(EagerLoadingMixin, generics.ListCreateAPIView):
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
+    keyset_ordering = ('created_at', 'id')
     
     def get_queryset(self):
         return Product.objects.filter(user=self.request.user)
@@ -86,7 +93,7 @@ class ProductListCreateAPIView(generics.ListCreateAPIView):
         except BusinessProfile.DoesNotExist:
             serializer.save(user=self.request.user)
 
-class ProductRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class ProductRetrieveUpdateDestroyAPIView(EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
     
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_rename_pan_vat_businessprofile_tax_id_and_more'),
+        ('purchases', '0002_rename_tax_total_bill_due_amount_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['business', 'status', 'date'], name='purchases_b_busines_48655a_idx'),
+        ),
+    ]
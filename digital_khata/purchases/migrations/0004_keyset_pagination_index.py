@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_document_sequence'),
+        ('purchases', '0003_bill_purchases_b_busines_48655a_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['user', 'date', 'id'], name='purchases_b_user_id_243887_idx'),
+        ),
+    ]
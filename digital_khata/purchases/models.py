@@ -58,6 +58,13 @@ class Bill(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['business', 'status', 'date']),
+            # Keyset pagination of the API
+            models.Index(fields=['user', 'date', 'id']),
+        ]
+
     def __str__(self):
         return f"Bill {self.bill_number} - {self.supplier.name}"
 
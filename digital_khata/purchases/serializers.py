@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from utils.helpers import generate_bill_number
 from .models import Bill, BillItem
 from accounts.models import Supplier
 from inventory.models import Product
@@ -25,6 +26,8 @@ class BillSerializer(serializers.ModelSerializer):
             'paid_amount', 'due_amount', 'status', 'items',
             'created_at', 'updated_at'
         ]
+        # Left out, the next number of the business's series is used
+        extra_kwargs = {'bill_number': {'required': False, 'allow_blank': True}}
         
     def create(self, validated_data):
         items_data = validated_data.pop('items')
@@ -39,6 +42,10 @@ class BillSerializer(serializers.ModelSerializer):
                 validated_data['business'] = business_profile
             except BusinessProfile.DoesNotExist:
                 pass
+        if not validated_data.get('bill_number'):
+            if 'business' not in validated_data:
+                raise serializers.ValidationError({'bill_number': 'This field is required.'})
+            validated_data['bill_number'] = generate_bill_number(validated_data['business'].id, validated_data['date'])
         
         bill = Bill.objects.create(**validated_data)
         
@@ -5,21 +5,29 @@ from .models import Bill, BillItem
 from .forms import BillForm, BillItemForm
 from accounts.models import Supplier
 from inventory.models import Product
+from inventory.stock import InsufficientStockError, apply_movements, item_movements
 from django.forms import inlineformset_factory
+from django.db import IntegrityError, transaction
 from django.db.models import Q
 
 from rest_framework import generics, status
 from rest_framework.decorators import api_view
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from utils.eager_loading import EagerLoadingMixin
 from .serializers import BillSerializer
 from accounts.models import BusinessProfile
 
 
+STOCK_ERROR = 'Not enough stock for these items; nothing was saved.'
+SAVE_ERROR = 'This bill clashes with one saved in the meantime, such as by its bill number; nothing was saved.'
+
+
 # API Views
-class BillListCreateAPIView(generics.ListCreateAPIView):
+class BillListCreateAPIView(EagerLoadingMixin, generics.ListCreateAPIView):
     serializer_class = BillSerializer
     permission_classes = [IsAuthenticated]
+    keyset_ordering = ('date', 'id')
     
     def get_queryset(self):
         return Bill.objects.filter(user=self.request.user)
@@ -35,7 +43,7 @@ class BillListCreateAPIView(generics.ListCreateAPIView):
             except BusinessProfile.DoesNotExist:
                 serializer.save(user=request.user)
 
-class BillRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class BillRetrieveUpdateDestroyAPIView(EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = BillSerializer
     permission_classes = [IsAuthenticated]
     
@@ -75,18 +83,29 @@ def bill_create(request):
         formset = BillItemFormSet(request.POST)
         
         if form.is_valid() and formset.is_valid():
-            bill = form.save(commit=False)
-            bill.user = request.user
-            bill.save()
-            
-            formset.instance = bill
-            formset.save()
-            
-            # Update product quantities
-            update_product_quantities(bill, is_purchase=True)
-            
-            messages.success(request, 'Bill created successfully!')
-            return redirect('purchases:bill_list')
+            try:
+                with transaction.atomic():
+                    bill = form.save(commit=False)
+                    bill.user = request.user
+                    try:
+                        bill.business = BusinessProfile.objects.get(user=request.user)
+                    except BusinessProfile.DoesNotExist:
+                        pass
+                    bill.save()
+
+                    formset.instance = bill
+                    formset.save()
+
+                    apply_movements(item_movements(
+                        bill.items.select_related('product'), 1, 'purchase', bill.bill_number
+                    ))
+            except InsufficientStockError:
+                messages.error(request, STOCK_ERROR)
+            except IntegrityError:
+                form.add_error(None, SAVE_ERROR)
+            else:
+                messages.success(request, 'Bill created successfully!')
+                return redirect('purchases:bill_list')
     else:
         form = BillForm()
         formset = BillItemFormSet()
@@ -108,18 +127,24 @@ def bill_update(request, pk):
         formset = BillItemFormSet(request.POST, instance=bill)
         
         if form.is_valid() and formset.is_valid():
-            # Store old quantities before updating
-            old_items = list(bill.items.all())
-            
-            form.save()
-            formset.save()
-            
-            # Update product quantities
-            revert_product_quantities(old_items)
-            update_product_quantities(bill, is_purchase=True)
-            
-            messages.success(request, 'Bill updated successfully!')
-            return redirect('purchases:bill_list')
+            old_items = list(bill.items.select_related('product'))
+            try:
+                with transaction.atomic():
+                    form.save()
+                    formset.save()
+
+                    # Put the old lines back and take the new ones out in one go
+                    apply_movements(
+                        item_movements(old_items, -1, 'purchase_reversal', bill.bill_number)
+                        + item_movements(bill.items.select_related('product'), 1, 'purchase', bill.bill_number)
+                    )
+            except InsufficientStockError:
+                messages.error(request, STOCK_ERROR)
+            except IntegrityError:
+                form.add_error(None, SAVE_ERROR)
+            else:
+                messages.success(request, 'Bill updated successfully!')
+                return redirect('purchases:bill_list')
     else:
         form = BillForm(instance=bill)
         formset = BillItemFormSet(instance=bill)
@@ -133,26 +158,15 @@ def bill_update(request, pk):
 def bill_delete(request, pk):
     bill = get_object_or_404(Bill, pk=pk, user=request.user)
     if request.method == 'POST':
-        # Revert product quantities before deleting
-        revert_product_quantities(bill.items.all())
-        bill.delete()
-        messages.success(request, 'Bill deleted successfully!')
+        try:
+            with transaction.atomic():
+                apply_movements(item_movements(
+                    bill.items.select_related('product'), -1, 'purchase_reversal', bill.bill_number
+                ))
+                bill.delete()
+        except InsufficientStockError:
+            messages.error(request, STOCK_ERROR)
+        else:
+            messages.success(request, 'Bill deleted successfully!')
         return redirect('purchases:bill_list')
     return render(request, 'purchases/bill_confirm_delete.html', {'bill': bill})
-
-def update_product_quantities(bill, is_purchase=True):
-    """Update product quantities when bill is created/updated"""
-    for item in bill.items.all():
-        product = item.product
-        if is_purchase:
-            product.quantity += item.quantity
-        else:
-            product.quantity -= item.quantity
-        product.save()
-
-def revert_product_quantities(items):
-    """Revert product quantities when bill is deleted/updated"""
-    for item in items:
-        product = item.product
-        product.quantity -= item.quantity
-        product.save()
\ No newline at end of file
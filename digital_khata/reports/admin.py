@@ -1,3 +1,18 @@
 from django.contrib import admin
+from .models import DailySalesSummary, DailyPurchaseSummary, DailyProductSales, ReportJob
 
-# Register your models here.
+@admin.register(DailySalesSummary, DailyPurchaseSummary)
+class DailySummaryAdmin(admin.ModelAdmin):
+    list_display = ('business', 'date', 'status', 'total_amount', 'due_amount', 'document_count')
+    list_filter = ('status', 'date', 'business')
+
+@admin.register(DailyProductSales)
+class DailyProductSalesAdmin(admin.ModelAdmin):
+    list_display = ('business', 'date', 'product', 'quantity', 'revenue')
+    list_filter = ('date', 'business')
+    search_fields = ('product__name',)
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'report_type', 'status', 'user', 'created_at', 'finished_at', 'expires_at')
+    list_filter = ('status', 'report_type')
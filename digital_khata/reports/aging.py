@@ -0,0 +1,84 @@
+"""
+Receivables and payables aging.
+"""
+
+from datetime import timedelta
+from django.db.models import Sum, Count, Q
+
+# Bucket name, youngest age and oldest age in days (None = no limit)
+AGING_BUCKETS = [
+    ('0_30', 0, 30),
+    ('31_60', 31, 60),
+    ('61_90', 61, 90),
+    ('90_plus', 91, None),
+]
+
+# Documents in these statuses are never collected or paid
+CLOSED_STATUSES = ['draft', 'cancelled']
+
+
+def bucket_aggregates(as_of):
+    """Return one conditional Sum of due_amount per aging bucket."""
+    aggregates = {}
+    for name, youngest, oldest in AGING_BUCKETS:
+        condition = Q(date__lte=as_of - timedelta(days=youngest))
+        if oldest is not None:
+            condition &= Q(date__gte=as_of - timedelta(days=oldest))
+        aggregates[f'days_{name}'] = Sum('due_amount', filter=condition)
+    return aggregates
+
+
+def amounts(row):
+    """Convert the Decimal amounts of an aggregate row to floats."""
+    return {
+        key: float(value or 0) if key.startswith('days_') or key == 'total_due' else value
+        for key, value in row.items()
+    }
+
+
+def aging_report(documents, party_field, as_of, offset=0, limit=50):
+    """
+    Age the open balances of invoices or bills.
+
+    Args:
+        documents (QuerySet): Invoice or Bill queryset scoped to the tenant.
+        party_field (str): 'customer' or 'supplier'.
+        as_of (date): Date the ages are measured from.
+        offset (int): Index of the first party row to return.
+        limit (int): Maximum number of party rows to return.
+
+    Returns:
+        dict: Bucket totals and a page of per-party breakdowns.
+    """
+    documents = documents.filter(
+        date__lte=as_of, due_amount__gt=0
+    ).exclude(status__in=CLOSED_STATUSES)
+    buckets = bucket_aggregates(as_of)
+
+    totals = documents.aggregate(
+        **buckets,
+        total_due=Sum('due_amount'),
+        document_count=Count('id'),
+        party_count=Count(party_field, distinct=True),
+    )
+
+    parties = (
+        documents.values(party_field, f'{party_field}__name')
+        .annotate(**buckets, total_due=Sum('due_amount'), document_count=Count('id'))
+        .order_by('-total_due', party_field)[offset:offset + limit]
+    )
+
+    party_rows = []
+    for row in parties:
+        row = amounts(row)
+        row['id'] = row.pop(party_field)
+        row['name'] = row.pop(f'{party_field}__name')
+        party_rows.append(row)
+
+    totals = amounts(totals)
+    return {
+        'as_of': as_of.strftime('%Y-%m-%d'),
+        'totals': {key: value for key, value in totals.items() if key != 'party_count'},
+        'party_count': totals['party_count'],
+        'parties': party_rows,
+    }
@@ -0,0 +1,47 @@
+"""
+Sales analytics read from the daily product sales rollup.
+"""
+
+from datetime import timedelta
+from django.db.models import Sum
+from django.utils import timezone
+from .models import DailyProductSales
+
+TOP_SELLERS_DAYS = 30
+TOP_SELLERS_LIMIT = 5
+
+
+def top_sellers(business_ids, days=TOP_SELLERS_DAYS, limit=TOP_SELLERS_LIMIT, end_date=None):
+    """
+    Return the best-selling products over a trailing window.
+
+    Args:
+        business_ids (list): Businesses to include.
+        days (int): Length of the window in days, ending on end_date.
+        limit (int): Number of products to return.
+        end_date (date): Last day of the window. Defaults to today.
+
+    Returns:
+        list: Dicts with id, name, quantity and revenue, best seller first.
+    """
+    end_date = end_date or timezone.localdate()
+    start_date = end_date - timedelta(days=days - 1)
+    rows = (
+        DailyProductSales.objects.filter(
+            business_id__in=business_ids,
+            date__range=[start_date, end_date]
+        )
+        .values('product_id', 'product__name')
+        .annotate(quantity=Sum('quantity'), revenue=Sum('revenue'))
+        .filter(quantity__gt=0)
+        .order_by('-quantity', '-revenue', 'product_id')[:limit]
+    )
+    return [
+        {
+            'id': row['product_id'],
+            'name': row['product__name'],
+            'quantity': row['quantity'],
+            'revenue': float(row['revenue'] or 0),
+        }
+        for row in rows
+    ]
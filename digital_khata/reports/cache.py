@@ -0,0 +1,119 @@
+"""
+Tenant-aware caching of report and dashboard API results.
+
+Each business has a version in the cache: the time of its last write in
+nanoseconds. Cached results embed the versions of the requesting user's
+businesses in their key, so bumping a business's version on any write makes
+all of its cached results unreachable. The same versions drive ETag and
+Last-Modified headers for conditional requests.
+"""
+
+import hashlib
+import time
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.response import Response
+from accounts.models import BusinessProfile
+
+VERSION_KEY = 'report-version:{}'
+BUSINESSES_KEY = 'report-businesses:{}'
+
+
+def _fresh_version():
+    """Return a version number that was never used before for any business."""
+    return time.time_ns()
+
+
+def get_business_ids(user):
+    """Return the ids of the businesses owned by a user, cached."""
+    key = BUSINESSES_KEY.format(user.pk)
+    business_ids = cache.get(key)
+    if business_ids is None:
+        business_ids = list(
+            BusinessProfile.objects.filter(user=user).order_by('id').values_list('id', flat=True)
+        )
+        cache.set(key, business_ids, None)
+    return business_ids
+
+
+def forget_business_ids(user_id):
+    """Drop the cached business ids of a user."""
+    cache.delete(BUSINESSES_KEY.format(user_id))
+
+
+def get_versions(business_ids):
+    """Return the current cache version of each business."""
+    keys = [VERSION_KEY.format(business_id) for business_id in business_ids]
+    versions = cache.get_many(keys)
+    missing = {key: _fresh_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump_version(business_id):
+    """Invalidate every cached report of a business."""
+    if business_id is None:
+        return
+    cache.set(VERSION_KEY.format(business_id), _fresh_version(), None)
+
+
+def report_digest(endpoint, user, params):
+    """
+    Return a digest identifying the current result of a report request.
+
+    Args:
+        endpoint (str): Name of the report endpoint.
+        user (User): The requesting user.
+        params (QueryDict): Request query parameters.
+
+    Returns:
+        str: Digest that changes whenever the user's businesses are written to.
+    """
+    business_ids = get_business_ids(user)
+    versions = get_versions(business_ids)
+    normalized = sorted(
+        (name, sorted(values)) for name, values in params.lists()
+    )
+    return hashlib.md5(
+        repr((endpoint, user.pk, business_ids, versions, normalized, timezone.localdate().isoformat())).encode()
+    ).hexdigest()
+
+
+def make_cache_key(endpoint, user, params):
+    """Build the cache key for a report request."""
+    return f'report:{endpoint}:{report_digest(endpoint, user, params)}'
+
+
+def last_modified(user):
+    """Return the time of the last write to any of a user's businesses."""
+    versions = get_versions(get_business_ids(user))
+    if not versions:
+        return None
+    return datetime.fromtimestamp(max(versions) / 1e9, tz=dt_timezone.utc)
+
+
+def cache_report(endpoint):
+    """
+    Cache successful responses of a report API view.
+
+    Place below @api_view/@permission_classes so authentication has run.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            key = make_cache_key(endpoint, request.user, request.GET)
+            data = cache.get(key)
+            if data is not None:
+                return Response(data)
+
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, getattr(settings, 'REPORT_CACHE_TIMEOUT', 900))
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,90 @@
+"""
+Streaming CSV export helpers for reports.
+"""
+
+import csv
+import zlib
+from django.http import StreamingHttpResponse
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Query parameter every CSV export reads to serve a gzipped file
+GZIP_PARAM = 'gzip'
+
+
+class Echo:
+    """File-like object that returns written values instead of buffering them."""
+
+    def write(self, value):
+        return value
+
+
+def wants_gzip(request):
+    """Return whether an export request asked for a gzipped file with ?gzip=1."""
+    return request.GET.get(GZIP_PARAM, '').lower() in ('1', 'true', 'yes')
+
+
+def csv_rows(header, rows):
+    """Yield CSV-encoded lines for a header and an iterable of rows."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def gzip_chunks(chunks):
+    """Compress an iterable of text chunks into a gzip byte stream."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def filter_documents(queryset, params):
+    """
+    Apply the report date range and status filters to a document queryset.
+
+    Args:
+        queryset (QuerySet): Invoice or Bill queryset.
+        params (QueryDict): Request query parameters.
+
+    Returns:
+        QuerySet: Filtered queryset.
+    """
+    start_date = params.get('start_date')
+    end_date = params.get('end_date')
+    if start_date and end_date:
+        queryset = queryset.filter(date__range=[start_date, end_date])
+
+    status_filter = params.get('status')
+    if status_filter:
+        queryset = queryset.filter(status=status_filter)
+    return queryset
+
+
+def stream_csv(header, queryset, fields, filename, compress=False):
+    """
+    Build a constant-memory CSV download for a queryset.
+
+    Args:
+        header (list): Column titles.
+        queryset (QuerySet): Rows to export.
+        fields (list): Field lookups passed to values_list, in column order.
+        filename (str): Download name without extension.
+        compress (bool): Gzip the stream and serve a .csv.gz file.
+
+    Returns:
+        StreamingHttpResponse: The streaming download.
+    """
+    rows = queryset.values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    content = csv_rows(header, rows)
+
+    if compress:
+        response = StreamingHttpResponse(gzip_chunks(content), content_type='application/gzip')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.csv.gz"'
+    else:
+        response = StreamingHttpResponse(content, content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
@@ -0,0 +1,144 @@
+"""
+Offline execution of report jobs.
+
+Jobs replay the regular report views with the job owner's credentials and
+write the result under MEDIA_ROOT, so any report can run outside a web worker.
+A job left running longer than REPORT_JOB_TIMEOUT, for instance by a worker
+that was killed, is claimed again.
+"""
+
+import json
+import os
+import tempfile
+from datetime import timedelta
+from django.conf import settings
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.db.models import Q
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from .models import ReportJob
+
+
+def get_report_views():
+    """Return report type -> (view, file extension) for every job type."""
+    from . import views
+    return {
+        'sales': (views.sales_report_data, 'json'),
+        'purchases': (views.purchases_report_data, 'json'),
+        'inventory': (views.inventory_report_data, 'json'),
+        'receivables': (views.receivables_aging_data, 'json'),
+        'payables': (views.payables_aging_data, 'json'),
+        'sales_csv': (views.export_sales_csv, 'csv'),
+        'purchases_csv': (views.export_purchases_csv, 'csv'),
+    }
+
+
+def build_request(user, params):
+    """Build a GET request for a report view on behalf of a user."""
+    request = HttpRequest()
+    request.method = 'GET'
+    request.user = user
+    request.META = {'SERVER_NAME': 'localhost', 'SERVER_PORT': '80'}
+    request.GET = QueryDict(mutable=True)
+    for name, value in params.items():
+        if isinstance(value, list):
+            request.GET.setlist(name, [str(item) for item in value])
+        else:
+            request.GET[name] = str(value)
+    return request
+
+
+def write_response(response, extension, output):
+    """Write a report view response to a binary file object."""
+    if response.status_code != 200:
+        detail = getattr(response, 'data', None) or response.status_code
+        raise ValueError(f'Report failed: {detail}')
+
+    if extension == 'json':
+        output.write(json.dumps(response.data, cls=DjangoJSONEncoder).encode('utf-8'))
+    elif response.streaming:
+        for chunk in response.streaming_content:
+            output.write(chunk)
+    else:
+        output.write(response.content)
+
+
+def claim_jobs(limit, now=None):
+    """
+    Mark up to `limit` pending or stale running jobs as running and return their ids.
+
+    Each job is claimed with a conditional UPDATE on the status and start time
+    it was read with, so concurrent workers never run the same job twice.
+    """
+    now = now or timezone.now()
+    stale = now - timedelta(seconds=settings.REPORT_JOB_TIMEOUT)
+    claimable = (
+        ReportJob.objects.filter(Q(status='pending') | Q(status='running', started_at__lt=stale))
+        .order_by('created_at')
+        .values_list('id', 'status', 'started_at')[:limit]
+    )
+    claimed = []
+    for job_id, job_status, started_at in list(claimable):
+        if ReportJob.objects.filter(pk=job_id, status=job_status, started_at=started_at).update(
+            status='running', started_at=now
+        ):
+            claimed.append(job_id)
+    return claimed
+
+
+def run_job(job_id):
+    """
+    Compute a claimed report job and store its artifact.
+
+    Runs in worker processes, so it only takes the job id.
+
+    Returns:
+        str: The final status of the job.
+    """
+    close_old_connections()
+    try:
+        job = ReportJob.objects.select_related('user').get(pk=job_id)
+        view, extension = get_report_views()[job.report_type]
+        with tempfile.TemporaryFile() as output:
+            response = view(build_request(job.user, job.params))
+            write_response(response, extension, output)
+            output.seek(0)
+            job.file.save(f'{job.report_type}_{job.pk}.{extension}', File(output), save=False)
+
+        job.status = 'completed'
+        job.finished_at = timezone.now()
+        job.expires_at = job.finished_at + timedelta(seconds=settings.REPORT_JOB_TTL)
+        job.save(update_fields=['status', 'error', 'file', 'finished_at', 'expires_at'])
+    except Exception as e:
+        # Also covers unknown report types and errors reading or saving the job
+        ReportJob.objects.filter(pk=job_id).update(
+            status='failed', error=str(e) or type(e).__name__, finished_at=timezone.now()
+        )
+        return 'failed'
+    return job.status
+
+
+def expire_jobs(now=None):
+    """
+    Delete the artifacts of completed jobs past their expiry.
+
+    Returns:
+        int: Number of jobs expired.
+    """
+    now = now or timezone.now()
+    expired = ReportJob.objects.filter(status='completed', expires_at__lte=now)
+    count = 0
+    for job in expired:
+        if job.file:
+            job.file.delete(save=False)
+        job.status = 'expired'
+        job.save(update_fields=['status', 'file'])
+        count += 1
+    return count
+
+
+def artifact_name(job):
+    """Return the download file name of a job's artifact."""
+    return os.path.basename(job.file.name)
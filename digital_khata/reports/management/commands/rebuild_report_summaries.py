@@ -0,0 +1,43 @@
+"""
+Management command to rebuild the daily sales, purchase and product sales rollup tables.
+"""
+
+from django.core.management.base import BaseCommand
+from sales.models import Invoice
+from purchases.models import Bill
+from reports.summaries import rebuild_summaries, rebuild_product_sales
+
+class Command(BaseCommand):
+    """Rebuild daily report summaries from invoices and bills."""
+
+    help = 'Rebuild the daily sales, purchase and product sales summaries used by dashboards and reports'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--business', type=int, action='append', dest='business_ids',
+            help='Only rebuild summaries for this business id (repeatable)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of summary rows inserted per query'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command execution."""
+        for document_model in (Invoice, Bill):
+            count = rebuild_summaries(
+                document_model,
+                business_ids=options['business_ids'],
+                batch_size=options['batch_size']
+            )
+            self.stdout.write(
+                f'Rebuilt {count} daily summaries from {document_model._meta.verbose_name_plural}'
+            )
+
+        count = rebuild_product_sales(
+            business_ids=options['business_ids'],
+            batch_size=options['batch_size']
+        )
+        self.stdout.write(f'Rebuilt {count} daily product sales rows')
+
+        self.stdout.write(self.style.SUCCESS('Report summaries rebuilt successfully'))
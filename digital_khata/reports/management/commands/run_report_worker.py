@@ -0,0 +1,64 @@
+"""
+Management command to run the report job worker.
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from django.core.management.base import BaseCommand
+from django.db import connections
+from reports.jobs import claim_jobs, run_job, expire_jobs
+
+class Command(BaseCommand):
+    """Run queued report jobs in a pool of worker processes."""
+
+    help = 'Process pending report jobs and expire old report artifacts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=2,
+            help='Number of worker processes'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=5.0,
+            help='Seconds to wait between polls when the queue is empty'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Process the jobs currently queued and exit'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command execution."""
+        workers = options['workers']
+        # Future -> id of the job it runs
+        running = {}
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while True:
+                expired = expire_jobs()
+                if expired:
+                    self.stdout.write(f'Expired {expired} report artifacts')
+
+                # Top the pool up as jobs finish instead of waiting for a whole batch
+                free = workers * 2 - len(running)
+                job_ids = claim_jobs(free) if free > 0 else []
+                if job_ids:
+                    # Worker processes are forked on demand and must not
+                    # inherit this process's database connections.
+                    connections.close_all()
+                    running.update((pool.submit(run_job, job_id), job_id) for job_id in job_ids)
+
+                if running:
+                    done, _ = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job_id = running.pop(future)
+                        try:
+                            self.stdout.write(f'Report job {job_id}: {future.result()}')
+                        except Exception as e:
+                            self.stderr.write(f'Report job {job_id} crashed: {e}')
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['poll_interval'])
+
+        self.stdout.write(self.style.SUCCESS('Report worker stopped'))
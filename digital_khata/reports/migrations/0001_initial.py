@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('accounts', '0003_rename_pan_vat_businessprofile_tax_id_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPurchaseSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0.0, max_digits=15)),
+                ('tax_amount', models.DecimalField(decimal_places=2, default=0.0, max_digits=15)),
+                ('paid_amount', models.DecimalField(decimal_places=2, default=0.0, max_digits=15)),
+                ('due_amount', models.DecimalField(decimal_places=2, default=0.0, max_digits=15)),
+                ('document_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accounts.businessprofile')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily purchase summaries',
+                'abstract': False,
+                'unique_together': {('business', 'date', 'status')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailySalesSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0.0, max_digits=15)),
+                ('tax_amount', models.DecimalField(decimal_places=2, default=0.0, max_digits=15)),
+                ('paid_amount', models.DecimalField(decimal_places=2, default=0.0, max_digits=15)),
+                ('due_amount', models.DecimalField(decimal_places=2, default=0.0, max_digits=15)),
+                ('document_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accounts.businessprofile')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily sales summaries',
+                'abstract': False,
+                'unique_together': {('business', 'date', 'status')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_report_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reportjob',
+            name='report_type',
+            field=models.CharField(choices=[('sales', 'Sales Report'), ('purchases', 'Purchases Report'), ('inventory', 'Inventory Report'), ('receivables', 'Receivables Aging'), ('payables', 'Payables Aging'), ('sales_csv', 'Sales CSV Export'), ('purchases_csv', 'Purchases CSV Export')], max_length=20),
+        ),
+    ]
@@ -1,3 +1,89 @@
 from django.db import models
+from django.contrib.auth.models import User
+from accounts.models import BusinessProfile
+from inventory.models import Product
 
-# Create your models here.
+class DailySummary(models.Model):
+    """Abstract per-day rollup of documents for a business and status."""
+    business = models.ForeignKey(BusinessProfile, on_delete=models.CASCADE)
+    date = models.DateField()
+    status = models.CharField(max_length=20)
+    total_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
+    tax_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
+    paid_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
+    due_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
+    document_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+        unique_together = ('business', 'date', 'status')
+
+    def __str__(self):
+        return f"{self.business.business_name} - {self.date} ({self.status})"
+
+class DailySalesSummary(DailySummary):
+    """Model holding daily invoice totals, maintained from Invoice signals."""
+
+    class Meta(DailySummary.Meta):
+        verbose_name_plural = "Daily sales summaries"
+
+class DailyPurchaseSummary(DailySummary):
+    """Model holding daily bill totals, maintained from Bill signals."""
+
+    class Meta(DailySummary.Meta):
+        verbose_name_plural = "Daily purchase summaries"
+
+class DailyProductSales(models.Model):
+    """Model holding quantity and revenue sold per product per day, maintained from InvoiceItem signals."""
+    business = models.ForeignKey(BusinessProfile, on_delete=models.CASCADE)
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('business', 'date', 'product')
+        verbose_name_plural = "Daily product sales"
+
+    def __str__(self):
+        return f"{self.product.name} - {self.date}: {self.quantity}"
+
+class ReportJob(models.Model):
+    """Model representing a report computed offline by the report worker."""
+    REPORT_TYPES = [
+        ('sales', 'Sales Report'),
+        ('purchases', 'Purchases Report'),
+        ('inventory', 'Inventory Report'),
+        ('receivables', 'Receivables Aging'),
+        ('payables', 'Payables Aging'),
+        ('sales_csv', 'Sales CSV Export'),
+        ('purchases_csv', 'Purchases CSV Export'),
+    ]
+
+    STATUSES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+        ('expired', 'Expired'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    report_type = models.CharField(max_length=20, choices=REPORT_TYPES)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUSES, default='pending')
+    file = models.FileField(upload_to='reports/', blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self):
+        return f"{self.get_report_type_display()} #{self.pk} ({self.status})"
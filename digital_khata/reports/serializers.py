@@ -0,0 +1,26 @@
+from rest_framework import serializers
+from django.urls import reverse
+from .models import ReportJob
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ReportJob
+        fields = [
+            'id', 'report_type', 'params', 'status', 'error', 'download_url',
+            'created_at', 'started_at', 'finished_at', 'expires_at'
+        ]
+        read_only_fields = [
+            'status', 'error', 'created_at', 'started_at', 'finished_at', 'expires_at'
+        ]
+        
+    def get_download_url(self, obj):
+        if obj.status != 'completed':
+            return None
+        return reverse('reports:report-job-download', args=[obj.pk])
+        
+    def validate_params(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError('params must be an object of query parameters')
+        return value
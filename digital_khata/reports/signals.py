@@ -0,0 +1,118 @@
+"""
+Signal handlers keeping the daily rollup tables and report cache in step with
+the documents they are computed from.
+"""
+
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from accounts.models import BusinessProfile, Expense
+from accounting.models import Ledger
+from inventory.models import Product
+from sales.models import Invoice, InvoiceItem
+from purchases.models import Bill
+from utils.previous import previous_row
+from .cache import bump_version, forget_business_ids
+from .summaries import (
+    SUMMARY_MODELS, AMOUNT_FIELDS, KEY_FIELDS, apply_document, document_values,
+    apply_product_sales, move_invoice_product_sales
+)
+
+
+@receiver(pre_save, sender=Invoice)
+@receiver(pre_save, sender=Bill)
+def remember_previous_totals(sender, instance, **kwargs):
+    """Store the saved state of a document so post_save can remove it."""
+    instance._summary_previous = previous_row(instance, [*KEY_FIELDS, *AMOUNT_FIELDS])
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_save, sender=Bill)
+def update_summary_on_save(sender, instance, **kwargs):
+    """Move the document's totals from its previous bucket to its current one."""
+    summary_model = SUMMARY_MODELS[sender]
+    previous = getattr(instance, '_summary_previous', None)
+    if previous:
+        apply_document(summary_model, previous, sign=-1)
+    apply_document(summary_model, document_values(instance), sign=1)
+
+    if sender is Invoice and previous:
+        old_key = (previous['business_id'], previous['date'])
+        new_key = (instance.business_id, instance.date)
+        if old_key != new_key:
+            move_invoice_product_sales(instance.pk, old_key, new_key)
+
+
+@receiver(post_delete, sender=Invoice)
+@receiver(post_delete, sender=Bill)
+def update_summary_on_delete(sender, instance, **kwargs):
+    """Remove a deleted document's totals from its bucket."""
+    apply_document(SUMMARY_MODELS[sender], document_values(instance), sign=-1)
+
+
+def invoice_key(invoice_id, item=None):
+    """Return the (business_id, date) of an invoice, or None if it is gone."""
+    if item is not None and InvoiceItem.invoice.is_cached(item):
+        return (item.invoice.business_id, item.invoice.date)
+    row = Invoice.objects.filter(pk=invoice_id).values('business_id', 'date').first()
+    return (row['business_id'], row['date']) if row else None
+
+
+@receiver(pre_save, sender=InvoiceItem)
+def remember_previous_item(sender, instance, **kwargs):
+    """Store the saved state of an invoice item so post_save can remove it."""
+    instance._sales_previous = None
+    if instance.pk:
+        instance._sales_previous = (
+            sender.objects.filter(pk=instance.pk)
+            .values('invoice_id', 'product_id', 'quantity', 'total_price')
+            .first()
+        )
+
+
+@receiver(post_save, sender=InvoiceItem)
+def update_product_sales_on_save(sender, instance, **kwargs):
+    """Replace an item's previous contribution to the product sales rollup."""
+    key = invoice_key(instance.invoice_id, instance)
+    previous = getattr(instance, '_sales_previous', None)
+    if previous:
+        if previous['invoice_id'] == instance.invoice_id:
+            old_key = key
+        else:
+            old_key = invoice_key(previous['invoice_id'])
+        if old_key:
+            apply_product_sales(
+                *old_key, previous['product_id'], previous['quantity'], previous['total_price'], sign=-1
+            )
+    apply_product_sales(*key, instance.product_id, instance.quantity, instance.total_price, sign=1)
+    bump_version(key[0])
+
+
+@receiver(post_delete, sender=InvoiceItem)
+def update_product_sales_on_delete(sender, instance, **kwargs):
+    """Remove a deleted item from the product sales rollup."""
+    key = invoice_key(instance.invoice_id, instance)
+    if key:
+        apply_product_sales(*key, instance.product_id, instance.quantity, instance.total_price, sign=-1)
+        bump_version(key[0])
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+@receiver(post_save, sender=Bill)
+@receiver(post_delete, sender=Bill)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Expense)
+@receiver(post_delete, sender=Expense)
+@receiver(post_save, sender=Ledger)
+@receiver(post_delete, sender=Ledger)
+def invalidate_report_cache(sender, instance, **kwargs):
+    """Invalidate the cached reports of the business that owns a changed row."""
+    bump_version(instance.business_id)
+
+
+@receiver(post_save, sender=BusinessProfile)
+@receiver(post_delete, sender=BusinessProfile)
+def invalidate_business_ids(sender, instance, **kwargs):
+    """Refresh the cached business ids and reports of the profile's owner."""
+    forget_business_ids(instance.user_id)
+    bump_version(instance.pk)
@@ -0,0 +1,243 @@
+"""
+Maintenance of the daily sales, purchase and product sales rollup tables.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Sum, Count, F, Q, Case, When, Value
+from sales.models import Invoice, InvoiceItem
+from purchases.models import Bill
+from .models import DailySalesSummary, DailyPurchaseSummary, DailyProductSales
+
+# Source document model -> rollup model
+SUMMARY_MODELS = {
+    Invoice: DailySalesSummary,
+    Bill: DailyPurchaseSummary,
+}
+
+AMOUNT_FIELDS = ['total_amount', 'tax_amount', 'paid_amount', 'due_amount']
+KEY_FIELDS = ['business_id', 'date', 'status']
+
+
+def document_values(document):
+    """Return the rollup key and amounts of an Invoice or Bill instance."""
+    values = {field: getattr(document, field) for field in KEY_FIELDS}
+    for field in AMOUNT_FIELDS:
+        values[field] = Decimal(str(getattr(document, field) or 0))
+    return values
+
+
+def apply_document(summary_model, values, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) one document from its daily bucket.
+
+    Args:
+        summary_model (Model): DailySalesSummary or DailyPurchaseSummary.
+        values (dict): Key and amount values as returned by document_values.
+        sign (int): 1 to add the document, -1 to remove it.
+    """
+    key = {field: values[field] for field in KEY_FIELDS}
+    if sign > 0:
+        summary_model.objects.get_or_create(**key)
+    updates = {
+        field: F(field) + sign * values[field] for field in AMOUNT_FIELDS
+    }
+    updates['document_count'] = F('document_count') + sign
+    summary_model.objects.filter(**key).update(**updates)
+
+
+def add_to_rollups(rollup_model, key_fields, deltas):
+    """
+    Add amounts to many rollup rows in a fixed number of queries.
+
+    Missing rows are created first; every row is then moved with a single
+    UPDATE whose CASE picks each row's increment.
+
+    Args:
+        rollup_model (Model): The rollup table.
+        key_fields (list): Fields identifying a row, such as business_id and date.
+        deltas (dict): Key tuple -> {field: amount to add}.
+    """
+    if not deltas:
+        return
+    rollup_model.objects.bulk_create(
+        [rollup_model(**dict(zip(key_fields, key))) for key in deltas], ignore_conflicts=True
+    )
+    keys = Q()
+    for key in deltas:
+        keys |= Q(**dict(zip(key_fields, key)))
+    row_ids = {
+        tuple(row[:-1]): row[-1]
+        for row in rollup_model.objects.filter(keys).values_list(*key_fields, 'pk')
+    }
+
+    fields = {field for amounts in deltas.values() for field in amounts}
+    rollup_model.objects.filter(pk__in=row_ids.values()).update(**{
+        field: F(field) + Case(
+            *[
+                When(pk=row_ids[key], then=Value(amounts.get(field, 0)))
+                for key, amounts in deltas.items() if key in row_ids
+            ],
+            default=Value(0),
+            output_field=rollup_model._meta.get_field(field)
+        )
+        for field in fields
+    })
+
+
+def apply_documents(summary_model, documents):
+    """
+    Add many new Invoice or Bill instances to their daily buckets at once.
+
+    Used by bulk writes that skip the post_save signals.
+    """
+    deltas = defaultdict(lambda: defaultdict(Decimal))
+    for document in documents:
+        values = document_values(document)
+        amounts = deltas[tuple(values[field] for field in KEY_FIELDS)]
+        for field in AMOUNT_FIELDS:
+            amounts[field] += values[field]
+        amounts['document_count'] += 1
+    add_to_rollups(summary_model, KEY_FIELDS, deltas)
+
+
+def apply_items_product_sales(items):
+    """
+    Add many new invoice items to the product sales rollup at once.
+
+    Items must have their invoice attached. Used by bulk writes that skip the
+    post_save signals.
+    """
+    deltas = defaultdict(lambda: {'quantity': 0, 'revenue': Decimal('0')})
+    for item in items:
+        amounts = deltas[(item.invoice.business_id, item.invoice.date, item.product_id)]
+        amounts['quantity'] += item.quantity
+        amounts['revenue'] += Decimal(str(item.total_price or 0))
+    add_to_rollups(DailyProductSales, ['business_id', 'date', 'product_id'], deltas)
+
+
+def rebuild_summaries(document_model, business_ids=None, batch_size=1000):
+    """
+    Recompute a rollup table from scratch with one grouped query.
+
+    Args:
+        document_model (Model): Invoice or Bill.
+        business_ids (list): Limit the rebuild to these businesses.
+        batch_size (int): Number of rollup rows inserted per query.
+
+    Returns:
+        int: Number of rollup rows written.
+    """
+    summary_model = SUMMARY_MODELS[document_model]
+    documents = document_model.objects.all()
+    summaries = summary_model.objects.all()
+    if business_ids:
+        documents = documents.filter(business_id__in=business_ids)
+        summaries = summaries.filter(business_id__in=business_ids)
+
+    rows = (
+        documents.order_by()
+        .values('business_id', 'date', 'status')
+        .annotate(
+            total=Sum('total_amount'),
+            tax=Sum('tax_amount'),
+            paid=Sum('paid_amount'),
+            due=Sum('due_amount'),
+            count=Count('id')
+        )
+    )
+
+    with transaction.atomic():
+        summaries.delete()
+        created = summary_model.objects.bulk_create(
+            (
+                summary_model(
+                    business_id=row['business_id'],
+                    date=row['date'],
+                    status=row['status'],
+                    total_amount=row['total'] or 0,
+                    tax_amount=row['tax'] or 0,
+                    paid_amount=row['paid'] or 0,
+                    due_amount=row['due'] or 0,
+                    document_count=row['count']
+                )
+                for row in rows
+            ),
+            batch_size=batch_size
+        )
+    return len(created)
+
+
+def apply_product_sales(business_id, day, product_id, quantity, revenue, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) sold quantity and revenue for a product's day.
+
+    Args:
+        business_id (int): Business of the invoice.
+        day (date): Date of the invoice.
+        product_id (int): Product sold.
+        quantity (int): Units sold.
+        revenue (Decimal): Line total.
+        sign (int): 1 to add the sale, -1 to remove it.
+    """
+    key = {'business_id': business_id, 'date': day, 'product_id': product_id}
+    if sign > 0:
+        DailyProductSales.objects.get_or_create(**key)
+    DailyProductSales.objects.filter(**key).update(
+        quantity=F('quantity') + sign * quantity,
+        revenue=F('revenue') + sign * Decimal(str(revenue or 0))
+    )
+
+
+def move_invoice_product_sales(invoice_id, old_key, new_key):
+    """
+    Move all product sales of an invoice from one (business_id, date) to another.
+
+    Used when an invoice's date or business changes after its items were saved.
+    """
+    rows = (
+        InvoiceItem.objects.filter(invoice_id=invoice_id).order_by()
+        .values('product_id')
+        .annotate(quantity=Sum('quantity'), revenue=Sum('total_price'))
+    )
+    for row in rows:
+        apply_product_sales(*old_key, row['product_id'], row['quantity'], row['revenue'], sign=-1)
+        apply_product_sales(*new_key, row['product_id'], row['quantity'], row['revenue'], sign=1)
+
+
+def rebuild_product_sales(business_ids=None, batch_size=1000):
+    """
+    Recompute the product sales rollup from invoice items with one grouped query.
+
+    Returns:
+        int: Number of rollup rows written.
+    """
+    items = InvoiceItem.objects.all()
+    summaries = DailyProductSales.objects.all()
+    if business_ids:
+        items = items.filter(invoice__business_id__in=business_ids)
+        summaries = summaries.filter(business_id__in=business_ids)
+
+    rows = (
+        items.order_by()
+        .values('invoice__business_id', 'invoice__date', 'product_id')
+        .annotate(quantity=Sum('quantity'), revenue=Sum('total_price'))
+    )
+
+    with transaction.atomic():
+        summaries.delete()
+        created = DailyProductSales.objects.bulk_create(
+            (
+                DailyProductSales(
+                    business_id=row['invoice__business_id'],
+                    date=row['invoice__date'],
+                    product_id=row['product_id'],
+                    quantity=row['quantity'] or 0,
+                    revenue=row['revenue'] or 0
+                )
+                for row in rows
+            ),
+            batch_size=batch_size
+        )
+    return len(created)
@@ -0,0 +1,72 @@
+"""
+Time-series helpers for report chart data.
+"""
+
+from datetime import date, timedelta
+from django.db.models import Sum
+from django.db.models.functions import TruncDay, TruncWeek, TruncMonth, TruncQuarter
+
+GRANULARITIES = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+    'quarter': TruncQuarter,
+}
+
+
+def period_start(value, granularity):
+    """Return the first day of the period that contains the given date."""
+    if granularity == 'week':
+        return value - timedelta(days=value.weekday())
+    if granularity == 'month':
+        return value.replace(day=1)
+    if granularity == 'quarter':
+        return date(value.year, 3 * ((value.month - 1) // 3) + 1, 1)
+    return value
+
+
+def next_period(value, granularity):
+    """Return the first day of the period following the given period start."""
+    if granularity == 'day':
+        return value + timedelta(days=1)
+    if granularity == 'week':
+        return value + timedelta(days=7)
+    months = 3 if granularity == 'quarter' else 1
+    month = value.month - 1 + months
+    return date(value.year + month // 12, month % 12 + 1, 1)
+
+
+def build_time_series(queryset, start_date, end_date, granularity='day',
+                      date_field='date', value_field='total_amount'):
+    """
+    Build gap-filled chart data for a queryset with a single grouped query.
+
+    Args:
+        queryset (QuerySet): Rows already filtered to the wanted range.
+        start_date (date): First day of the range.
+        end_date (date): Last day of the range.
+        granularity (str): One of 'day', 'week', 'month' or 'quarter'.
+        date_field (str): Name of the date field to bucket on.
+        value_field (str): Name of the field to sum per bucket.
+
+    Returns:
+        list: One {'date', 'amount'} dict per period, including empty ones.
+    """
+    trunc = GRANULARITIES[granularity]
+    rows = (
+        queryset.order_by()
+        .annotate(period=trunc(date_field))
+        .values('period')
+        .annotate(amount=Sum(value_field))
+    )
+    totals = {row['period']: row['amount'] for row in rows}
+
+    chart_data = []
+    current = period_start(start_date, granularity)
+    while current <= end_date:
+        chart_data.append({
+            'date': current.strftime('%Y-%m-%d'),
+            'amount': float(totals.get(current) or 0)
+        })
+        current = next_period(current, granularity)
+    return chart_data
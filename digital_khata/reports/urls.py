@@ -14,4 +14,9 @@ urlpatterns = [
     path('api/sales/', views.sales_report_data, name='sales-report-data'),
     path('api/purchases/', views.purchases_report_data, name='purchases-report-data'),
     path('api/inventory/', views.inventory_report_data, name='inventory-report-data'),
+    path('api/aging/receivables/', views.receivables_aging_data, name='receivables-aging-data'),
+    path('api/aging/payables/', views.payables_aging_data, name='payables-aging-data'),
+    path('api/jobs/', views.ReportJobListCreateAPIView.as_view(), name='report-job-list-create'),
+    path('api/jobs/<int:pk>/', views.ReportJobRetrieveAPIView.as_view(), name='report-job-detail'),
+    path('api/jobs/<int:pk>/download/', views.report_job_download, name='report-job-download'),
 ]
\ No newline at end of file
@@ -1,61 +1,118 @@
-from django.shortcuts import render
+from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from sales.models import Invoice
 from purchases.models import Bill
 from inventory.models import Product
-from django.db.models import Sum, Count, Q
-from datetime import datetime, timedelta
-import csv
-from django.http import HttpResponse
+from django.db.models import (
+    Sum, Count, Q, F, Case, When, Value, CharField, DecimalField, ExpressionWrapper
+)
+from datetime import datetime
+from django.http import FileResponse
+from django.utils import timezone
+from rest_framework import generics
+from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from .aging import aging_report
+from .cache import cache_report, get_business_ids
+from .exports import filter_documents, stream_csv, wants_gzip
+from .jobs import artifact_name
+from .models import DailySalesSummary, DailyPurchaseSummary, ReportJob
+from .serializers import ReportJobSerializer
+from .timeseries import GRANULARITIES, build_time_series
 
+REPORT_PAGE_SIZE = 50
+MAX_REPORT_PAGE_SIZE = 500
+
+
+def get_page_params(request):
+    """Return the (page, page_size) requested, clamped to sane bounds."""
+    page = max(int(request.GET.get('page', 1)), 1)
+    page_size = int(request.GET.get('page_size', REPORT_PAGE_SIZE))
+    return page, min(max(page_size, 1), MAX_REPORT_PAGE_SIZE)
+
+
+# Report job API
+class ReportJobListCreateAPIView(generics.ListCreateAPIView):
+    serializer_class = ReportJobSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return ReportJob.objects.filter(user=self.request.user)
+    
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+class ReportJobRetrieveAPIView(generics.RetrieveAPIView):
+    serializer_class = ReportJobSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return ReportJob.objects.filter(user=self.request.user)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def report_job_download(request, pk):
+    job = get_object_or_404(ReportJob, pk=pk, user=request.user)
+    
+    if job.status == 'expired' or (job.expires_at and job.expires_at <= timezone.now()):
+        return Response({'error': 'This report has expired'}, status=status.HTTP_410_GONE)
+    if job.status != 'completed':
+        return Response(
+            {'error': f'Report is not ready (status: {job.status})'},
+            status=status.HTTP_409_CONFLICT
+        )
+    
+    return FileResponse(job.file.open('rb'), as_attachment=True, filename=artifact_name(job))
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_report('sales')
 def sales_report_data(request):
-    invoices = Invoice.objects.filter(user=request.user)
+    summaries = DailySalesSummary.objects.filter(business__user=request.user)
     
     # Date filters
     start_date = request.GET.get('start_date')
     end_date = request.GET.get('end_date')
+    granularity = request.GET.get('granularity', 'day')
     
-    if start_date and end_date:
-        invoices = invoices.filter(date__range=[start_date, end_date])
-    
-    # Calculate totals
-    total_sales = float(invoices.aggregate(Sum('total_amount'))['total_amount__sum'] or 0)
-    total_tax = float(invoices.aggregate(Sum('tax_amount'))['tax_amount__sum'] or 0)
-    invoice_count = invoices.count()
-    
-    # Group by status
-    paid_invoices = invoices.filter(status='paid').count()
-    unpaid_invoices = invoices.filter(status='unpaid').count()
+    if granularity not in GRANULARITIES:
+        return Response(
+            {'error': f"Invalid granularity '{granularity}'. Choose from: {', '.join(GRANULARITIES)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     
-    # Group by date for chart data
+    if start_date and end_date:
+        summaries = summaries.filter(date__range=[start_date, end_date])
+    
+    # Calculate totals and status counts from the daily summaries
+    totals = summaries.aggregate(
+        total_sales=Sum('total_amount'),
+        total_tax=Sum('tax_amount'),
+        invoice_count=Sum('document_count'),
+        paid_invoices=Sum('document_count', filter=Q(status='paid')),
+        unpaid_invoices=Sum('document_count', filter=Q(status='unpaid')),
+    )
+    
+    # Group by period for chart data
     chart_data = []
     if start_date and end_date:
-        # Create date range
-        current_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-        end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
-        
-        while current_date <= end_date_obj:
-            daily_invoices = invoices.filter(date=current_date)
-            daily_total = float(daily_invoices.aggregate(Sum('total_amount'))['total_amount__sum'] or 0)
-            chart_data.append({
-                'date': current_date.strftime('%Y-%m-%d'),
-                'amount': daily_total
-            })
-            current_date += timedelta(days=1)
+        chart_data = build_time_series(
+            summaries,
+            datetime.strptime(start_date, '%Y-%m-%d').date(),
+            datetime.strptime(end_date, '%Y-%m-%d').date(),
+            granularity
+        )
     
     data = {
-        'total_sales': total_sales,
-        'total_tax': total_tax,
-        'invoice_count': invoice_count,
-        'paid_invoices': paid_invoices,
-        'unpaid_invoices': unpaid_invoices,
+        'total_sales': float(totals['total_sales'] or 0),
+        'total_tax': float(totals['total_tax'] or 0),
+        'invoice_count': totals['invoice_count'] or 0,
+        'paid_invoices': totals['paid_invoices'] or 0,
+        'unpaid_invoices': totals['unpaid_invoices'] or 0,
         'chart_data': chart_data,
+        'granularity': granularity,
         'start_date': start_date,
         'end_date': end_date,
     }
@@ -64,48 +121,51 @@ def sales_report_data(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_report('purchases')
 def purchases_report_data(request):
-    bills = Bill.objects.filter(user=request.user)
+    summaries = DailyPurchaseSummary.objects.filter(business__user=request.user)
     
     # Date filters
     start_date = request.GET.get('start_date')
     end_date = request.GET.get('end_date')
+    granularity = request.GET.get('granularity', 'day')
     
-    if start_date and end_date:
-        bills = bills.filter(date__range=[start_date, end_date])
-    
-    # Calculate totals
-    total_purchases = float(bills.aggregate(Sum('total_amount'))['total_amount__sum'] or 0)
-    total_tax = float(bills.aggregate(Sum('tax_amount'))['tax_amount__sum'] or 0)
-    bill_count = bills.count()
-    
-    # Group by status
-    paid_bills = bills.filter(status='paid').count()
-    unpaid_bills = bills.filter(status='unpaid').count()
+    if granularity not in GRANULARITIES:
+        return Response(
+            {'error': f"Invalid granularity '{granularity}'. Choose from: {', '.join(GRANULARITIES)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     
-    # Group by date for chart data
+    if start_date and end_date:
+        summaries = summaries.filter(date__range=[start_date, end_date])
+    
+    # Calculate totals and status counts from the daily summaries
+    totals = summaries.aggregate(
+        total_purchases=Sum('total_amount'),
+        total_tax=Sum('tax_amount'),
+        bill_count=Sum('document_count'),
+        paid_bills=Sum('document_count', filter=Q(status='paid')),
+        unpaid_bills=Sum('document_count', filter=Q(status='unpaid')),
+    )
+    
+    # Group by period for chart data
     chart_data = []
     if start_date and end_date:
-        # Create date range
-        current_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-        end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
-        
-        while current_date <= end_date_obj:
-            daily_bills = bills.filter(date=current_date)
-            daily_total = float(daily_bills.aggregate(Sum('total_amount'))['total_amount__sum'] or 0)
-            chart_data.append({
-                'date': current_date.strftime('%Y-%m-%d'),
-                'amount': daily_total
-            })
-            current_date += timedelta(days=1)
+        chart_data = build_time_series(
+            summaries,
+            datetime.strptime(start_date, '%Y-%m-%d').date(),
+            datetime.strptime(end_date, '%Y-%m-%d').date(),
+            granularity
+        )
     
     data = {
-        'total_purchases': total_purchases,
-        'total_tax': total_tax,
-        'bill_count': bill_count,
-        'paid_bills': paid_bills,
-        'unpaid_bills': unpaid_bills,
+        'total_purchases': float(totals['total_purchases'] or 0),
+        'total_tax': float(totals['total_tax'] or 0),
+        'bill_count': totals['bill_count'] or 0,
+        'paid_bills': totals['paid_bills'] or 0,
+        'unpaid_bills': totals['unpaid_bills'] or 0,
         'chart_data': chart_data,
+        'granularity': granularity,
         'start_date': start_date,
         'end_date': end_date,
     }
@@ -114,6 +174,7 @@ def purchases_report_data(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_report('inventory')
 def inventory_report_data(request):
     products = Product.objects.filter(user=request.user)
     
@@ -128,36 +189,97 @@ def inventory_report_data(request):
     # Low stock filter
     low_stock = request.GET.get('low_stock')
     if low_stock:
-        products = products.filter(stock_quantity__lte=10)
+        products = products.filter(stock_quantity__lte=F('low_stock_threshold'))
+    
+    # Pagination
+    try:
+        page, page_size = get_page_params(request)
+    except ValueError:
+        return Response(
+            {'error': 'page and page_size must be integers'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     
-    # Calculate inventory value
-    total_inventory_value = sum([float(p.price) * p.stock_quantity for p in products])
+    # Calculate inventory value and stock counts in one query
+    stock_value = ExpressionWrapper(
+        F('price') * F('stock_quantity'),
+        output_field=DecimalField(max_digits=20, decimal_places=2)
+    )
+    totals = products.aggregate(
+        total_inventory_value=Sum(stock_value),
+        product_count=Count('id'),
+        low_stock_count=Count('id', filter=Q(stock_quantity__lte=F('low_stock_threshold'))),
+        out_of_stock_count=Count('id', filter=Q(stock_quantity=0)),
+    )
+    
+    # Prepare product data for the requested page
+    offset = (page - 1) * page_size
+    product_rows = products.annotate(
+        total_value=stock_value,
+        stock_status=Case(
+            When(stock_quantity=0, then=Value('out_of_stock')),
+            When(stock_quantity__lte=F('low_stock_threshold'), then=Value('low_stock')),
+            default=Value('in_stock'),
+            output_field=CharField()
+        )
+    ).order_by('name', 'id').values(
+        'id', 'name', 'sku', 'price', 'stock_quantity',
+        'low_stock_threshold', 'stock_status', 'total_value'
+    )[offset:offset + page_size]
     
-    # Prepare product data
     product_data = []
-    for product in products:
-        product_data.append({
-            'id': product.id,
-            'name': product.name,
-            'sku': product.sku,
-            'price': float(product.price),
-            'stock_quantity': product.stock_quantity,
-            'low_stock_threshold': product.low_stock_threshold,
-            'stock_status': product.get_stock_status(),
-            'total_value': float(product.price) * product.stock_quantity
-        })
+    for row in product_rows:
+        row['price'] = float(row['price'])
+        row['total_value'] = float(row['total_value'])
+        product_data.append(row)
     
+    product_count = totals['product_count']
     data = {
         'products': product_data,
-        'total_inventory_value': total_inventory_value,
-        'product_count': products.count(),
-        'low_stock_count': products.filter(stock_quantity__lte=10).count(),
-        'out_of_stock_count': products.filter(stock_quantity=0).count(),
+        'total_inventory_value': float(totals['total_inventory_value'] or 0),
+        'product_count': product_count,
+        'low_stock_count': totals['low_stock_count'],
+        'out_of_stock_count': totals['out_of_stock_count'],
         'search_query': search_query,
+        'page': page,
+        'page_size': page_size,
+        'num_pages': max((product_count + page_size - 1) // page_size, 1),
     }
     
     return Response(data)
 
+def aging_response(request, documents, party_field):
+    """Build an aging API response for invoices or bills."""
+    try:
+        page, page_size = get_page_params(request)
+        as_of = request.GET.get('as_of')
+        as_of = datetime.strptime(as_of, '%Y-%m-%d').date() if as_of else timezone.localdate()
+    except ValueError:
+        return Response(
+            {'error': 'as_of must be YYYY-MM-DD and page/page_size integers'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    data = aging_report(documents, party_field, as_of, (page - 1) * page_size, page_size)
+    data['page'] = page
+    data['page_size'] = page_size
+    data['num_pages'] = max((data['party_count'] + page_size - 1) // page_size, 1)
+    return Response(data)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cache_report('receivables')
+def receivables_aging_data(request):
+    invoices = Invoice.objects.filter(business_id__in=get_business_ids(request.user))
+    return aging_response(request, invoices, 'customer')
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cache_report('payables')
+def payables_aging_data(request):
+    bills = Bill.objects.filter(business_id__in=get_business_ids(request.user))
+    return aging_response(request, bills, 'supplier')
+
 @login_required
 def sales_report(request):
     invoices = Invoice.objects.filter(user=request.user)
@@ -254,42 +376,30 @@ def inventory_report(request):
 
 @login_required
 def export_sales_csv(request):
-    # Create the HttpResponse object with CSV header
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="sales_report.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow(['Invoice Number', 'Customer', 'Date', 'Total Amount', 'Status'])
-    
-    invoices = Invoice.objects.filter(user=request.user)
-    for invoice in invoices:
-        writer.writerow([
-            invoice.invoice_number,
-            invoice.customer.name,
-            invoice.date,
-            invoice.total_amount,
-            invoice.status
-        ])
-    
-    return response
+    invoices = filter_documents(
+        Invoice.objects.filter(user=request.user).order_by('date', 'id'),
+        request.GET
+    )
+    
+    return stream_csv(
+        ['Invoice Number', 'Customer', 'Date', 'Total Amount', 'Status'],
+        invoices,
+        ['invoice_number', 'customer__name', 'date', 'total_amount', 'status'],
+        'sales_report',
+        compress=wants_gzip(request)
+    )
 
 @login_required
 def export_purchases_csv(request):
-    # Create the HttpResponse object with CSV header
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="purchases_report.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow(['Bill Number', 'Supplier', 'Date', 'Total Amount', 'Status'])
-    
-    bills = Bill.objects.filter(user=request.user)
-    for bill in bills:
-        writer.writerow([
-            bill.bill_number,
-            bill.supplier.name,
-            bill.date,
-            bill.total_amount,
-            bill.status
-        ])
-    
-    return response
\ No newline at end of file
+    bills = filter_documents(
+        Bill.objects.filter(user=request.user).order_by('date', 'id'),
+        request.GET
+    )
+    
+    return stream_csv(
+        ['Bill Number', 'Supplier', 'Date', 'Total Amount', 'Status'],
+        bills,
+        ['bill_number', 'supplier__name', 'date', 'total_amount', 'status'],
+        'purchases_report',
+        compress=wants_gzip(request)
+    )
@@ -0,0 +1,255 @@
+"""
+Batch creation of invoices synced from point-of-sale terminals.
+
+A batch is validated with one lookup each for customers, products and taken
+invoice numbers, then written with bulk_create in one transaction. The stock
+levels, daily rollups, journal postings, report caches and dashboard events
+that signals keep up for single invoices are updated explicitly, each with a
+few set-based queries.
+"""
+
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from accounts.models import Customer
+from accounts.sequences import fiscal_year, sequences
+from accounting.locks import period_locks
+from accounting.posting import post_documents
+from dashboard.signals import publish_invoice_event
+from inventory.models import Product
+from inventory.stock import apply_movements, item_movements
+from reports.cache import bump_version
+from reports.models import DailySalesSummary
+from reports.summaries import apply_documents, apply_items_product_sales
+from .models import Invoice, InvoiceItem
+
+MAX_BATCH_INVOICES = 1000
+
+INVOICE_STATUSES = [status for status, label in Invoice._meta.get_field('status').choices]
+
+CENT = Decimal('0.01')
+
+
+def _id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _decimal(value, default):
+    if value in (None, ''):
+        return default
+    amount = Decimal(str(value))
+    if not amount.is_finite() or amount < 0:
+        raise InvalidOperation
+    return amount
+
+
+def build_invoice(data, user, business_id, customers, products, stock, is_locked):
+    """
+    Validate one synced invoice and build its unsaved rows.
+
+    Args:
+        data (dict): customer, date, optional invoice_number, status and
+            paid_amount, and items with product, quantity and optional
+            unit_price and tax_rate.
+        user (User): The syncing user.
+        business_id (int): The business the invoice belongs to.
+        customers (dict): Customer id -> Customer of the user.
+        products (dict): Product id -> Product of the business.
+        stock (dict): Product id -> units still available to this batch.
+        is_locked (callable): Closed-period check of the batch, from
+            accounting.locks.period_locks.
+
+    Returns:
+        tuple: (errors, invoice, items, units sold per product id).
+    """
+    errors = []
+    invoice_number = str(data.get('invoice_number') or '').strip()
+    if len(invoice_number) > Invoice._meta.get_field('invoice_number').max_length:
+        errors.append('invoice_number is too long')
+
+    customer = customers.get(_id(data.get('customer')))
+    if customer is None:
+        errors.append('unknown customer')
+
+    try:
+        day = date.fromisoformat(str(data.get('date') or ''))
+    except ValueError:
+        day = None
+        errors.append('date must be YYYY-MM-DD')
+    if day and is_locked(business_id, day):
+        errors.append(f'the accounting period containing {day} is closed')
+
+    status = data.get('status') or 'draft'
+    if status not in INVOICE_STATUSES:
+        errors.append(f'status must be one of {", ".join(INVOICE_STATUSES)}')
+
+    try:
+        paid_amount = _decimal(data.get('paid_amount'), Decimal('0'))
+    except (InvalidOperation, ValueError):
+        paid_amount = Decimal('0')
+        errors.append('paid_amount must be a positive amount')
+
+    items_data = data.get('items')
+    if not isinstance(items_data, list) or not items_data:
+        errors.append('an invoice needs at least one item')
+        items_data = []
+
+    items = []
+    sold = defaultdict(int)
+    for number, item_data in enumerate(items_data, start=1):
+        if not isinstance(item_data, dict):
+            errors.append(f'item {number} must be an object')
+            continue
+        product = products.get(_id(item_data.get('product')))
+        quantity = _id(item_data.get('quantity'))
+        if product is None:
+            errors.append(f'item {number}: unknown product')
+            continue
+        if quantity is None or quantity < 1:
+            errors.append(f'item {number}: quantity must be a positive whole number')
+            continue
+        try:
+            unit_price = _decimal(item_data.get('unit_price'), product.price)
+            tax_rate = _decimal(item_data.get('tax_rate'), product.tax_rate)
+        except (InvalidOperation, ValueError):
+            errors.append(f'item {number}: unit_price and tax_rate must be positive amounts')
+            continue
+
+        amount = (unit_price * quantity).quantize(CENT)
+        tax_amount = (amount * tax_rate / 100).quantize(CENT)
+        items.append(InvoiceItem(
+            product=product,
+            quantity=quantity,
+            unit_price=unit_price,
+            tax_rate=tax_rate,
+            tax_amount=tax_amount,
+            total_price=amount + tax_amount
+        ))
+        sold[product.pk] += quantity
+
+    for product_id, quantity in sold.items():
+        if quantity > stock[product_id]:
+            errors.append(f'insufficient stock of {products[product_id].name}')
+
+    if errors:
+        return errors, None, [], {}
+
+    subtotal = sum((item.total_price - item.tax_amount for item in items), Decimal('0'))
+    tax_amount = sum((item.tax_amount for item in items), Decimal('0'))
+    total_amount = subtotal + tax_amount
+    invoice = Invoice(
+        user=user,
+        business_id=business_id,
+        customer=customer,
+        date=day,
+        invoice_number=invoice_number,
+        subtotal=subtotal,
+        tax_amount=tax_amount,
+        total_amount=total_amount,
+        paid_amount=paid_amount,
+        due_amount=total_amount - paid_amount,
+        status=status
+    )
+    return [], invoice, items, sold
+
+
+def create_invoices(user, business_id, invoices_data):
+    """
+    Validate and create a batch of invoices.
+
+    Invalid invoices are reported and skipped; the valid ones are numbered
+    from the business's invoice series unless they carry a number, and saved
+    together, with their stock decrements applied per product in one update
+    and recorded as stock movements.
+
+    Args:
+        user (User): The syncing user.
+        business_id (int): The business the invoices belong to.
+        invoices_data (list): Invoice dicts as accepted by build_invoice.
+
+    Returns:
+        list: One result per invoice, in order: index, invoice_number and
+            either the new invoice's id or its errors.
+    """
+    customer_ids = {_id(data.get('customer')) for data in invoices_data} - {None}
+    product_ids = {
+        _id(item.get('product'))
+        for data in invoices_data if isinstance(data.get('items'), list)
+        for item in data['items'] if isinstance(item, dict)
+    } - {None}
+    customers = Customer.objects.filter(user=user).in_bulk(customer_ids)
+    products = Product.objects.filter(business_id=business_id).in_bulk(product_ids)
+    taken = set(
+        Invoice.objects.filter(
+            invoice_number__in=[str(data.get('invoice_number') or '').strip() for data in invoices_data]
+        ).values_list('invoice_number', flat=True)
+    )
+    stock = {product_id: product.stock_quantity for product_id, product in products.items()}
+
+    is_locked = period_locks()
+    results = []
+    created = []
+    for index, data in enumerate(invoices_data):
+        if not isinstance(data, dict):
+            results.append({'index': index, 'invoice_number': None, 'errors': ['an invoice must be an object']})
+            continue
+        errors, invoice, items, sold = build_invoice(data, user, business_id, customers, products, stock, is_locked)
+        invoice_number = str(data.get('invoice_number') or '').strip()
+        if invoice_number and invoice_number in taken:
+            errors = errors + [f'invoice_number {invoice_number} already exists']
+        result = {'index': index, 'invoice_number': invoice_number}
+        results.append(result)
+        if errors:
+            result['errors'] = errors
+            continue
+        taken.add(invoice_number)
+        for product_id, quantity in sold.items():
+            stock[product_id] -= quantity
+        created.append((result, invoice, items))
+
+    if not created:
+        return results
+
+    invoices = [invoice for _, invoice, _ in created]
+    with transaction.atomic():
+        # Invoices sent without a number take the next ones of their fiscal year
+        unnumbered = defaultdict(list)
+        for result, invoice, _ in created:
+            if not invoice.invoice_number:
+                unnumbered[fiscal_year(invoice.date)].append((result, invoice))
+        for pending in unnumbered.values():
+            numbers = sequences.allocate(business_id, 'invoice', len(pending), pending[0][1].date)
+            for (result, invoice), number in zip(pending, numbers):
+                invoice.invoice_number = result['invoice_number'] = number
+
+        Invoice.objects.bulk_create(invoices)
+        items = []
+        for _, invoice, invoice_items in created:
+            for item in invoice_items:
+                item.invoice = invoice
+            items += invoice_items
+        InvoiceItem.objects.bulk_create(items)
+        apply_movements([
+            movement
+            for _, invoice, invoice_items in created
+            for movement in item_movements(invoice_items, -1, 'sale', invoice.invoice_number)
+        ])
+
+        # bulk_create skipped the signals that keep these up for single invoices
+        apply_documents(DailySalesSummary, invoices)
+        apply_items_product_sales(items)
+        post_documents(invoices, created=True)
+
+        def after_commit():
+            for invoice in invoices:
+                publish_invoice_event(Invoice, invoice, created=True)
+            bump_version(business_id)
+        transaction.on_commit(after_commit)
+
+    for result, invoice, _ in created:
+        result['id'] = invoice.pk
+    return results
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_rename_pan_vat_businessprofile_tax_id_and_more'),
+        ('sales', '0002_rename_tax_total_invoice_due_amount_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['business', 'status', 'date'], name='sales_invoi_busines_eee8a6_idx'),
+        ),
+    ]
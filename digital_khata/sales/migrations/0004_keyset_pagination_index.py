@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_document_sequence'),
+        ('sales', '0003_invoice_sales_invoi_busines_eee8a6_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['user', 'date', 'id'], name='sales_invoi_user_id_d37226_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from utils.helpers import generate_invoice_number
 from .models import Invoice, InvoiceItem
 from accounts.models import Customer
 from inventory.models import Product
@@ -25,6 +26,8 @@ class InvoiceSerializer(serializers.ModelSerializer):
             'paid_amount', 'due_amount', 'status', 'items',
             'created_at', 'updated_at'
         ]
+        # Left out, the next number of the business's series is used
+        extra_kwargs = {'invoice_number': {'required': False, 'allow_blank': True}}
         
     def create(self, validated_data):
         items_data = validated_data.pop('items')
@@ -39,6 +42,10 @@ class InvoiceSerializer(serializers.ModelSerializer):
                 validated_data['business'] = business_profile
             except BusinessProfile.DoesNotExist:
                 pass
+        if not validated_data.get('invoice_number'):
+            if 'business' not in validated_data:
+                raise serializers.ValidationError({'invoice_number': 'This field is required.'})
+            validated_data['invoice_number'] = generate_invoice_number(validated_data['business'].id, validated_data['date'])
         
         invoice = Invoice.objects.create(**validated_data)
         
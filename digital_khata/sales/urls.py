@@ -11,5 +11,6 @@ urlpatterns = [
     
     # API endpoints
     path('api/invoices/', views.InvoiceListCreateAPIView.as_view(), name='invoice-list-create'),
+    path('api/invoices/batch/', views.batch_create_invoices, name='invoice-batch-create'),
     path('api/invoices/<int:pk>/', views.InvoiceRetrieveUpdateDestroyAPIView.as_view(), name='invoice-detail'),
 ]
\ No newline at end of file
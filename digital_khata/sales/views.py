@@ -5,21 +5,31 @@ from .models import Invoice, InvoiceItem
 from .forms import InvoiceForm, InvoiceItemForm
 from accounts.models import Customer
 from inventory.models import Product
+from inventory.stock import InsufficientStockError, apply_movements, item_movements
 from django.forms import inlineformset_factory
+from django.db import IntegrityError, transaction
 from django.db.models import Q
 
 from rest_framework import generics, status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from utils.eager_loading import EagerLoadingMixin
 from .serializers import InvoiceSerializer
+from .batch import create_invoices, MAX_BATCH_INVOICES
 from accounts.models import BusinessProfile
+from reports.cache import get_business_ids
+
+
+STOCK_ERROR = 'Not enough stock for these items; nothing was saved.'
+SAVE_ERROR = 'This invoice clashes with one saved in the meantime, such as by its invoice number; nothing was saved.'
 
 
 # API Views
-class InvoiceListCreateAPIView(generics.ListCreateAPIView):
+class InvoiceListCreateAPIView(EagerLoadingMixin, generics.ListCreateAPIView):
     serializer_class = InvoiceSerializer
     permission_classes = [IsAuthenticated]
+    keyset_ordering = ('date', 'id')
     
     def get_queryset(self):
         return Invoice.objects.filter(user=self.request.user)
@@ -35,13 +45,57 @@ class InvoiceListCreateAPIView(generics.ListCreateAPIView):
             except BusinessProfile.DoesNotExist:
                 serializer.save(user=request.user)
 
-class InvoiceRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class InvoiceRetrieveUpdateDestroyAPIView(EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = InvoiceSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
         return Invoice.objects.filter(user=self.request.user)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def batch_create_invoices(request):
+    """
+    Create many invoices in one request, as synced by POS terminals.
+
+    Takes {"invoices": [...]} with customer, date, optional invoice_number,
+    status and paid_amount, and items of product, quantity and optional
+    unit_price and tax_rate; invoices without a number are numbered from the
+    business's invoice series. Returns one result per invoice: its new id, or
+    the errors that kept it from being created.
+    """
+    business_ids = get_business_ids(request.user)
+    if not business_ids:
+        return Response({'error': 'No business profile found'}, status=status.HTTP_400_BAD_REQUEST)
+    business_id = business_ids[0]
+    requested = request.data.get('business') if isinstance(request.data, dict) else None
+    if requested is not None:
+        if not str(requested).isdigit() or int(requested) not in business_ids:
+            return Response({'error': 'Unknown business'}, status=status.HTTP_400_BAD_REQUEST)
+        business_id = int(requested)
+
+    invoices = request.data.get('invoices') if isinstance(request.data, dict) else None
+    if not isinstance(invoices, list) or not invoices:
+        return Response({'error': 'invoices must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(invoices) > MAX_BATCH_INVOICES:
+        return Response(
+            {'error': f'At most {MAX_BATCH_INVOICES} invoices can be created at once'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        results = create_invoices(request.user, business_id, invoices)
+    except IntegrityError:
+        # Another request took an invoice number or stock while this batch was validated
+        return Response(
+            {'error': 'The batch conflicted with concurrent changes; retry it'},
+            status=status.HTTP_409_CONFLICT
+        )
+
+    created = sum(1 for result in results if 'id' in result)
+    response_status = status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+    return Response({'created': created, 'results': results}, status=response_status)
+
 @login_required
 def invoice_list(request):
     invoices = Invoice.objects.filter(user=request.user)
@@ -75,18 +129,29 @@ def invoice_create(request):
         formset = InvoiceItemFormSet(request.POST)
         
         if form.is_valid() and formset.is_valid():
-            invoice = form.save(commit=False)
-            invoice.user = request.user
-            invoice.save()
-            
-            formset.instance = invoice
-            formset.save()
-            
-            # Update product quantities
-            update_product_quantities(invoice, is_sale=True)
-            
-            messages.success(request, 'Invoice created successfully!')
-            return redirect('sales:invoice_list')
+            try:
+                with transaction.atomic():
+                    invoice = form.save(commit=False)
+                    invoice.user = request.user
+                    try:
+                        invoice.business = BusinessProfile.objects.get(user=request.user)
+                    except BusinessProfile.DoesNotExist:
+                        pass
+                    invoice.save()
+
+                    formset.instance = invoice
+                    formset.save()
+
+                    apply_movements(item_movements(
+                        invoice.items.select_related('product'), -1, 'sale', invoice.invoice_number
+                    ))
+            except InsufficientStockError:
+                messages.error(request, STOCK_ERROR)
+            except IntegrityError:
+                form.add_error(None, SAVE_ERROR)
+            else:
+                messages.success(request, 'Invoice created successfully!')
+                return redirect('sales:invoice_list')
     else:
         form = InvoiceForm()
         formset = InvoiceItemFormSet()
@@ -108,18 +173,24 @@ def invoice_update(request, pk):
         formset = InvoiceItemFormSet(request.POST, instance=invoice)
         
         if form.is_valid() and formset.is_valid():
-            # Store old quantities before updating
-            old_items = list(invoice.items.all())
-            
-            form.save()
-            formset.save()
-            
-            # Update product quantities
-            revert_product_quantities(old_items)
-            update_product_quantities(invoice, is_sale=True)
-            
-            messages.success(request, 'Invoice updated successfully!')
-            return redirect('sales:invoice_list')
+            old_items = list(invoice.items.select_related('product'))
+            try:
+                with transaction.atomic():
+                    form.save()
+                    formset.save()
+
+                    # Put the old lines back and take the new ones out in one go
+                    apply_movements(
+                        item_movements(old_items, 1, 'sale_reversal', invoice.invoice_number)
+                        + item_movements(invoice.items.select_related('product'), -1, 'sale', invoice.invoice_number)
+                    )
+            except InsufficientStockError:
+                messages.error(request, STOCK_ERROR)
+            except IntegrityError:
+                form.add_error(None, SAVE_ERROR)
+            else:
+                messages.success(request, 'Invoice updated successfully!')
+                return redirect('sales:invoice_list')
     else:
         form = InvoiceForm(instance=invoice)
         formset = InvoiceItemFormSet(instance=invoice)
@@ -133,26 +204,15 @@ def invoice_update(request, pk):
 def invoice_delete(request, pk):
     invoice = get_object_or_404(Invoice, pk=pk, user=request.user)
     if request.method == 'POST':
-        # Revert product quantities before deleting
-        revert_product_quantities(invoice.items.all())
-        invoice.delete()
-        messages.success(request, 'Invoice deleted successfully!')
+        try:
+            with transaction.atomic():
+                apply_movements(item_movements(
+                    invoice.items.select_related('product'), 1, 'sale_reversal', invoice.invoice_number
+                ))
+                invoice.delete()
+        except InsufficientStockError:
+            messages.error(request, STOCK_ERROR)
+        else:
+            messages.success(request, 'Invoice deleted successfully!')
         return redirect('sales:invoice_list')
     return render(request, 'sales/invoice_confirm_delete.html', {'invoice': invoice})
-
-def update_product_quantities(invoice, is_sale=True):
-    """Update product quantities when invoice is created/updated"""
-    for item in invoice.items.all():
-        product = item.product
-        if is_sale:
-            product.quantity -= item.quantity
-        else:
-            product.quantity += item.quantity
-        product.save()
-
-def revert_product_quantities(items):
-    """Revert product quantities when invoice is deleted/updated"""
-    for item in items:
-        product = item.product
-        product.quantity += item.quantity
-        product.save()
\ No newline at end of file
@@ -124,7 +124,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'utils.pagination.KeysetPagination',
     'PAGE_SIZE': 20
 }
 
@@ -134,6 +134,56 @@ CORS_ALLOWED_ORIGINS = [
     "http://127.0.0.1:3000",
 ]
 
+# Cache
+# Report, dashboard, period-lock and trial balance caches are invalidated by
+# bumping keys that every process must see, so the cache is shared between
+# processes: Redis when REDIS_URL is set, the database otherwise (create its
+# table with `python manage.py createcachetable`). Never use a per-process
+# backend such as LocMemCache here.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'digital_khata_cache',
+            'OPTIONS': {
+                'MAX_ENTRIES': 100000,
+            },
+        }
+    }
+
+# Seconds a cached report or dashboard result is kept
+REPORT_CACHE_TIMEOUT = 900
+
+# Seconds the count behind an API's X-Approximate-Count header is cached
+APPROXIMATE_COUNT_TIMEOUT = 300
+
+# Seconds the journal totals of a closed month stay cached for trial balances
+JOURNAL_TOTALS_TIMEOUT = 7 * 24 * 60 * 60
+
+# Seconds a finished report job's file stays available for download
+REPORT_JOB_TTL = 24 * 60 * 60
+
+# Seconds after which a report job still marked running is claimed again
+REPORT_JOB_TIMEOUT = 60 * 60
+
+# Document numbering, see accounts.sequences. Formats may use {business},
+# {fiscal_year}, {name} and {number}; series with reset restart every
+# fiscal year. Entries here override the defaults per series.
+DOCUMENT_SEQUENCES = {}
+
+# Month the fiscal year starts in
+FISCAL_YEAR_START_MONTH = 1
+
+# Document numbers a process reserves with each counter update
+DOCUMENT_SEQUENCE_BLOCK_SIZE = 50
+
 # Media files (for file uploads)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
\ No newline at end of file
@@ -11,6 +11,12 @@ if not exist "venv" (
     call venv\Scripts\activate
 )
 
+REM Run migrations, create the cache table and fill the report rollups
+echo Running migrations...
+python manage.py migrate
+python manage.py createcachetable
+python manage.py rebuild_report_summaries
+
 REM Start Django backend in background
 echo Starting Django backend...
 start "Django Backend" /min cmd /c "python manage.py runserver 8000"
@@ -22,6 +22,8 @@ fi
 # Run migrations
 echo "Running migrations..."
 python manage.py migrate
+python manage.py createcachetable
+python manage.py rebuild_report_summaries
 
 # Collect static files
 echo "Collecting static files..."
@@ -0,0 +1,1089 @@
+"""
+Test cases for Digital Khata accounting.
+"""
+
+import gzip
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command, CommandError
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.db.models.signals import post_save
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from accounts.models import BusinessProfile, Account, JournalEntry, JournalItem, Customer, Supplier, Expense
+from accounting.balances import balance_as_of, build_checkpoints
+from accounting.locks import PeriodClosedError
+from accounting.models import Ledger, BalanceCheckpoint, ClosedPeriod, TaxFiling
+from accounting.periods import close_period, parse_close_period
+from accounting.recurring import materialize_recurring_expenses
+from accounting.statements import profit_and_loss, comparison_periods
+from accounting.tax import parse_period, tax_summary
+from accounting import tax
+from accounting.trial_balance import trial_balance
+from inventory.models import Product
+from purchases.models import Bill, BillItem
+from sales.models import Invoice, InvoiceItem
+
+class LedgerPageTest(TestCase):
+    """Test cases for the keyset-paginated ledger."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        self.account = Account.objects.create(
+            user=self.user,
+            business=self.business,
+            name='Cash',
+            code='1001',
+            account_type='asset',
+            opening_balance=Decimal('100.00')
+        )
+        start = date(2025, 1, 1)
+        Ledger.objects.bulk_create([
+            Ledger(
+                user=self.user,
+                business=self.business,
+                account=self.account,
+                date=start + timedelta(days=number // 2),
+                reference_no=f'REF-{number}',
+                narration='Sale' if number % 3 else 'Rent',
+                debit=Decimal('10.00') if number % 3 else 0,
+                credit=0 if number % 3 else Decimal('5.00')
+            )
+            for number in range(25)
+        ])
+        self.client.login(username='testuser', password='testpass123')
+
+    def expected_balances(self):
+        balance = self.account.opening_balance
+        balances = []
+        for entry in Ledger.objects.filter(account=self.account).order_by('date', 'id'):
+            balance += entry.debit - entry.credit
+            balances.append(balance)
+        return balances
+
+    def test_pages_chain_running_balances(self):
+        """Test that each page opens with the previous page's closing balance."""
+        url = reverse('accounting:ledger-data', args=[self.account.id])
+        balances = []
+        cursor = None
+        closing = None
+        while True:
+            params = {'page_size': 10}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get(url, params).json()
+            if closing is not None:
+                self.assertEqual(Decimal(data['opening_balance']), closing)
+            balances.extend(Decimal(entry['running_balance']) for entry in data['entries'])
+            closing = Decimal(data['closing_balance'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(balances, self.expected_balances())
+
+    def test_start_date_opening_balance(self):
+        """Test that a page starting at a date opens with the balance before it."""
+        response = self.client.get(
+            reverse('accounting:ledger-data', args=[self.account.id]),
+            {'start_date': '2025-01-06'}
+        )
+        data = response.json()
+        # Rows 0-9 fall before Jan 6
+        self.assertEqual(Decimal(data['opening_balance']), self.expected_balances()[9])
+        self.assertEqual(data['entries'][0]['reference_no'], 'REF-10')
+
+    def test_tampered_cursor_rejected(self):
+        """Test that a modified cursor is refused."""
+        response = self.client.get(
+            reverse('accounting:ledger-data', args=[self.account.id]),
+            {'cursor': 'not-a-cursor'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_other_business_account_hidden(self):
+        """Test that another user's account ledger cannot be read."""
+        User.objects.create_user(username='other', password='testpass123')
+        self.client.login(username='other', password='testpass123')
+        response = self.client.get(reverse('accounting:ledger-data', args=[self.account.id]))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('accounting:ledger', args=[self.account.id]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_streams_running_balances(self):
+        """Test that the CSV export ends on the account's closing balance."""
+        response = self.client.get(reverse('accounting:ledger-export', args=[self.account.id]))
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 26)
+        self.assertEqual(Decimal(lines[-1].split(',')[-1]), self.expected_balances()[-1])
+
+    def test_export_gzip(self):
+        """Test that the ledger export is gzipped with the same parameter as the report exports."""
+        response = self.client.get(reverse('accounting:ledger-export', args=[self.account.id]), {'gzip': '1'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        self.assertEqual(len(lines), 26)
+
+class BalanceCheckpointTest(TestCase):
+    """Test cases for checkpointed as-of-date balances."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        self.account = Account.objects.create(
+            user=self.user,
+            business=self.business,
+            name='Cash',
+            code='1001',
+            account_type='asset',
+            opening_balance=Decimal('100.00')
+        )
+        for number, (day, debit, credit) in enumerate([
+            (date(2025, 1, 5), '50.00', '0'),
+            (date(2025, 1, 20), '0', '20.00'),
+            (date(2025, 3, 2), '40.00', '0'),
+            (date(2025, 4, 9), '0', '10.00'),
+        ]):
+            self.add_entry(day, debit, credit, f'REF-{number}')
+        self.client.login(username='testuser', password='testpass123')
+
+    def add_entry(self, day, debit, credit, reference_no='REF'):
+        return Ledger.objects.create(
+            user=self.user,
+            business=self.business,
+            account=self.account,
+            date=day,
+            reference_no=reference_no,
+            narration='Entry',
+            debit=Decimal(debit),
+            credit=Decimal(credit)
+        )
+
+    def test_build_monthly_checkpoints(self):
+        """Test that checkpoints hold cumulative totals of completed months only."""
+        call_command('build_balance_checkpoints', '--until', '2025-04-15', stdout=StringIO())
+        checkpoints = list(
+            BalanceCheckpoint.objects.values_list('period_end', 'debit', 'credit')
+        )
+        self.assertEqual(checkpoints, [
+            (date(2025, 1, 31), Decimal('50.00'), Decimal('20.00')),
+            (date(2025, 3, 31), Decimal('90.00'), Decimal('20.00')),
+        ])
+
+    def test_as_of_balances_follow_later_writes(self):
+        """Test that balances stay right when rows are written behind a checkpoint."""
+        build_checkpoints(until=date(2025, 4, 15))
+        entry = self.add_entry(date(2025, 1, 25), '5.00', '0')
+        self.assertEqual(balance_as_of(self.account, date(2025, 2, 15)), Decimal('135.00'))
+        self.assertEqual(balance_as_of(self.account, date(2025, 4, 30)), Decimal('165.00'))
+
+        entry.date = date(2025, 4, 1)
+        entry.save()
+        self.assertEqual(balance_as_of(self.account, date(2025, 3, 31)), Decimal('170.00'))
+        entry.delete()
+        self.assertEqual(balance_as_of(self.account, date(2025, 4, 30)), Decimal('160.00'))
+        self.assertEqual(balance_as_of(self.account, date(2024, 12, 31)), Decimal('100.00'))
+
+    def test_balances_api(self):
+        """Test the as-of-date balances API."""
+        build_checkpoints(until=date(2025, 4, 15))
+        response = self.client.get(reverse('accounting:account-balances'), {'as_of': '2025-03-15'})
+        self.assertEqual(response.status_code, 200)
+        account = response.data['accounts'][0]
+        self.assertEqual(account['debit_total'], Decimal('90.00'))
+        self.assertEqual(account['balance'], Decimal('170.00'))
+
+        response = self.client.get(reverse('accounting:account-balances'), {'as_of': 'soon'})
+        self.assertEqual(response.status_code, 400)
+
+class ProfitLossTest(TestCase):
+    """Test cases for the profit and loss statement."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        accounts = {}
+        for code, name, account_type in [
+            ('1001', 'Cash', 'asset'),
+            ('4001', 'Sales Revenue', 'income'),
+            ('5001', 'Cost of Goods Sold', 'expense'),
+            ('5002', 'Rent', 'expense'),
+        ]:
+            accounts[code] = Account.objects.create(
+                user=self.user,
+                business=self.business,
+                name=name,
+                code=code,
+                account_type=account_type
+            )
+        for day, code, debit, credit in [
+            (date(2025, 1, 10), '4001', '0', '300.00'),
+            (date(2025, 1, 10), '1001', '300.00', '0'),
+            (date(2025, 2, 10), '4001', '0', '200.00'),
+            (date(2025, 2, 12), '5001', '120.00', '0'),
+            (date(2025, 3, 1), '5002', '50.00', '0'),
+            (date(2025, 3, 20), '4001', '0', '100.00'),
+        ]:
+            Ledger.objects.create(
+                user=self.user,
+                business=self.business,
+                account=accounts[code],
+                date=day,
+                reference_no='REF',
+                narration='Entry',
+                debit=Decimal(debit),
+                credit=Decimal(credit)
+            )
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_monthly_comparison_in_one_query(self):
+        """Test that a month-by-month statement takes a single query."""
+        periods = comparison_periods(date(2025, 1, 1), date(2025, 3, 31), 'monthly')
+        with self.assertNumQueries(1):
+            statement = profit_and_loss([self.business.id], periods)
+        self.assertEqual([period['label'] for period in statement['periods']], ['Jan 2025', 'Feb 2025', 'Mar 2025'])
+        self.assertEqual(statement['total_income'], [Decimal('300.00'), Decimal('200.00'), Decimal('100.00')])
+        self.assertEqual(statement['total_expenses'], [Decimal('0'), Decimal('120.00'), Decimal('50.00')])
+        self.assertEqual(statement['net_profit'], [Decimal('300.00'), Decimal('80.00'), Decimal('50.00')])
+        self.assertEqual([row['code'] for row in statement['expenses']], ['5001', '5002'])
+
+    def test_previous_period_api(self):
+        """Test the API with a previous-period comparison column."""
+        response = self.client.get(reverse('accounting:profit-loss-data'), {
+            'start_date': '2025-02-01',
+            'end_date': '2025-02-28',
+            'compare': 'previous'
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['periods'][1]['start_date'], date(2025, 1, 4))
+        self.assertEqual(response.data['total_income'], [Decimal('200.00'), Decimal('300.00')])
+        self.assertEqual(response.data['net_profit'], [Decimal('80.00'), Decimal('300.00')])
+
+        response = self.client.get(reverse('accounting:profit-loss-data'), {'compare': 'yearly'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_profit_loss_page(self):
+        """Test that the HTML statement shows the period totals."""
+        response = self.client.get(reverse('accounting:profit_loss'), {
+            'start_date': '2025-01-01',
+            'end_date': '2025-03-31'
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_income'], Decimal('600.00'))
+        self.assertEqual(response.context['net_profit'], Decimal('430.00'))
+        self.assertContains(response, 'Sales Revenue')
+
+class TrialBalanceTest(TestCase):
+    """Test cases for the trial balance and balance sheet."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        self.accounts = {}
+        for code, name, account_type in [
+            ('1001', 'Cash', 'asset'),
+            ('2002', 'Loans', 'liability'),
+            ('3001', 'Owner Equity', 'equity'),
+            ('4001', 'Sales Revenue', 'income'),
+            ('5002', 'Rent', 'expense'),
+        ]:
+            self.accounts[code] = Account.objects.create(
+                user=self.user,
+                business=self.business,
+                name=name,
+                code=code,
+                account_type=account_type
+            )
+        self.post(date(2025, 1, 2), '1001', '3001', '1000.00')
+        self.post(date(2025, 1, 15), '1001', '2002', '500.00')
+        self.post(date(2025, 2, 3), '1001', '4001', '300.00')
+        self.post(date(2025, 3, 1), '5002', '1001', '120.00')
+        self.today = date(2025, 3, 10)
+        self.client.login(username='testuser', password='testpass123')
+
+    def post(self, day, debit_code, credit_code, amount):
+        entry = JournalEntry.objects.create(
+            user=self.user,
+            business=self.business,
+            date=day,
+            reference_no=f'JE-{JournalEntry.objects.count() + 1}',
+            narration='Entry'
+        )
+        JournalItem.objects.create(entry=entry, account=self.accounts[debit_code], debit=Decimal(amount))
+        JournalItem.objects.create(entry=entry, account=self.accounts[credit_code], credit=Decimal(amount))
+        return entry
+
+    def test_trial_balance_balances(self):
+        """Test that debits equal credits and roll up by account type."""
+        balance = trial_balance([self.business.id], date(2025, 3, 10), today=self.today)
+        self.assertEqual(balance['total_debit'], Decimal('1800.00'))
+        self.assertEqual(balance['total_credit'], Decimal('1800.00'))
+        self.assertEqual(balance['by_type']['asset']['balance'], Decimal('1680.00'))
+        self.assertEqual(balance['by_type']['income']['balance'], Decimal('300.00'))
+
+    def test_closed_months_served_from_cache(self):
+        """Test that only the open month is recomputed once closed months are cached."""
+        trial_balance([self.business.id], date(2025, 3, 10), today=self.today)
+        with CaptureQueriesContext(connection) as queries:
+            balance = trial_balance([self.business.id], date(2025, 3, 10), today=self.today)
+        # Queries other than the cache's own table
+        self.assertEqual(len([q for q in queries if 'digital_khata_cache' not in q['sql']]), 2)
+        self.assertEqual(balance['total_debit'], Decimal('1800.00'))
+
+        # A back-dated entry drops its month from the cache
+        self.post(date(2025, 1, 20), '5002', '1001', '80.00')
+        balance = trial_balance([self.business.id], date(2025, 3, 10), today=self.today)
+        self.assertEqual(balance['by_type']['asset']['balance'], Decimal('1600.00'))
+
+    def test_period_changes_drop_cached_months(self):
+        """Test that closing or reopening a period makes the cached month totals unreachable."""
+        trial_balance([self.business.id], date(2025, 3, 10), today=self.today)
+        # Rows changed without signals are not seen while the months stay cached
+        loan = JournalEntry.objects.get(date=date(2025, 1, 15))
+        JournalItem.objects.filter(entry=loan, debit__gt=0).update(debit=Decimal('600.00'))
+        JournalItem.objects.filter(entry=loan, credit__gt=0).update(credit=Decimal('600.00'))
+        balance = trial_balance([self.business.id], date(2025, 3, 10), today=self.today)
+        self.assertEqual(balance['by_type']['liability']['balance'], Decimal('500.00'))
+
+        period = close_period(self.user, self.business.id, 'month', date(2025, 2, 1), date(2025, 2, 28))
+        period.delete()
+        balance = trial_balance([self.business.id], date(2025, 3, 10), today=self.today)
+        self.assertEqual(balance['by_type']['liability']['balance'], Decimal('600.00'))
+
+    def test_api_entries_save_items_through_signals(self):
+        """Test that journal entries written through the API save each item with its signals."""
+        saved = []
+
+        def remember(sender, instance, created, **kwargs):
+            saved.append(instance.pk)
+        post_save.connect(remember, sender=JournalItem)
+        self.addCleanup(post_save.disconnect, remember, sender=JournalItem)
+
+        items = [
+            {'account': self.accounts['5002'].id, 'debit': '40.00', 'credit': '0'},
+            {'account': self.accounts['1001'].id, 'debit': '0', 'credit': '40.00'},
+        ]
+        response = self.client.post(reverse('accounting:journal-entry-list-create'), {
+            'date': '2025-01-25', 'reference_no': 'JE-API', 'narration': 'Rent',
+            'business': self.business.id, 'items': items
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(saved), 2)
+
+        items[0]['debit'] = items[1]['credit'] = '60.00'
+        response = self.client.put(
+            reverse('accounting:journal-entry-detail', kwargs={'pk': response.data['id']}),
+            {
+                'date': '2025-01-25', 'reference_no': 'JE-API', 'narration': 'Rent',
+                'business': self.business.id, 'items': items
+            },
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(saved), 4)
+        balance = trial_balance([self.business.id], date(2025, 3, 10), today=self.today)
+        self.assertEqual(balance['by_type']['expense']['balance'], Decimal('180.00'))
+
+    def test_api_entries_reach_the_ledger(self):
+        """Test that entries written through the API reach the ledger-based statements and leave with them."""
+        url = reverse('accounting:journal-entry-list-create')
+        response = self.client.post(url, {
+            'date': '2025-01-25', 'reference_no': 'JE-API', 'narration': 'Rent', 'business': self.business.id,
+            'items': [
+                {'account': self.accounts['5002'].id, 'debit': '40.00', 'credit': '0'},
+                {'account': self.accounts['1001'].id, 'debit': '0', 'credit': '40.00'},
+            ]
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        detail = reverse('accounting:journal-entry-detail', kwargs={'pk': response.data['id']})
+        response = self.client.patch(detail, {'reference_no': 'JE-RENT'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(
+            list(Ledger.objects.order_by('id').values_list('reference_no', 'debit', 'credit')),
+            [('JE-RENT', Decimal('40.00'), Decimal('0.00')), ('JE-RENT', Decimal('0.00'), Decimal('40.00'))]
+        )
+        statement = profit_and_loss([self.business.id], comparison_periods(date(2025, 1, 1), date(2025, 1, 31)))
+        self.assertEqual(statement['total_expenses'], [Decimal('40.00')])
+        self.accounts['5002'].refresh_from_db()
+        self.assertEqual(self.accounts['5002'].current_balance, Decimal('40.00'))
+
+        response = self.client.delete(detail)
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Ledger.objects.exists())
+        self.accounts['5002'].refresh_from_db()
+        self.assertEqual(self.accounts['5002'].current_balance, Decimal('0.00'))
+
+    def test_balance_sheet_api(self):
+        """Test that the balance sheet balances with current earnings in equity."""
+        response = self.client.get(reverse('accounting:balance-sheet-data'), {'as_of': '2025-02-28'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_assets'], Decimal('1800.00'))
+        self.assertEqual(response.data['current_earnings'], Decimal('300.00'))
+        self.assertEqual(response.data['total_liabilities_and_equity'], Decimal('1800.00'))
+
+class PostingTest(TestCase):
+    """Test cases for automatic journal posting."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        self.customer = Customer.objects.create(
+            user=self.user,
+            name='Test Customer'
+        )
+        self.invoice = Invoice.objects.create(
+            user=self.user,
+            business=self.business,
+            customer=self.customer,
+            date=date(2025, 1, 10),
+            invoice_number='INV-1',
+            subtotal=Decimal('100.00'),
+            tax_amount=Decimal('13.00'),
+            total_amount=Decimal('113.00'),
+            status='sent'
+        )
+
+    def balances(self):
+        balance = trial_balance([self.business.id], date(2025, 12, 31), today=date(2025, 1, 1))
+        return {row['code']: row['debit'] - row['credit'] for row in balance['accounts']}
+
+    def test_invoice_posts_balanced_entry(self):
+        """Test that a sent invoice posts receivable, revenue and tax lines."""
+        entry = JournalEntry.objects.get(reference_no=f'AUTO-INV-{self.invoice.pk}')
+        self.assertEqual(entry.items.count(), 3)
+        self.assertEqual(
+            Ledger.objects.filter(reference_no=entry.reference_no).count(), 3
+        )
+        self.assertEqual(self.balances(), {
+            '1003': Decimal('113.00'),
+            '2003': Decimal('-13.00'),
+            '4001': Decimal('-100.00'),
+        })
+
+    def test_payment_and_cancellation_repost(self):
+        """Test that payments repost the invoice and cancelling removes it."""
+        self.invoice.paid_amount = Decimal('113.00')
+        self.invoice.status = 'paid'
+        self.invoice.save()
+        self.assertEqual(JournalEntry.objects.count(), 1)
+        balances = self.balances()
+        self.assertEqual(balances['1001'], Decimal('113.00'))
+        self.assertNotIn('1003', balances)
+
+        self.invoice.status = 'cancelled'
+        self.invoice.save()
+        self.assertFalse(JournalEntry.objects.exists())
+        self.assertFalse(Ledger.objects.exists())
+
+    def test_bill_and_expense_posting(self):
+        """Test that bills and expenses post to payables and cash."""
+        supplier = Supplier.objects.create(user=self.user, name='Test Supplier')
+        Bill.objects.create(
+            user=self.user,
+            business=self.business,
+            supplier=supplier,
+            date=date(2025, 1, 12),
+            bill_number='BILL-1',
+            tax_amount=Decimal('6.50'),
+            total_amount=Decimal('56.50'),
+            status='received'
+        )
+        rent = Account.objects.get(business=self.business, code='5002')
+        expense = Expense.objects.create(
+            user=self.user,
+            business=self.business,
+            name='January rent',
+            category='Rent',
+            account=rent,
+            amount=Decimal('40.00'),
+            date=date(2025, 1, 31)
+        )
+        balances = self.balances()
+        self.assertEqual(balances['1004'], Decimal('50.00'))
+        self.assertEqual(balances['2001'], Decimal('-56.50'))
+        self.assertEqual(balances['2003'], Decimal('-6.50'))
+        self.assertEqual(balances['5002'], Decimal('40.00'))
+        self.assertEqual(balances['1001'], Decimal('-40.00'))
+
+        expense.delete()
+        self.assertNotIn('5002', self.balances())
+
+    def test_repost_command_is_idempotent(self):
+        """Test that reposting replaces entries instead of duplicating them."""
+        Ledger.objects.all().delete()
+        call_command('repost_journal_entries', '--chunk-size', '1', stdout=StringIO())
+        call_command('repost_journal_entries', stdout=StringIO())
+        self.assertEqual(JournalEntry.objects.count(), 1)
+        self.assertEqual(Ledger.objects.count(), 3)
+
+    def test_new_documents_are_not_unposted(self):
+        """Test that posting a new document deletes nothing first."""
+        with CaptureQueriesContext(connection) as queries:
+            Invoice.objects.create(
+                user=self.user, business=self.business, customer=self.customer,
+                date=date(2025, 1, 11), invoice_number='INV-2', total_amount=Decimal('10.00'), status='sent'
+            )
+        self.assertFalse(any(
+            q['sql'].startswith('DELETE') and 'accounts_journalentry' in q['sql'] for q in queries
+        ))
+
+    def test_recoded_account_from_another_process(self):
+        """Test that posting reads account codes afresh instead of from a per-process map."""
+        # A write without signals, as another process's would look to this one
+        Account.objects.filter(business=self.business, code='4001').update(code='4101')
+        self.invoice.status = 'paid'
+        self.invoice.paid_amount = Decimal('113.00')
+        self.invoice.save()
+        balances = self.balances()
+        self.assertEqual(balances['4001'], Decimal('-100.00'))
+        self.assertNotIn('4101', balances)
+
+class TaxSummaryTest(TestCase):
+    """Test cases for the tax summary."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        customer = Customer.objects.create(user=self.user, name='Test Customer')
+        supplier = Supplier.objects.create(user=self.user, name='Test Supplier')
+        product = Product.objects.create(
+            user=self.user, business=self.business, name='Tea', sku='TEA',
+            price=Decimal('10.00'), stock_quantity=100
+        )
+        for number, (status, rates) in enumerate([
+            ('sent', ['13.00', '0.00']),
+            ('paid', ['13.00']),
+            ('draft', ['13.00']),
+        ]):
+            invoice = Invoice.objects.create(
+                user=self.user,
+                business=self.business,
+                customer=customer,
+                date=date(2025, 4, 10 + number),
+                invoice_number=f'INV-{number}',
+                status=status
+            )
+            for rate in rates:
+                InvoiceItem.objects.create(
+                    invoice=invoice, product=product, quantity=10,
+                    unit_price=Decimal('10.00'), tax_rate=Decimal(rate)
+                )
+            invoice.tax_amount = sum(item.tax_amount for item in invoice.items.all())
+            invoice.total_amount = sum(item.total_price for item in invoice.items.all())
+            invoice.save()
+        bill = Bill.objects.create(
+            user=self.user,
+            business=self.business,
+            supplier=supplier,
+            date=date(2025, 5, 2),
+            bill_number='BILL-1',
+            status='received'
+        )
+        BillItem.objects.create(
+            bill=bill, product=product, quantity=5, unit_price=Decimal('10.00'), tax_rate=Decimal('13.00')
+        )
+        bill.tax_amount = Decimal('6.50')
+        bill.total_amount = Decimal('56.50')
+        bill.save()
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_quarterly_summary_by_rate(self):
+        """Test that a quarter's figures are aggregated per tax rate in a few queries."""
+        start_date, end_date = parse_period('2025-Q2')
+        with self.assertNumQueries(4):
+            summary = tax_summary(self.business.id, start_date, end_date)
+        self.assertEqual(summary['tax_collected'], Decimal('26.00'))
+        self.assertEqual(summary['tax_paid'], Decimal('6.50'))
+        self.assertEqual(summary['net_tax_payable'], Decimal('19.50'))
+        sales = {row['tax_rate']: row for row in summary['breakdown']['sales']}
+        self.assertEqual(sales[Decimal('13.00')]['taxable_amount'], Decimal('200.00'))
+        self.assertEqual(sales[Decimal('13.00')]['document_count'], 2)
+        self.assertEqual(sales[Decimal('0.00')]['tax_amount'], Decimal('0.00'))
+
+    def test_filed_period_is_frozen(self):
+        """Test that a filed period keeps its figures when documents change later."""
+        response = self.client.post(reverse('accounting:tax-summary-file'), {'period': '2025-Q2'})
+        self.assertEqual(response.status_code, 201)
+        Invoice.objects.get(invoice_number='INV-0').delete()
+
+        response = self.client.get(reverse('accounting:tax-summary-data'), {'period': '2025-Q2'})
+        self.assertTrue(response.data['filed'])
+        self.assertEqual(response.data['tax_collected'], Decimal('26.00'))
+
+        response = self.client.post(reverse('accounting:tax-summary-file'), {'period': '2025-Q2'})
+        self.assertEqual(response.status_code, 409)
+
+    def test_concurrent_filing_conflicts(self):
+        """Test that a period filed by another request while this one computed its figures is a conflict."""
+        start_date, end_date = parse_period('2025-Q2')
+
+        def summary_filed_meanwhile(*args):
+            TaxFiling.objects.create(
+                user=self.user, business=self.business, period_start=start_date, period_end=end_date
+            )
+            return tax_summary(*args)
+
+        with mock.patch.object(tax, 'tax_summary', side_effect=summary_filed_meanwhile):
+            response = self.client.post(reverse('accounting:tax-summary-file'), {'period': '2025-Q2'})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(TaxFiling.objects.filter(business=self.business).count(), 1)
+
+    def test_invalid_and_open_periods_rejected(self):
+        """Test that malformed and unfinished periods cannot be filed."""
+        response = self.client.post(reverse('accounting:tax-summary-file'), {'period': '2025-Q5'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(reverse('accounting:tax-summary-file'), {'period': '2999-01'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_tax_summary_page(self):
+        """Test that the HTML tax summary renders the period's figures."""
+        response = self.client.get(reverse('accounting:tax_summary'), {
+            'start_date': '2025-04-01',
+            'end_date': '2025-06-30'
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['sales_tax_collected'], Decimal('26.00'))
+        self.assertContains(response, 'Breakdown by Tax Rate')
+
+
+class PeriodCloseTest(TestCase):
+    """Test cases for closing accounting periods."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        self.accounts = {}
+        for code, name, account_type in [
+            ('1001', 'Cash', 'asset'),
+            ('3001', 'Owner Equity', 'equity'),
+            ('3002', 'Retained Earnings', 'equity'),
+            ('4001', 'Sales Revenue', 'income'),
+            ('5002', 'Rent', 'expense'),
+        ]:
+            self.accounts[code] = Account.objects.create(
+                user=self.user,
+                business=self.business,
+                name=name,
+                code=code,
+                account_type=account_type
+            )
+        self.post(date(2025, 1, 2), '1001', '3001', '1000.00')
+        self.post(date(2025, 2, 3), '1001', '4001', '300.00')
+        self.post(date(2025, 3, 1), '5002', '1001', '120.00')
+        self.client.login(username='testuser', password='testpass123')
+
+    def tearDown(self):
+        # Closed periods are cached per business id, which the next test may reuse
+        cache.clear()
+
+    def post(self, day, debit_code, credit_code, amount):
+        entry = JournalEntry.objects.create(
+            user=self.user,
+            business=self.business,
+            date=day,
+            reference_no=f'JE-{JournalEntry.objects.count() + 1}',
+            narration='Entry'
+        )
+        JournalItem.objects.create(entry=entry, account=self.accounts[debit_code], debit=Decimal(amount))
+        JournalItem.objects.create(entry=entry, account=self.accounts[credit_code], credit=Decimal(amount))
+        return entry
+
+    def test_year_close_moves_earnings_to_retained_earnings(self):
+        """Test that closing a year zeroes income and expenses against Retained Earnings."""
+        period = close_period(self.user, self.business.id, 'year', date(2025, 1, 1), date(2025, 12, 31))
+        self.assertIsNotNone(period.closing_entry)
+
+        balance = trial_balance([self.business.id], date(2025, 12, 31))
+        self.assertEqual(balance['by_type']['income']['balance'], Decimal('0'))
+        self.assertEqual(balance['by_type']['expense']['balance'], Decimal('0'))
+        retained = {row['code']: row for row in balance['accounts']}['3002']
+        self.assertEqual(retained['credit'], Decimal('180.00'))
+        self.assertEqual(balance['total_debit'], balance['total_credit'])
+
+    @override_settings(FISCAL_YEAR_START_MONTH=4)
+    def test_year_close_follows_fiscal_year(self):
+        """Test that a year close covers the fiscal year starting in it."""
+        kind, start_date, end_date = parse_close_period('2024')
+        self.assertEqual((kind, start_date, end_date), ('year', date(2024, 4, 1), date(2025, 3, 31)))
+
+        period = close_period(self.user, self.business.id, kind, start_date, end_date)
+        self.assertEqual(period.closing_entry.date, date(2025, 3, 31))
+        balance = trial_balance([self.business.id], date(2025, 3, 31))
+        retained = {row['code']: row for row in balance['accounts']}['3002']
+        self.assertEqual(retained['credit'], Decimal('180.00'))
+
+    def test_writes_in_closed_period_rejected(self):
+        """Test that rows dated inside a closed period cannot be created, changed or deleted."""
+        response = self.client.post(reverse('accounting:close-period'), {'period': '2025-02'})
+        self.assertEqual(response.status_code, 201)
+
+        february = JournalEntry.objects.get(date=date(2025, 2, 3))
+        february.narration = 'Changed'
+        with self.assertRaises(PeriodClosedError):
+            february.save()
+        with self.assertRaises(PeriodClosedError):
+            self.post(date(2025, 2, 20), '5002', '1001', '10.00')
+        with self.assertRaises(PeriodClosedError), transaction.atomic():
+            JournalItem.objects.filter(entry=february).first().delete()
+
+        march = JournalEntry.objects.get(date=date(2025, 3, 1))
+        march.date = date(2025, 2, 28)
+        with self.assertRaises(PeriodClosedError):
+            march.save()
+
+        with transaction.atomic():
+            response = self.client.delete(
+                reverse('accounting:journal-entry-detail', kwargs={'pk': february.pk})
+            )
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue(JournalEntry.objects.filter(pk=february.pk).exists())
+
+        # Open periods stay writable
+        self.post(date(2025, 3, 5), '5002', '1001', '10.00')
+
+    def test_trial_balance_reads_frozen_totals(self):
+        """Test that reports over closed periods read the totals frozen at close."""
+        call_command(
+            'close_period', business_id=self.business.id, period='2025-Q1', stdout=StringIO()
+        )
+        period = ClosedPeriod.objects.get(business=self.business)
+        self.assertEqual(period.kind, 'quarter')
+        self.assertEqual(period.totals.count(), 4)
+
+        # Rows changed behind the locks are not re-aggregated
+        JournalItem.objects.filter(account=self.accounts['5002']).update(debit=Decimal('999.00'))
+        balance = trial_balance([self.business.id], date(2025, 3, 31))
+        self.assertEqual(balance['by_type']['expense']['balance'], Decimal('120.00'))
+
+        response = self.client.get(reverse('accounting:closed-periods'))
+        self.assertEqual(len(response.data), 1)
+        response = self.client.post(reverse('accounting:close-period'), {'period': '2025-Q1'})
+        self.assertEqual(response.status_code, 409)
+
+    def test_concurrent_close_conflicts(self):
+        """Test that a period closed by another request or process meanwhile is a conflict."""
+        def closed_meanwhile(user, business_id, kind, start_date, end_date):
+            ClosedPeriod.objects.create(
+                user=user, business_id=business_id, kind=kind, period_start=start_date, period_end=end_date
+            )
+            return close_period(user, business_id, kind, start_date, end_date)
+
+        with mock.patch('accounting.views.close_period', side_effect=closed_meanwhile):
+            response = self.client.post(reverse('accounting:close-period'), {'period': '2025-02'})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(ClosedPeriod.objects.filter(business=self.business).count(), 1)
+
+        with mock.patch('accounting.management.commands.close_period.close_period', side_effect=closed_meanwhile):
+            with self.assertRaisesMessage(CommandError, 'Period already closed'):
+                call_command('close_period', business_id=self.business.id, period='2025-01', stdout=StringIO())
+        self.assertEqual(ClosedPeriod.objects.filter(business=self.business).count(), 2)
+
+
+class RecurringExpenseTest(TestCase):
+    """Test cases for materializing recurring expenses."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        self.rent = Account.objects.create(
+            user=self.user,
+            business=self.business,
+            name='Rent',
+            code='5002',
+            account_type='expense'
+        )
+
+    def create_expense(self, day, recurrence):
+        return Expense.objects.create(
+            user=self.user,
+            business=self.business,
+            name='Rent',
+            category='Rent',
+            account=self.rent,
+            amount=Decimal('100.00'),
+            date=day,
+            recurrence=recurrence
+        )
+
+    def test_monthly_occurrences_are_idempotent(self):
+        """Test that reruns only add occurrences due since the last run."""
+        template = self.create_expense(date(2025, 1, 31), 'monthly')
+
+        self.assertEqual(materialize_recurring_expenses(until=date(2025, 5, 15)), 3)
+        self.assertEqual(materialize_recurring_expenses(until=date(2025, 5, 15)), 0)
+        template.refresh_from_db()
+        self.assertEqual(template.recurred_until, date(2025, 4, 30))
+
+        call_command('materialize_recurring_expenses', until=date(2025, 6, 30), stdout=StringIO())
+        self.assertEqual(
+            list(template.occurrences.order_by('date').values_list('date', flat=True)),
+            [date(2025, 2, 28), date(2025, 3, 31), date(2025, 4, 30), date(2025, 5, 31), date(2025, 6, 30)]
+        )
+        self.assertEqual(
+            JournalEntry.objects.filter(reference_no__startswith='AUTO-EXP').count(), 6
+        )
+
+    def test_daily_catch_up_is_bulk(self):
+        """Test that a year of daily occurrences is written with a bounded number of queries."""
+        self.create_expense(date(2025, 1, 1), 'daily')
+        with CaptureQueriesContext(connection) as queries:
+            count = materialize_recurring_expenses(until=date(2025, 12, 31))
+        self.assertEqual(count, 364)
+        self.assertLess(len(queries), 100)
+        self.assertEqual(
+            Ledger.objects.filter(account=self.rent).aggregate(total=Sum('debit'))['total'],
+            Decimal('36500.00')
+        )
+
+    def test_occurrences_written_in_batches(self):
+        """Test that occurrences are inserted batch by batch without unposting anything."""
+        self.create_expense(date(2025, 1, 1), 'daily')
+        with CaptureQueriesContext(connection) as queries:
+            count = materialize_recurring_expenses(until=date(2025, 2, 19), batch_size=10)
+        self.assertEqual(count, 49)
+        inserts = [q for q in queries if q['sql'].startswith('INSERT INTO "accounts_expense"')]
+        self.assertEqual(len(inserts), 5)
+        self.assertFalse(any(
+            q['sql'].startswith('DELETE') and 'accounts_journalentry' in q['sql'] for q in queries
+        ))
+        self.assertEqual(JournalEntry.objects.filter(reference_no__startswith='AUTO-EXP').count(), 50)
+
+
+class JournalImportTest(TestCase):
+    """Test cases for the bulk journal entry import."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        self.client.login(username='testuser', password='testpass123')
+
+    def entry(self, reference_no, debit='100.00', credit='100.00', code='5002'):
+        return {
+            'date': '2025-03-01',
+            'reference_no': reference_no,
+            'narration': 'Imported',
+            'items': [
+                {'account_code': code, 'debit': debit},
+                {'account_code': '1001', 'credit': credit},
+            ],
+        }
+
+    def test_json_import_reports_row_errors(self):
+        """Test that valid entries are saved while invalid ones are reported."""
+        response = self.client.post(reverse('accounting:journal-entry-import'), {
+            'entries': [
+                self.entry('OLD-1'),
+                self.entry('OLD-2', debit='50.00', credit='50.00'),
+                self.entry('OLD-3', credit='90.00'),
+                self.entry('OLD-1'),
+                self.entry('OLD-4', code='9999'),
+            ]
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['imported'], 2)
+        self.assertEqual([error['row'] for error in response.data['errors']], [3, 4, 5])
+        self.assertIn('debits and credits do not balance', response.data['errors'][0]['errors'])
+
+        entry = JournalEntry.objects.get(reference_no='OLD-1')
+        self.assertEqual(entry.items.count(), 2)
+        self.assertEqual(Ledger.objects.filter(reference_no='OLD-1').count(), 2)
+        balance = trial_balance([self.business.id], date(2025, 3, 31))
+        self.assertEqual(balance['by_type']['expense']['balance'], Decimal('150.00'))
+
+    def test_csv_import(self):
+        """Test that consecutive CSV rows with one reference form one entry."""
+        upload = SimpleUploadedFile('journal.csv', (
+            'date,reference_no,narration,account_code,debit,credit\n'
+            '2025-03-01,OLD-1,Rent,5002,100.00,\n'
+            '2025-03-01,OLD-1,Rent,1001,,100.00\n'
+            '2025-03-02,OLD-2,Sale,1001,40.00,\n'
+            'not-a-date,OLD-3,Sale,4001,,40.00\n'
+        ).encode(), content_type='text/csv')
+        response = self.client.post(reverse('accounting:journal-entry-import'), {'file': upload})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['imported'], 1)
+        self.assertEqual([error['row'] for error in response.data['errors']], [4, 5])
+
+    def test_import_is_bulk(self):
+        """Test that many entries are written with a bounded number of queries."""
+        entries = [self.entry(f'OLD-{number}') for number in range(300)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('accounting:journal-entry-import'), entries, content_type='application/json'
+            )
+        self.assertEqual(response.data['imported'], 300)
+        self.assertLess(len(queries), 50)
+
+
+class CurrentBalanceTest(TestCase):
+    """Test cases for maintained account and ledger balances."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        self.customer = Customer.objects.create(
+            user=self.user,
+            name='Test Customer'
+        )
+        for number in (1, 2):
+            Invoice.objects.create(
+                user=self.user,
+                business=self.business,
+                customer=self.customer,
+                date=date(2025, 1, 10),
+                invoice_number=f'INV-{number}',
+                subtotal=Decimal('100.00'),
+                tax_amount=Decimal('13.00'),
+                total_amount=Decimal('113.00'),
+                status='sent'
+            )
+        self.receivables = Account.objects.get(business=self.business, code='1003')
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_postings_move_current_balance(self):
+        """Test that postings update current balances and stamp running balances on ledger rows."""
+        self.assertEqual(self.receivables.current_balance, Decimal('226.00'))
+        self.assertEqual(
+            list(Ledger.objects.filter(account=self.receivables).order_by('id').values_list('balance', flat=True)),
+            [Decimal('113.00'), Decimal('226.00')]
+        )
+
+        Invoice.objects.get(invoice_number='INV-2').delete()
+        self.receivables.refresh_from_db()
+        self.assertEqual(self.receivables.current_balance, Decimal('113.00'))
+
+    def test_account_save_keeps_current_balance(self):
+        """Test that saving a stale account neither overwrites its balance nor loses opening changes."""
+        stale = Account.objects.get(pk=self.receivables.pk)
+        stale.current_balance = Decimal('0')
+        stale.opening_balance = Decimal('50.00')
+        stale.save()
+        stale.refresh_from_db()
+        self.assertEqual(stale.current_balance, Decimal('276.00'))
+
+        response = self.client.get(reverse('accounting:chart_of_accounts'))
+        balances = {account.code: account.balance for account in response.context['accounts']}
+        self.assertEqual(balances['1003'], Decimal('276.00'))
+        self.assertEqual(balances['4001'], Decimal('200.00'))
+
+    def test_reconcile_command_reports_and_fixes_drift(self):
+        """Test that drifted balances are reported and corrected."""
+        Account.objects.filter(pk=self.receivables.pk).update(current_balance=Decimal('1.00'))
+
+        out = StringIO()
+        call_command('reconcile_account_balances', workers=1, stdout=out)
+        self.assertIn('1 drifted', out.getvalue())
+
+        call_command('reconcile_account_balances', workers=1, fix=True, stdout=StringIO())
+        self.receivables.refresh_from_db()
+        self.assertEqual(self.receivables.current_balance, Decimal('226.00'))
+
+    def test_liability_opening_balance_is_a_credit(self):
+        """Test that a liability's opening balance is credited and shown on its natural side."""
+        loans = Account.objects.create(
+            user=self.user,
+            business=self.business,
+            name='Bank Loan',
+            code='2101',
+            account_type='liability',
+            opening_balance=Decimal('500.00')
+        )
+        self.assertEqual(loans.current_balance, Decimal('-500.00'))
+
+        response = self.client.get(reverse('accounting:chart_of_accounts'))
+        balances = {account.code: account.balance for account in response.context['accounts']}
+        self.assertEqual(balances['2101'], Decimal('500.00'))
+
+        balance = trial_balance([self.business.id], date(2025, 1, 31), today=date(2025, 1, 31))
+        row = {row['code']: row for row in balance['accounts']}['2101']
+        self.assertEqual((row['debit'], row['credit']), (Decimal('0'), Decimal('500.00')))
+        self.assertEqual(balance['by_type']['liability']['balance'], Decimal('526.00'))
+
+        out = StringIO()
+        call_command('reconcile_account_balances', workers=1, stdout=out)
+        self.assertIn('0 drifted', out.getvalue())
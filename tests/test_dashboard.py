@@ -0,0 +1,246 @@
+"""
+Test cases for the Digital Khata dashboard.
+"""
+
+import asyncio
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth.models import User
+from accounts.models import Customer, BusinessProfile
+from dashboard.events import broker
+from dashboard.signals import publish_invoice_event
+from dashboard.snapshot import DashboardSnapshot
+from dashboard.views import event_stream
+from inventory.models import Product, StockMovement
+from inventory.stock import apply_movements
+from sales.models import Invoice
+
+class DashboardSnapshotTest(TestCase):
+    """Test cases for the dashboard KPI snapshot."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        self.customer = Customer.objects.create(
+            user=self.user,
+            name='Test Customer'
+        )
+        Product.objects.create(
+            user=self.user, business=self.business, name='Tea', sku='TEA',
+            price=Decimal('5.00'), stock_quantity=3
+        )
+        for number, status in enumerate(['sent', 'overdue', 'paid']):
+            Invoice.objects.create(
+                user=self.user,
+                business=self.business,
+                customer=self.customer,
+                date=date.today(),
+                invoice_number=f'INV-{number}',
+                total_amount=Decimal('10.00'),
+                status=status
+            )
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_kpis_in_two_queries(self):
+        """Test that every KPI is computed in at most two queries."""
+        snapshot = DashboardSnapshot(self.user, business_ids=[self.business.id])
+        with self.assertNumQueries(2):
+            data = snapshot.as_dict()
+        self.assertEqual(data['total_sales'], 30.0)
+        self.assertEqual(data['outstanding_invoices'], 2)
+        self.assertEqual(data['recent_invoices'], 3)
+        self.assertEqual(data['total_products'], 1)
+        self.assertEqual(data['low_stock_products'], 1)
+
+    def test_low_stock_uses_product_thresholds(self):
+        """Test that low stock is counted against each product's threshold."""
+        Product.objects.create(
+            user=self.user, business=self.business, name='Rice', sku='RICE',
+            price=Decimal('9.00'), stock_quantity=20, low_stock_threshold=25
+        )
+        Product.objects.create(
+            user=self.user, business=self.business, name='Salt', sku='SALT',
+            price=Decimal('1.00'), stock_quantity=8, low_stock_threshold=5
+        )
+        data = DashboardSnapshot(self.user, business_ids=[self.business.id]).as_dict()
+        self.assertEqual(data['low_stock_products'], 2)
+
+    def test_conditional_get(self):
+        """Test that an unchanged dashboard answers 304 Not Modified."""
+        url = reverse('dashboard:dashboard-data')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Invoice.objects.create(
+            user=self.user,
+            business=self.business,
+            customer=self.customer,
+            date=date.today(),
+            invoice_number='INV-NEW',
+            total_amount=Decimal('5.00')
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_sales'], 35.0)
+
+    def test_validators_follow_parameters_and_date(self):
+        """Test that ETag and Last-Modified change with the top-sellers window and the day."""
+        url = reverse('dashboard:dashboard-data')
+        response = self.client.get(url)
+        etag, modified = response['ETag'], response['Last-Modified']
+        self.assertEqual(self.client.get(url, {'top_days': 'many', 'refresh': '1'})['ETag'], etag)
+        response = self.client.get(url, {'top_days': 7}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(days=1)):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=modified)
+            self.assertEqual(response.status_code, 200)
+
+
+class DashboardEventsTest(TestCase):
+    """Test cases for the live dashboard event stream."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        self.customer = Customer.objects.create(
+            user=self.user,
+            name='Test Customer'
+        )
+        self.loop = asyncio.new_event_loop()
+        self.stream = event_stream([self.business.id])
+        # The first message only sets the client's reconnect delay
+        self.loop.run_until_complete(self.stream.__anext__())
+
+    def tearDown(self):
+        """Close the stream and its event loop."""
+        self.loop.run_until_complete(self.stream.aclose())
+        self.loop.close()
+
+    def next_message(self):
+        return self.loop.run_until_complete(asyncio.wait_for(self.stream.__anext__(), 1))
+
+    def test_new_invoice_and_payment(self):
+        """Test that new invoices and payments are pushed after commit."""
+        with self.captureOnCommitCallbacks(execute=True):
+            invoice = Invoice.objects.create(
+                user=self.user,
+                business=self.business,
+                customer=self.customer,
+                date=date.today(),
+                invoice_number='INV-1',
+                total_amount=Decimal('50.00'),
+                status='sent'
+            )
+        message = self.next_message()
+        self.assertTrue(message.startswith('event: invoice_created\n'))
+        self.assertIn('"total_sales": "50.00"', message)
+
+        invoice.paid_amount = Decimal('50.00')
+        invoice.status = 'paid'
+        with self.captureOnCommitCallbacks(execute=True):
+            invoice.save()
+        message = self.next_message()
+        self.assertTrue(message.startswith('event: payment_received\n'))
+        self.assertIn('"outstanding_invoices": -1', message)
+
+    def test_batch_invoices_pushed_after_commit(self):
+        """Test that invoices created by a batch sync are announced once it commits."""
+        product = Product.objects.create(
+            user=self.user, business=self.business, name='Tea', sku='TEA',
+            price=Decimal('5.00'), stock_quantity=100
+        )
+        self.client.login(username='testuser', password='testpass123')
+        with mock.patch('sales.batch.publish_invoice_event', wraps=publish_invoice_event) as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse('sales:invoice-batch-create'), {'invoices': [
+                    {'customer': self.customer.pk, 'date': '2025-06-01', 'items': [{'product': product.pk, 'quantity': 1}]},
+                    {'customer': self.customer.pk, 'date': '2025-06-01', 'items': [{'product': product.pk, 'quantity': 2}]},
+                ]}, content_type='application/json')
+                self.assertEqual(response.data['created'], 2)
+                publish.assert_not_called()
+        self.assertEqual(publish.call_count, 2)
+        self.assertTrue(self.next_message().startswith('event: invoice_created\n'))
+        self.assertIn('"amount": "10.00"', self.next_message())
+
+    def test_low_stock_crossing(self):
+        """Test that only crossings of the low-stock level are pushed."""
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.create(
+                user=self.user, business=self.business, name='Tea', sku='TEA',
+                price=Decimal('5.00'), stock_quantity=20
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            product.stock_quantity = 15
+            product.save()
+            product.stock_quantity = 4
+            product.save()
+        message = self.next_message()
+        self.assertTrue(message.startswith('event: low_stock\n'))
+        self.assertIn('"low_stock_products": 1', message)
+
+    def test_moved_stock_crossing(self):
+        """Test that stock moved by the stock service pushes crossings too."""
+        product = Product.objects.create(
+            user=self.user, business=self.business, name='Tea', sku='TEA',
+            price=Decimal('5.00'), stock_quantity=12
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_movements([StockMovement(business=self.business, product=product, quantity=-5, reason='sale')])
+        message = self.next_message()
+        self.assertTrue(message.startswith('event: low_stock\n'))
+        self.assertIn('"stock_quantity": 7', message)
+
+    def test_crossing_uses_product_threshold(self):
+        """Test that crossings compare stock against each product's own threshold."""
+        product = Product.objects.create(
+            user=self.user, business=self.business, name='Tea', sku='TEA',
+            price=Decimal('5.00'), stock_quantity=30, low_stock_threshold=25
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_movements([StockMovement(business=self.business, product=product, quantity=-10, reason='sale')])
+        message = self.next_message()
+        self.assertTrue(message.startswith('event: low_stock\n'))
+        self.assertIn('"stock_quantity": 20', message)
+
+        product.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            product.low_stock_threshold = 5
+            product.save()
+        self.assertTrue(self.next_message().startswith('event: restocked\n'))
+
+    def test_stream_closes_cleanly(self):
+        """Test that closing a stream unsubscribes it."""
+        self.assertEqual(broker.subscriber_count(self.business.id), 1)
+        self.loop.run_until_complete(self.stream.aclose())
+        self.assertEqual(broker.subscriber_count(self.business.id), 0)
+
+    def test_requires_authentication(self):
+        """Test that anonymous users cannot open a stream."""
+        response = self.client.get(reverse('dashboard:dashboard-events'))
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,121 @@
+"""
+Test cases for Digital Khata inventory stock movements.
+"""
+
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth.models import User
+from accounts.models import BusinessProfile, Customer
+from inventory.models import Product, StockMovement
+from inventory.stock import InsufficientStockError, apply_movements, item_movements
+from sales.models import Invoice, InvoiceItem
+
+
+class StockMovementTest(TestCase):
+    """Test cases for the stock service."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        self.customer = Customer.objects.create(user=self.user, name='Test Customer')
+        self.tea = Product.objects.create(
+            user=self.user, business=self.business, name='Tea', sku='TEA',
+            price=Decimal('10.00'), stock_quantity=50
+        )
+        self.milk = Product.objects.create(
+            user=self.user, business=self.business, name='Milk', sku='MILK',
+            price=Decimal('5.00'), stock_quantity=5
+        )
+        self.invoice = Invoice.objects.create(
+            user=self.user,
+            business=self.business,
+            customer=self.customer,
+            date=date(2025, 6, 1),
+            invoice_number='INV-1',
+            total_amount=Decimal('40.00')
+        )
+        self.client.login(username='testuser', password='testpass123')
+
+    def add_items(self, *lines):
+        return [
+            InvoiceItem.objects.create(
+                invoice=self.invoice, product=product, quantity=quantity,
+                unit_price=product.price, total_price=product.price * quantity
+            )
+            for product, quantity in lines
+        ]
+
+    def test_document_lines_are_netted_per_product(self):
+        """Test that a document moves each product once, in a bounded number of queries."""
+        items = self.add_items((self.tea, 2), (self.milk, 1), (self.tea, 3))
+        with CaptureQueriesContext(connection) as queries:
+            apply_movements(item_movements(items, -1, 'sale', 'INV-1'))
+        # One UPDATE and one INSERT, plus the savepoint around them
+        self.assertLessEqual(len(queries), 4)
+
+        self.tea.refresh_from_db()
+        self.milk.refresh_from_db()
+        self.assertEqual(self.tea.stock_quantity, 45)
+        self.assertEqual(self.milk.stock_quantity, 4)
+        self.assertEqual(
+            sorted(StockMovement.objects.values_list('product__sku', 'quantity', 'reason', 'reference')),
+            [('MILK', -1, 'sale', 'INV-1'), ('TEA', -5, 'sale', 'INV-1')]
+        )
+
+    def test_overselling_changes_nothing(self):
+        """Test that taking more than is in stock fails without moving any product."""
+        items = self.add_items((self.tea, 2), (self.milk, 6))
+        with self.assertRaises(InsufficientStockError):
+            with transaction.atomic():
+                apply_movements(item_movements(items, -1, 'sale', 'INV-1'))
+
+        self.tea.refresh_from_db()
+        self.assertEqual(self.tea.stock_quantity, 50)
+        self.assertFalse(StockMovement.objects.exists())
+
+    def test_deleting_an_invoice_returns_its_stock(self):
+        """Test that deleting an invoice puts its units back and records the reversal."""
+        items = self.add_items((self.tea, 4))
+        apply_movements(item_movements(items, -1, 'sale', 'INV-1'))
+
+        response = self.client.post(reverse('sales:invoice_delete', args=[self.invoice.pk]))
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Invoice.objects.filter(pk=self.invoice.pk).exists())
+        self.tea.refresh_from_db()
+        self.assertEqual(self.tea.stock_quantity, 50)
+        self.assertEqual(
+            list(self.tea.movements.values_list('quantity', 'reason')),
+            [(-4, 'sale'), (4, 'sale_reversal')]
+        )
+
+    def test_only_stock_failures_report_stock(self):
+        """Test that the invoice form reports stock shortages and other integrity errors apart."""
+        data = {
+            'customer': self.customer.pk, 'invoice_number': 'INV-2', 'date': '2025-06-02', 'status': 'draft',
+            'items-TOTAL_FORMS': '1', 'items-INITIAL_FORMS': '0',
+            'items-0-product': self.milk.pk, 'items-0-quantity': '6', 'items-0-unit_price': '5.00', 'items-0-tax_rate': '0',
+        }
+        response = self.client.post(reverse('sales:invoice_create'), data)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Not enough stock')
+        self.assertFalse(Invoice.objects.filter(invoice_number='INV-2').exists())
+
+        with mock.patch('sales.views.apply_movements', side_effect=IntegrityError):
+            response = self.client.post(reverse('sales:invoice_create'), dict(data, **{'items-0-quantity': '1'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Not enough stock')
+        self.assertIn('nothing was saved', response.context['form'].non_field_errors()[0])
@@ -0,0 +1,556 @@
+"""
+Test cases for Digital Khata reports.
+"""
+
+import gzip
+import json
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth.models import User
+from accounts.models import Customer, BusinessProfile
+from accounting.models import ClosedPeriod
+from inventory.models import Product
+from sales.models import Invoice, InvoiceItem
+from reports.analytics import top_sellers
+from reports.jobs import claim_jobs, run_job, expire_jobs
+from reports.models import DailySalesSummary, ReportJob
+
+class SalesReportDataTest(TestCase):
+    """Test cases for the sales report API."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        self.customer = Customer.objects.create(
+            user=self.user,
+            name='Test Customer'
+        )
+        for number, (day, amount) in enumerate([
+            (date(2025, 1, 1), '100.00'),
+            (date(2025, 1, 1), '50.00'),
+            (date(2025, 1, 3), '25.00'),
+            (date(2025, 2, 10), '10.00'),
+        ]):
+            Invoice.objects.create(
+                user=self.user,
+                business=self.business,
+                customer=self.customer,
+                date=day,
+                invoice_number=f'INV-{number}',
+                total_amount=Decimal(amount),
+                status='paid'
+            )
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_daily_chart_data_fills_gaps(self):
+        """Test that days without invoices are reported as zero."""
+        response = self.client.get(reverse('reports:sales-report-data'), {
+            'start_date': '2025-01-01',
+            'end_date': '2025-01-04'
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['chart_data'], [
+            {'date': '2025-01-01', 'amount': 150.0},
+            {'date': '2025-01-02', 'amount': 0.0},
+            {'date': '2025-01-03', 'amount': 25.0},
+            {'date': '2025-01-04', 'amount': 0.0},
+        ])
+
+    def test_monthly_chart_data(self):
+        """Test grouping chart data by month."""
+        response = self.client.get(reverse('reports:sales-report-data'), {
+            'start_date': '2025-01-01',
+            'end_date': '2025-03-31',
+            'granularity': 'month'
+        })
+        self.assertEqual(response.json()['chart_data'], [
+            {'date': '2025-01-01', 'amount': 175.0},
+            {'date': '2025-02-01', 'amount': 10.0},
+            {'date': '2025-03-01', 'amount': 0.0},
+        ])
+
+    def test_chart_query_count_independent_of_range(self):
+        """Test that a long date range does not add queries per day."""
+        url = reverse('reports:sales-report-data')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as week:
+            self.client.get(url, {'start_date': '2025-01-01', 'end_date': '2025-01-07'})
+        with CaptureQueriesContext(connection) as years:
+            self.client.get(url, {'start_date': '2025-01-01', 'end_date': '2027-12-31'})
+        self.assertEqual(len(week), len(years))
+
+    def test_invalid_granularity(self):
+        """Test that an unknown granularity is rejected."""
+        response = self.client.get(reverse('reports:sales-report-data'), {
+            'granularity': 'fortnight'
+        })
+        self.assertEqual(response.status_code, 400)
+
+class DailySalesSummaryTest(TestCase):
+    """Test cases for the incrementally maintained sales rollup."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        self.customer = Customer.objects.create(
+            user=self.user,
+            name='Test Customer'
+        )
+        self.invoice = Invoice.objects.create(
+            user=self.user,
+            business=self.business,
+            customer=self.customer,
+            date=date(2025, 1, 1),
+            invoice_number='INV-1',
+            total_amount=Decimal('100.00'),
+            paid_amount=Decimal('40.00'),
+            status='sent'
+        )
+
+    def summary(self, status):
+        """Return the rollup row for the test invoice's date and a status."""
+        return DailySalesSummary.objects.filter(
+            business=self.business, date=date(2025, 1, 1), status=status
+        ).first()
+
+    def test_create_adds_to_summary(self):
+        """Test that saving a new invoice adds it to its bucket."""
+        summary = self.summary('sent')
+        self.assertEqual(summary.total_amount, Decimal('100.00'))
+        self.assertEqual(summary.due_amount, Decimal('60.00'))
+        self.assertEqual(summary.document_count, 1)
+
+    def test_status_change_moves_between_buckets(self):
+        """Test that changing status moves totals to the new bucket."""
+        self.invoice.status = 'paid'
+        self.invoice.paid_amount = Decimal('100.00')
+        self.invoice.save()
+        self.assertEqual(self.summary('sent').document_count, 0)
+        self.assertEqual(self.summary('sent').total_amount, Decimal('0.00'))
+        self.assertEqual(self.summary('paid').paid_amount, Decimal('100.00'))
+        self.assertEqual(self.summary('paid').document_count, 1)
+
+    def test_delete_removes_from_summary(self):
+        """Test that deleting an invoice removes it from its bucket."""
+        self.invoice.delete()
+        self.assertEqual(self.summary('sent').document_count, 0)
+
+    def test_previous_row_read_once_per_save(self):
+        """Test that the rollups, posting and closed-period check share one read of the saved invoice."""
+        ClosedPeriod.objects.create(
+            user=self.user, business=self.business, kind='month',
+            period_start=date(2024, 12, 1), period_end=date(2024, 12, 31)
+        )
+        self.invoice.status = 'paid'
+        self.invoice.paid_amount = Decimal('100.00')
+        with CaptureQueriesContext(connection) as queries:
+            self.invoice.save()
+        reads = [q for q in queries if q['sql'].startswith('SELECT') and 'FROM "sales_invoice"' in q['sql']]
+        self.assertEqual(len(reads), 1)
+        self.assertEqual(self.summary('paid').document_count, 1)
+
+    def test_rebuild_command_matches_incremental_state(self):
+        """Test that a full rebuild reproduces the maintained rollup."""
+        DailySalesSummary.objects.all().delete()
+        call_command('rebuild_report_summaries', stdout=StringIO())
+        summary = self.summary('sent')
+        self.assertEqual(summary.total_amount, Decimal('100.00'))
+        self.assertEqual(summary.document_count, 1)
+
+class SalesExportTest(TestCase):
+    """Test cases for the streaming sales CSV export."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        self.customer = Customer.objects.create(
+            user=self.user,
+            name='Test Customer'
+        )
+        for number, status in enumerate(['paid', 'sent', 'paid']):
+            Invoice.objects.create(
+                user=self.user,
+                business=self.business,
+                customer=self.customer,
+                date=date(2025, 1, number + 1),
+                invoice_number=f'INV-{number}',
+                total_amount=Decimal('10.00'),
+                status=status
+            )
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_export_streams_filtered_rows(self):
+        """Test that the export streams rows matching the filters."""
+        response = self.client.get(reverse('reports:export_sales_csv'), {
+            'start_date': '2025-01-01',
+            'end_date': '2025-01-02',
+            'status': 'paid'
+        })
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines, [
+            'Invoice Number,Customer,Date,Total Amount,Status',
+            'INV-0,Test Customer,2025-01-01,10.00,paid',
+        ])
+
+    def test_export_gzip(self):
+        """Test that the export can be gzip compressed."""
+        response = self.client.get(reverse('reports:export_sales_csv'), {'gzip': '1'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        content = gzip.decompress(b''.join(response.streaming_content)).decode()
+        self.assertEqual(len(content.splitlines()), 4)
+        response = self.client.get(reverse('reports:export_sales_csv'), {'gzip': '0'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+
+class InventoryReportDataTest(TestCase):
+    """Test cases for the inventory report API."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        for name, price, stock in [('Apple', '2.50', 4), ('Banana', '1.00', 0), ('Cherry', '3.00', 20)]:
+            Product.objects.create(
+                user=self.user,
+                business=self.business,
+                name=name,
+                sku=f'SKU-{name}',
+                price=Decimal(price),
+                stock_quantity=stock
+            )
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_valuation_and_counts(self):
+        """Test inventory valuation and stock counts."""
+        response = self.client.get(reverse('reports:inventory-report-data'))
+        data = response.json()
+        self.assertEqual(data['total_inventory_value'], 70.0)
+        self.assertEqual(data['product_count'], 3)
+        self.assertEqual(data['low_stock_count'], 2)
+        self.assertEqual(data['out_of_stock_count'], 1)
+        self.assertEqual(
+            [(p['name'], p['stock_status'], p['total_value']) for p in data['products']],
+            [('Apple', 'low_stock', 10.0), ('Banana', 'out_of_stock', 0.0), ('Cherry', 'in_stock', 60.0)]
+        )
+
+    def test_low_stock_uses_product_thresholds(self):
+        """Test that low stock counts and filters use each product's own threshold."""
+        Product.objects.filter(name='Cherry').update(low_stock_threshold=25)
+        Product.objects.filter(name='Apple').update(low_stock_threshold=3)
+        data = self.client.get(reverse('reports:inventory-report-data')).json()
+        self.assertEqual(data['low_stock_count'], 2)
+        data = self.client.get(reverse('reports:inventory-report-data'), {'low_stock': '1'}).json()
+        self.assertEqual([p['name'] for p in data['products']], ['Banana', 'Cherry'])
+
+    def test_pagination(self):
+        """Test that product rows are paginated."""
+        response = self.client.get(reverse('reports:inventory-report-data'), {
+            'page': 2,
+            'page_size': 2
+        })
+        data = response.json()
+        self.assertEqual([p['name'] for p in data['products']], ['Cherry'])
+        self.assertEqual(data['num_pages'], 2)
+        self.assertEqual(data['product_count'], 3)
+
+class ReportCacheTest(TestCase):
+    """Test cases for the report result cache."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        self.customer = Customer.objects.create(
+            user=self.user,
+            name='Test Customer'
+        )
+        self.client.login(username='testuser', password='testpass123')
+
+    def create_invoice(self, number):
+        """Create a paid invoice for today's date."""
+        Invoice.objects.create(
+            user=self.user,
+            business=self.business,
+            customer=self.customer,
+            date=date.today(),
+            invoice_number=f'INV-{number}',
+            total_amount=Decimal('10.00'),
+            status='paid'
+        )
+
+    def test_repeat_request_served_from_cache(self):
+        """Test that a repeated request does not re-run the report queries."""
+        url = reverse('reports:sales-report-data')
+        self.create_invoice(1)
+        first = self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(url)
+        self.assertEqual(first.json(), second.json())
+        self.assertFalse(any('reports_dailysalessummary' in q['sql'] for q in queries))
+
+    def test_cache_is_shared_between_processes(self):
+        """Test that version keys live in a backend every worker process sees."""
+        self.assertNotIn('locmem', settings.CACHES['default']['BACKEND'])
+
+    def test_write_invalidates_cache(self):
+        """Test that creating an invoice invalidates cached reports."""
+        url = reverse('dashboard:dashboard-data')
+        self.create_invoice(1)
+        self.assertEqual(self.client.get(url).json()['total_sales'], 10.0)
+        self.create_invoice(2)
+        self.assertEqual(self.client.get(url).json()['total_sales'], 20.0)
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ReportJobTest(TestCase):
+    """Test cases for offline report jobs."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        self.customer = Customer.objects.create(
+            user=self.user,
+            name='Test Customer'
+        )
+        Invoice.objects.create(
+            user=self.user,
+            business=self.business,
+            customer=self.customer,
+            date=date(2025, 1, 1),
+            invoice_number='INV-1',
+            total_amount=Decimal('10.00'),
+            status='paid'
+        )
+        self.client.login(username='testuser', password='testpass123')
+
+    def create_job(self, report_type, params):
+        """Queue a report job through the API and return its id."""
+        response = self.client.post(
+            reverse('reports:report-job-list-create'),
+            {'report_type': report_type, 'params': params},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()['id']
+
+    def test_job_lifecycle(self):
+        """Test queueing, running and downloading a report job."""
+        job_id = self.create_job('sales', {'start_date': '2025-01-01', 'end_date': '2025-01-02'})
+        download_url = reverse('reports:report-job-download', args=[job_id])
+        self.assertEqual(self.client.get(download_url).status_code, 409)
+
+        self.assertEqual(claim_jobs(10), [job_id])
+        self.assertEqual(run_job(job_id), 'completed')
+
+        detail = self.client.get(reverse('reports:report-job-detail', args=[job_id])).json()
+        self.assertEqual(detail['status'], 'completed')
+        response = self.client.get(detail['download_url'])
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(data['total_sales'], 10.0)
+        self.assertEqual(len(data['chart_data']), 2)
+
+    def test_csv_job_and_expiry(self):
+        """Test that CSV jobs produce a file which is removed on expiry."""
+        job_id = self.create_job('sales_csv', {})
+        claim_jobs(10)
+        run_job(job_id)
+        job = ReportJob.objects.get(pk=job_id)
+        with job.file.open('rb') as artifact:
+            self.assertIn(b'INV-1,Test Customer', artifact.read())
+
+        self.assertEqual(expire_jobs(now=job.expires_at), 1)
+        response = self.client.get(reverse('reports:report-job-download', args=[job_id]))
+        self.assertEqual(response.status_code, 410)
+
+    def test_stale_running_jobs_reclaimed(self):
+        """Test that jobs left running past the timeout are claimed again."""
+        job_id = self.create_job('sales', {})
+        self.assertEqual(claim_jobs(10), [job_id])
+        self.assertEqual(claim_jobs(10), [])
+
+        started_at = ReportJob.objects.get(pk=job_id).started_at
+        later = started_at + timedelta(seconds=settings.REPORT_JOB_TIMEOUT + 1)
+        self.assertEqual(claim_jobs(10, now=later), [job_id])
+        self.assertEqual(ReportJob.objects.get(pk=job_id).started_at, later)
+
+    def test_broken_job_marked_failed(self):
+        """Test that a job which cannot be set up is marked failed instead of left running."""
+        job = ReportJob.objects.create(user=self.user, report_type='unknown')
+        claim_jobs(10)
+        self.assertEqual(run_job(job.pk), 'failed')
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertTrue(job.error)
+        self.assertIsNotNone(job.finished_at)
+
+class ReceivablesAgingTest(TestCase):
+    """Test cases for the receivables aging API."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        alice = Customer.objects.create(user=self.user, name='Alice')
+        bob = Customer.objects.create(user=self.user, name='Bob')
+        for number, (customer, day, total, paid, status) in enumerate([
+            (alice, date(2025, 3, 20), '100.00', '0.00', 'sent'),
+            (alice, date(2025, 2, 1), '50.00', '20.00', 'overdue'),
+            (bob, date(2024, 12, 1), '80.00', '0.00', 'overdue'),
+            (bob, date(2025, 3, 1), '40.00', '40.00', 'paid'),
+            (bob, date(2025, 3, 1), '99.00', '0.00', 'cancelled'),
+        ]):
+            Invoice.objects.create(
+                user=self.user,
+                business=self.business,
+                customer=customer,
+                date=day,
+                invoice_number=f'INV-{number}',
+                total_amount=Decimal(total),
+                paid_amount=Decimal(paid),
+                status=status
+            )
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_buckets_and_parties(self):
+        """Test aging buckets and the per-customer breakdown."""
+        response = self.client.get(reverse('reports:receivables-aging-data'), {
+            'as_of': '2025-03-31'
+        })
+        data = response.json()
+        self.assertEqual(data['totals'], {
+            'days_0_30': 100.0,
+            'days_31_60': 30.0,
+            'days_61_90': 0.0,
+            'days_90_plus': 80.0,
+            'total_due': 210.0,
+            'document_count': 3,
+        })
+        self.assertEqual(data['party_count'], 2)
+        self.assertEqual(
+            [(p['name'], p['total_due']) for p in data['parties']],
+            [('Alice', 130.0), ('Bob', 80.0)]
+        )
+
+    def test_party_pagination(self):
+        """Test paging through the per-customer breakdown."""
+        response = self.client.get(reverse('reports:receivables-aging-data'), {
+            'as_of': '2025-03-31',
+            'page': 2,
+            'page_size': 1
+        })
+        self.assertEqual([p['name'] for p in response.json()['parties']], ['Bob'])
+
+class TopSellersTest(TestCase):
+    """Test cases for best-seller analytics."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        self.customer = Customer.objects.create(
+            user=self.user,
+            name='Test Customer'
+        )
+        self.tea = Product.objects.create(
+            user=self.user, business=self.business, name='Tea', sku='TEA', price=Decimal('5.00')
+        )
+        self.rice = Product.objects.create(
+            user=self.user, business=self.business, name='Rice', sku='RICE',
+            price=Decimal('50.00'), stock_quantity=500
+        )
+        self.invoice = Invoice.objects.create(
+            user=self.user,
+            business=self.business,
+            customer=self.customer,
+            date=date.today(),
+            invoice_number='INV-1'
+        )
+        InvoiceItem.objects.create(invoice=self.invoice, product=self.tea, quantity=8, unit_price=Decimal('5.00'))
+        self.rice_item = InvoiceItem.objects.create(
+            invoice=self.invoice, product=self.rice, quantity=2, unit_price=Decimal('50.00')
+        )
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_top_products_ranked_by_quantity_sold(self):
+        """Test that top products reflect sales, not stock levels."""
+        response = self.client.get(reverse('dashboard:dashboard-data'))
+        self.assertEqual(response.json()['top_products'], [
+            {'id': self.tea.id, 'name': 'Tea', 'quantity': 8, 'revenue': 40.0},
+            {'id': self.rice.id, 'name': 'Rice', 'quantity': 2, 'revenue': 100.0},
+        ])
+
+    def test_item_changes_update_rollup(self):
+        """Test that item edits and deletions update the product sales rollup."""
+        self.rice_item.quantity = 10
+        self.rice_item.save()
+        top = top_sellers([self.business.id])
+        self.assertEqual((top[0]['name'], top[0]['quantity']), ('Rice', 10))
+
+        self.invoice.delete()
+        self.assertEqual(top_sellers([self.business.id]), [])
+
+    def test_window_excludes_old_sales(self):
+        """Test that moving an invoice out of the window drops its sales."""
+        self.invoice.date = date.today() - timedelta(days=60)
+        self.invoice.save()
+        self.assertEqual(top_sellers([self.business.id], days=30), [])
+        self.assertEqual(len(top_sellers([self.business.id], days=90)), 2)
@@ -0,0 +1,363 @@
+"""
+Test cases for Digital Khata sales APIs.
+"""
+
+from datetime import date
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth.models import User
+from accounts.models import BusinessProfile, Customer, DocumentSequence, JournalEntry
+from accounts.sequences import SequenceAllocator, sequences
+from inventory.models import Product
+from reports.models import DailySalesSummary, DailyProductSales
+from purchases.models import Bill, BillItem
+from accounts.models import Supplier
+from sales.models import Invoice, InvoiceItem
+from utils.pagination import encode_cursor
+
+
+class InvoiceBatchTest(TestCase):
+    """Test cases for batch invoice creation."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        self.customer = Customer.objects.create(user=self.user, name='Test Customer')
+        self.tea = Product.objects.create(
+            user=self.user, business=self.business, name='Tea', sku='TEA',
+            price=Decimal('10.00'), tax_rate=Decimal('13.00'), stock_quantity=1000
+        )
+        self.milk = Product.objects.create(
+            user=self.user, business=self.business, name='Milk', sku='MILK',
+            price=Decimal('5.00'), stock_quantity=3
+        )
+        self.client.login(username='testuser', password='testpass123')
+
+    def invoice(self, number, items, status='sent'):
+        return {
+            'invoice_number': f'POS-{number}',
+            'customer': self.customer.pk,
+            'date': '2025-06-01',
+            'status': status,
+            'items': items,
+        }
+
+    def sync(self, invoices):
+        return self.client.post(
+            reverse('sales:invoice-batch-create'), {'invoices': invoices}, content_type='application/json'
+        )
+
+    def test_batch_creates_valid_invoices(self):
+        """Test that valid invoices are created with their totals, stock, rollups and postings."""
+        response = self.sync([
+            self.invoice(1, [{'product': self.tea.pk, 'quantity': 2}, {'product': self.milk.pk, 'quantity': 1}]),
+            self.invoice(2, [{'product': 9999, 'quantity': 1}]),
+            self.invoice(3, [{'product': self.tea.pk, 'quantity': 3, 'unit_price': '9.00'}]),
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['results'][1]['errors'], ['item 1: unknown product'])
+
+        invoice = Invoice.objects.get(pk=response.data['results'][0]['id'])
+        self.assertEqual(invoice.items.count(), 2)
+        self.assertEqual(invoice.total_amount, Decimal('27.60'))
+        self.assertEqual(invoice.due_amount, Decimal('27.60'))
+
+        self.tea.refresh_from_db()
+        self.assertEqual(self.tea.stock_quantity, 995)
+        summary = DailySalesSummary.objects.get(business=self.business, date=date(2025, 6, 1), status='sent')
+        self.assertEqual(summary.document_count, 2)
+        self.assertEqual(summary.total_amount, Decimal('58.11'))
+        self.assertEqual(
+            DailyProductSales.objects.get(business=self.business, product=self.tea).quantity, 5
+        )
+        self.assertTrue(JournalEntry.objects.filter(reference_no=f'AUTO-INV-{invoice.pk}').exists())
+
+    def test_batch_rejects_oversold_and_duplicate_invoices(self):
+        """Test that stock and invoice numbers are checked across the whole batch."""
+        response = self.sync([
+            self.invoice(1, [{'product': self.milk.pk, 'quantity': 2}]),
+            self.invoice(2, [{'product': self.milk.pk, 'quantity': 2}]),
+            self.invoice(1, [{'product': self.tea.pk, 'quantity': 1}]),
+        ])
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['results'][1]['errors'], ['insufficient stock of Milk'])
+        self.assertEqual(response.data['results'][2]['errors'], ['invoice_number POS-1 already exists'])
+        self.milk.refresh_from_db()
+        self.assertEqual(self.milk.stock_quantity, 1)
+
+    def test_batch_query_count_is_bounded(self):
+        """Test that a large sync takes a fixed number of queries."""
+        invoices = [
+            self.invoice(number, [{'product': self.tea.pk, 'quantity': 1}]) for number in range(200)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.sync(invoices)
+        self.assertEqual(response.data['created'], 200)
+        # Queries other than the cache's own table
+        self.assertLess(len([q for q in queries if 'digital_khata_cache' not in q['sql']]), 60)
+
+
+class DocumentSequenceTest(TestCase):
+    """Test cases for block-allocated document numbers."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        sequences.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        self.customer = Customer.objects.create(user=self.user, name='Test Customer')
+        self.tea = Product.objects.create(
+            user=self.user, business=self.business, name='Tea', sku='TEA',
+            price=Decimal('10.00'), stock_quantity=100
+        )
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_numbers_come_from_blocks(self):
+        """Test that a process writes the counter once per block and hands out the rest from memory."""
+        allocator = SequenceAllocator(block_size=3)
+        prefix = f'INV-{self.business.id}-2025-'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(
+                allocator.allocate(self.business.id, 'invoice', 2, date(2025, 5, 1)),
+                [prefix + '00001', prefix + '00002']
+            )
+        with self.assertNumQueries(0):
+            self.assertEqual(allocator.next_number(self.business.id, 'invoice', date(2025, 5, 1)), prefix + '00003')
+
+        # Another process reserves the next block
+        other = SequenceAllocator(block_size=3)
+        self.assertEqual(other.next_number(self.business.id, 'invoice', date(2025, 5, 1)), prefix + '00004')
+        self.assertEqual(
+            DocumentSequence.objects.get(business=self.business, series='invoice', fiscal_year=2025).next_value, 7
+        )
+
+    @override_settings(FISCAL_YEAR_START_MONTH=7)
+    def test_series_reset_every_fiscal_year(self):
+        """Test that resetting series restart each fiscal year and others do not."""
+        allocator = SequenceAllocator(block_size=10)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(allocator.next_number(self.business.id, 'bill', date(2025, 6, 30)), f'BILL-{self.business.id}-2024-00001')
+            self.assertEqual(allocator.next_number(self.business.id, 'bill', date(2025, 7, 1)), f'BILL-{self.business.id}-2025-00001')
+            self.assertEqual(allocator.next_number(self.business.id, 'sku', date(2025, 6, 30)), f'SKU-{self.business.id}-000001')
+        self.assertEqual(allocator.next_number(self.business.id, 'sku', date(2025, 7, 1)), f'SKU-{self.business.id}-000002')
+
+    def test_rolled_back_block_is_not_kept(self):
+        """Test that a block reserved by a rolled back transaction is neither kept nor counted."""
+        allocator = SequenceAllocator(block_size=5)
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    allocator.next_number(self.business.id, 'invoice', date(2025, 5, 1))
+                    raise RuntimeError
+        self.assertFalse(DocumentSequence.objects.exists())
+        self.assertEqual(allocator.next_number(self.business.id, 'invoice', date(2025, 5, 1)), f'INV-{self.business.id}-2025-00001')
+
+    def test_block_kept_after_commit(self):
+        """Test that blocks reserved in a transaction are only handed out from memory once it commits."""
+        allocator = SequenceAllocator(block_size=5)
+        prefix = f'INV-{self.business.id}-2025-'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(allocator.next_number(self.business.id, 'invoice', date(2025, 5, 1)), prefix + '00001')
+            self.assertEqual(allocator.next_number(self.business.id, 'invoice', date(2025, 5, 1)), prefix + '00006')
+        with self.assertNumQueries(0):
+            self.assertEqual(allocator.next_number(self.business.id, 'invoice', date(2025, 5, 1)), prefix + '00007')
+        self.assertEqual(
+            DocumentSequence.objects.get(business=self.business, series='invoice', fiscal_year=2025).next_value, 11
+        )
+
+    def test_unnumbered_invoices_are_numbered(self):
+        """Test that the API and batch sync number invoices sent without a number."""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('sales:invoice-list-create'), {
+                'customer': self.customer.pk,
+                'date': '2025-06-01',
+                'items': [{'product': self.tea.pk, 'quantity': 1, 'unit_price': '10.00', 'total_price': '10.00'}],
+            }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['invoice_number'], f'INV-{self.business.id}-2025-00001')
+
+        response = self.client.post(reverse('sales:invoice-batch-create'), {'invoices': [
+            {'customer': self.customer.pk, 'date': '2025-06-02', 'items': [{'product': self.tea.pk, 'quantity': 1}]},
+            {'customer': self.customer.pk, 'date': '2026-01-02', 'items': [{'product': self.tea.pk, 'quantity': 1}]},
+            {'customer': self.customer.pk, 'date': '2025-06-03', 'items': [{'product': self.tea.pk, 'quantity': 1}]},
+        ]}, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([result['invoice_number'] for result in response.data['results']], [
+            f'INV-{self.business.id}-2025-00002',
+            f'INV-{self.business.id}-2026-00001',
+            f'INV-{self.business.id}-2025-00003',
+        ])
+
+
+class DocumentListQueryTest(TestCase):
+    """Test cases for the query cost of the invoice and bill APIs."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        self.customer = Customer.objects.create(user=self.user, name='Test Customer')
+        self.supplier = Supplier.objects.create(user=self.user, name='Test Supplier')
+        self.products = [
+            Product.objects.create(
+                user=self.user, business=self.business, name=f'Product {number}', sku=f'P-{number}',
+                price=Decimal('10.00'), stock_quantity=100
+            )
+            for number in range(5)
+        ]
+        self.client.login(username='testuser', password='testpass123')
+
+    def add_documents(self, count, lines):
+        start = Invoice.objects.count()
+        for number in range(start, start + count):
+            invoice = Invoice.objects.create(
+                user=self.user, business=self.business, customer=self.customer,
+                date=date(2025, 6, 1), invoice_number=f'INV-{number}', total_amount=Decimal('10.00')
+            )
+            bill = Bill.objects.create(
+                user=self.user, business=self.business, supplier=self.supplier,
+                date=date(2025, 6, 1), bill_number=f'BILL-{number}', total_amount=Decimal('10.00')
+            )
+            for product in self.products[:lines]:
+                InvoiceItem.objects.create(
+                    invoice=invoice, product=product, quantity=1,
+                    unit_price=product.price, total_price=product.price
+                )
+                BillItem.objects.create(
+                    bill=bill, product=product, quantity=1,
+                    unit_price=product.price, total_price=product.price
+                )
+        return invoice, bill
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        """Test that list and detail pages cost the same queries however many rows and lines they show."""
+        invoice, bill = self.add_documents(1, 1)
+        urls = [reverse('sales:invoice-list-create'), reverse('purchases:bill-list-create')]
+        # Session and user, then the count, the documents with their
+        # customer or supplier, and the lines with their products
+        small = [self.count_queries(url) for url in urls]
+        self.assertEqual(small, [5, 5])
+        small_detail = [
+            self.count_queries(reverse('sales:invoice-detail', args=[invoice.pk])),
+            self.count_queries(reverse('purchases:bill-detail', args=[bill.pk])),
+        ]
+        self.assertEqual(small_detail, [4, 4])
+
+        invoice, bill = self.add_documents(20, 5)
+        response = self.client.get(urls[0])
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(response.data['results'][0]['customer_name'], 'Test Customer')
+        self.assertEqual(response.data['results'][0]['items'][0]['product_name'], 'Product 0')
+        self.assertEqual([self.count_queries(url) for url in urls], small)
+        self.assertEqual([
+            self.count_queries(reverse('sales:invoice-detail', args=[invoice.pk])),
+            self.count_queries(reverse('purchases:bill-detail', args=[bill.pk])),
+        ], small_detail)
+
+
+class KeysetPaginationTest(TestCase):
+    """Test cases for cursor pagination of the API lists."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.business = BusinessProfile.objects.create(
+            user=self.user,
+            business_name='Test Business'
+        )
+        self.customer = Customer.objects.create(user=self.user, name='Test Customer')
+        for number in range(45):
+            self.add_invoice(number)
+        self.url = reverse('sales:invoice-list-create')
+        self.client.login(username='testuser', password='testpass123')
+
+    def add_invoice(self, number):
+        return Invoice.objects.create(
+            user=self.user, business=self.business, customer=self.customer,
+            date=date(2025, 6, 1 + number % 3), invoice_number=f'INV-{number}', total_amount=Decimal('10.00')
+        )
+
+    def test_cursor_pages_walk_every_row_once(self):
+        """Test that cursor pages return every invoice once, newest first, at a constant cost."""
+        expected = list(Invoice.objects.order_by('-date', '-id').values_list('id', flat=True))
+        seen = []
+        costs = []
+        url = self.url + '?pagination=cursor'
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            costs.append(len(queries))
+            seen += [invoice['id'] for invoice in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(costs), 3)
+        self.assertEqual(len(set(costs)), 1)
+
+    def test_invalid_cursor(self):
+        """Test that tampered cursors and cursors holding unreadable values are rejected."""
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(self.url, {'cursor': encode_cursor(['2025-13-45', 1])})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(self.url, {'cursor': encode_cursor(['2025-06-01', 'x'])})
+        self.assertEqual(response.status_code, 404)
+
+    def test_approximate_count_is_cached(self):
+        """Test that the approximate count header is cached per tenant and query."""
+        response = self.client.get(self.url, {'pagination': 'cursor', 'count': 'estimate'})
+        self.assertEqual(response['X-Approximate-Count'], '45')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, {'pagination': 'cursor', 'count': 'estimate'})
+        self.assertFalse([q for q in queries if 'COUNT(' in q['sql'] and 'sales_invoice' in q['sql']])
+
+        self.add_invoice(45)
+        response = self.client.get(self.url, {'pagination': 'cursor', 'count': 'estimate'})
+        self.assertEqual(response['X-Approximate-Count'], '45')
+        # Other queries are counted on their own
+        response = self.client.get(self.url, {'pagination': 'cursor', 'count': 'estimate', 'status': 'draft'})
+        self.assertEqual(response['X-Approximate-Count'], '46')
+
+        # Page numbers still work and keep their exact count
+        response = self.client.get(self.url, {'page': 3})
+        self.assertEqual(response.data['count'], 46)
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertNotIn('X-Approximate-Count', response)
@@ -0,0 +1,94 @@
+"""
+Eager loading of the relations a serializer renders.
+
+Serializers read related rows lazily: customer.name costs a query per
+invoice and nested items a query per invoice, plus one per line for their
+product names. eager_load walks a serializer's readable fields instead and
+adds the matching select_related and prefetch_related calls, so rendering a
+page costs a fixed number of queries however many rows and lines it has.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+# Serializer class -> (select_related paths, prefetch_related lookups)
+_paths = {}
+
+
+def _forward_path(model, parts):
+    """Return the longest prefix of an attribute path made of forward to-one relations."""
+    path = []
+    for part in parts:
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            break
+        if not (field.many_to_one or field.one_to_one):
+            break
+        path.append(part)
+        model = field.related_model
+    return path
+
+
+def related_paths(serializer, model):
+    """
+    Return the relations a serializer's readable fields follow.
+
+    Args:
+        serializer (Serializer): A serializer instance.
+        model (Model): The model it renders.
+
+    Returns:
+        tuple: (set of select_related paths, list of prefetch_related lookups).
+    """
+    selects = set()
+    prefetches = []
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        parts = field.source.split('.')
+        if isinstance(field, serializers.ListSerializer):
+            # Nested many: one query for all rows, loading their own relations
+            child = field.child
+            child_model = child.Meta.model
+            prefetches.append(Prefetch(
+                '__'.join(parts),
+                queryset=eager_load(child_model._default_manager.all(), child)
+            ))
+        elif isinstance(field, serializers.ManyRelatedField):
+            prefetches.append('__'.join(parts))
+        elif isinstance(field, serializers.BaseSerializer):
+            path = _forward_path(model, parts)
+            if path == parts:
+                child_selects, child_prefetches = related_paths(field, field.Meta.model)
+                prefix = '__'.join(path)
+                selects.add(prefix)
+                selects.update(f'{prefix}__{child}' for child in child_selects)
+                prefetches += [
+                    Prefetch(f'{prefix}__{lookup.prefetch_through}', queryset=lookup.queryset)
+                    if isinstance(lookup, Prefetch) else f'{prefix}__{lookup}'
+                    for lookup in child_prefetches
+                ]
+        elif len(parts) > 1:
+            # customer.name reads the customer row; the last part is its attribute
+            path = _forward_path(model, parts[:-1])
+            if path:
+                selects.add('__'.join(path))
+    return selects, prefetches
+
+
+def eager_load(queryset, serializer):
+    """Return a queryset loading every relation a serializer will render."""
+    key = type(serializer)
+    if key not in _paths:
+        _paths[key] = related_paths(serializer, queryset.model)
+    selects, prefetches = _paths[key]
+    return queryset.select_related(*selects).prefetch_related(*prefetches)
+
+
+class EagerLoadingMixin:
+    """Generic API view mixin loading the relations its serializer renders with its rows."""
+
+    def filter_queryset(self, queryset):
+        return eager_load(super().filter_queryset(queryset), self.get_serializer())
@@ -2,56 +2,49 @@
 Utility functions for Digital Khata application.
 """
 
-from django.utils.text import slugify
-import random
-import string
+from accounts.sequences import sequences
 
-def generate_invoice_number(prefix='INV'):
+def generate_invoice_number(business_id, day=None):
     """
     Generate a unique invoice number.
     
     Args:
-        prefix (str): Prefix for the invoice number. Defaults to 'INV'.
+        business_id (int): The business the invoice belongs to.
+        day (date): Invoice date choosing the fiscal year. Defaults to today.
         
     Returns:
-        str: Generated invoice number in format PREFIX-YYYYMMDD-XXXX
+        str: Next number of the business's invoice series, by default
+            INV-<business>-<fiscal year>-NNNNN
     """
-    from datetime import datetime
-    date_str = datetime.now().strftime('%Y%m%d')
-    random_str = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
-    return f"{prefix}-{date_str}-{random_str}"
+    return sequences.next_number(business_id, 'invoice', day)
 
-def generate_bill_number(prefix='BILL'):
+def generate_bill_number(business_id, day=None):
     """
     Generate a unique bill number.
     
     Args:
-        prefix (str): Prefix for the bill number. Defaults to 'BILL'.
+        business_id (int): The business the bill belongs to.
+        day (date): Bill date choosing the fiscal year. Defaults to today.
         
     Returns:
-        str: Generated bill number in format PREFIX-YYYYMMDD-XXXX
+        str: Next number of the business's bill series, by default
+            BILL-<business>-<fiscal year>-NNNNN
     """
-    from datetime import datetime
-    date_str = datetime.now().strftime('%Y%m%d')
-    random_str = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
-    return f"{prefix}-{date_str}-{random_str}"
+    return sequences.next_number(business_id, 'bill', day)
 
-def generate_sku(product_name, prefix='SKU'):
+def generate_sku(business_id, product_name=''):
     """
-    Generate a SKU for a product.
+    Generate a unique SKU for a product.
     
     Args:
-        product_name (str): Name of the product.
-        prefix (str): Prefix for the SKU. Defaults to 'SKU'.
+        business_id (int): The business the product belongs to.
+        product_name (str): Name of the product, for SKU formats using {name}.
         
     Returns:
-        str: Generated SKU in format PREFIX-XXXXXX
+        str: Next number of the business's SKU series, by default
+            SKU-<business>-NNNNNN
     """
-    # Create a slug from the product name
-    slug = slugify(product_name)[:6].upper()
-    # Add random characters to ensure uniqueness
-    random_str = ''.join(random.choices(string.digits, k=4))
-    return f"{prefix}-{slug}-{random_str}"
+    return sequences.next_number(business_id, 'sku', name=product_name)
 
 def format_currency(amount, currency='NPR'):
     """
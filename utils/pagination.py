@@ -0,0 +1,152 @@
+"""
+Page-number pagination with a keyset (cursor) mode for large collections.
+
+Page numbers cost a COUNT(*) and an OFFSET scan that grows with the page, so
+deep pages of a large tenant's invoices get slower and slower. A request
+asking for ?pagination=cursor (or carrying a ?cursor=) is instead paginated
+on the view's keyset_ordering, newest first: each page carries a signed
+cursor holding the key of its last row, and the next page starts right after
+it through the matching index, so page 2,000 costs the same as the first.
+Cursor pages only link forward.
+
+Since cursor pages have no count, ?count=estimate adds an X-Approximate-Count
+header holding the collection's count, cached per tenant and query for a few
+minutes: writes are not seen until it expires, which is what lets busy
+tenants skip the COUNT(*) on every page.
+"""
+
+import hashlib
+from collections import OrderedDict
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+CURSOR_SALT = 'utils.pagination'
+
+APPROXIMATE_COUNT_KEY = 'approximate-count:{}:{}:{}'
+
+APPROXIMATE_COUNT_HEADER = 'X-Approximate-Count'
+
+
+def encode_cursor(values):
+    """Return the cursor of the page that follows a row with these key values."""
+    return signing.dumps(
+        [value.isoformat() if hasattr(value, 'isoformat') else value for value in values],
+        salt=CURSOR_SALT, compress=True
+    )
+
+
+def decode_cursor(cursor, model, fields):
+    """
+    Decode a cursor made by encode_cursor.
+
+    Returns:
+        list: The key values of the last row of the previous page.
+
+    Raises:
+        ValueError: If the cursor is malformed, was tampered with or holds
+            values its fields cannot read.
+    """
+    try:
+        values = signing.loads(cursor, salt=CURSOR_SALT)
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise ValueError
+        return [model._meta.get_field(field).to_python(value) for field, value in zip(fields, values)]
+    except (signing.BadSignature, TypeError, ValueError, ValidationError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def rows_before(fields, values):
+    """Return the filter of rows that come after a key in descending key order."""
+    condition = Q()
+    for position, field in enumerate(fields):
+        earlier = Q(**{f'{field}__lt': values[position]})
+        for equal_field, value in zip(fields[:position], values[:position]):
+            earlier &= Q(**{equal_field: value})
+        condition |= earlier
+    return condition
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Default API pagination: page numbers, or keyset pages on request.
+
+    Views set keyset_ordering to the indexed fields their rows are paged on,
+    ending with a unique field; rows come newest first either way.
+    """
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    count_query_param = 'count'
+    default_keyset_ordering = ('id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.keyset = (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.mode_query_param) == 'cursor'
+        )
+        self.fields = tuple(getattr(view, 'keyset_ordering', self.default_keyset_ordering))
+
+        self.approximate_count = None
+        if request.query_params.get(self.count_query_param) == 'estimate':
+            self.approximate_count = self.get_approximate_count(queryset, request, view)
+
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+        queryset = queryset.order_by(*[f'-{field}' for field in self.fields])
+        if cursor:
+            try:
+                values = decode_cursor(cursor, queryset.model, self.fields)
+            except ValueError:
+                raise NotFound('Invalid cursor')
+            queryset = queryset.filter(rows_before(self.fields, values))
+
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        self.last_values = [getattr(rows[-1], field) for field in self.fields] if rows else None
+        return rows
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.mode_query_param, 'cursor')
+        return replace_query_param(url, self.cursor_query_param, encode_cursor(self.last_values))
+
+    def get_paginated_response(self, data):
+        if self.keyset:
+            response = Response(OrderedDict([
+                ('next', self.get_next_link()),
+                ('results', data),
+            ]))
+        else:
+            response = super().get_paginated_response(data)
+        if self.approximate_count is not None:
+            response[APPROXIMATE_COUNT_HEADER] = str(self.approximate_count)
+        return response
+
+    def get_approximate_count(self, queryset, request, view):
+        """Return the count of the collection, cached per tenant and query."""
+        ignored = {self.cursor_query_param, self.mode_query_param, self.count_query_param, self.page_query_param}
+        params = sorted(
+            (name, sorted(values)) for name, values in request.query_params.lists() if name not in ignored
+        )
+        digest = hashlib.md5(repr((type(view).__name__, params)).encode()).hexdigest()
+        key = APPROXIMATE_COUNT_KEY.format(request.user.pk, queryset.model._meta.label_lower, digest)
+        count = cache.get(key)
+        if count is None:
+            count = queryset.order_by().count()
+            cache.set(key, count, getattr(settings, 'APPROXIMATE_COUNT_TIMEOUT', 300))
+        return count
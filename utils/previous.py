@@ -0,0 +1,40 @@
+"""
+The stored row of an invoice or bill being saved, read once per save.
+
+The report rollups, journal posting and the closed-period check all compare
+a saved document with its stored row. remember_previous_row reads the whole
+row with one SELECT; the modules using it import this one first, so it is
+connected, and runs, before their own pre_save handlers, which then take
+their fields from previous_row instead of querying the row again.
+"""
+
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+from purchases.models import Bill
+from sales.models import Invoice
+
+
+@receiver(pre_save, sender=Invoice)
+@receiver(pre_save, sender=Bill)
+def remember_previous_row(sender, instance, **kwargs):
+    """Store the stored field values of a document, or None for a new one."""
+    instance._previous_row = None
+    if instance.pk:
+        instance._previous_row = sender.objects.filter(pk=instance.pk).values().first()
+
+
+def previous_row(instance, fields):
+    """
+    Return the stored values of some fields of a document being saved.
+
+    Args:
+        instance (Model): The Invoice or Bill in its pre_save.
+        fields (iterable): Field attribute names, such as 'business_id'.
+
+    Returns:
+        dict: field -> stored value, or None if the document is not stored yet.
+    """
+    row = getattr(instance, '_previous_row', None)
+    if row is None:
+        return None
+    return {field: row[field] for field in fields}